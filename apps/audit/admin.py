@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from apps.audit.models import AuditLog, SecurityLog
+
+
+class ReadOnlyLogAdmin(admin.ModelAdmin):
+    """Logs are append-only; retention is handled by dropping partitions"""
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(ReadOnlyLogAdmin):
+    list_display = ['changed_at', 'action', 'table_name', 'record_id', 'changed_by_id', 'ip_address']
+    list_filter = ['action', 'table_name']
+    search_fields = ['record_id']
+    date_hierarchy = 'changed_at'
+
+
+@admin.register(SecurityLog)
+class SecurityLogAdmin(ReadOnlyLogAdmin):
+    list_display = ['created_at', 'event_type', 'status', 'user_id', 'ip_address', 'risk_score']
+    list_filter = ['event_type', 'status']
+    date_hierarchy = 'created_at'
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.audit'
+
+    def ready(self):
+        from apps.audit import signals  # noqa: F401
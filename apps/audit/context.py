@@ -0,0 +1,41 @@
+"""
+The request being served, so audit events raised deep inside model saves
+can record who made the change and from where.
+"""
+
+import contextvars
+
+from core.http import client_ip
+
+_current_request = contextvars.ContextVar('audit_request', default=None)
+
+
+class AuditContextMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+def request_details():
+    request = _current_request.get()
+    if request is None:
+        return {}
+    return {
+        'ip_address': client_ip(request),
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+    }
+
+
+def current_user_id():
+    # DRF copies the token-authenticated user onto the Django request
+    request = _current_request.get()
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+# table -> partition column; both tables are empty when this runs
+PARTITIONED = {
+    'AuditLog': 'changed_at',
+    'SecurityLog': 'created_at',
+}
+MONTHS_AHEAD = 2
+
+
+def month_start(offset):
+    today = timezone.now().date()
+    index = today.year * 12 + today.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for model_name, column in PARTITIONED.items():
+        model = apps.get_model('audit', model_name)
+        table = model._meta.db_table
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+        statements = [
+            # Keep the id sequence alive across the swap
+            f"ALTER SEQUENCE {sequence} OWNED BY NONE",
+            f"CREATE TABLE {quote(table + '_partitioned')} (LIKE {quote(table)} INCLUDING DEFAULTS)"
+            f" PARTITION BY RANGE ({quote(column)})",
+            f"DROP TABLE {quote(table)}",
+            f"ALTER TABLE {quote(table + '_partitioned')} RENAME TO {quote(table)}",
+            f"ALTER SEQUENCE {sequence} OWNED BY {quote(table)}.id",
+            # The partition key has to be part of the primary key
+            f"ALTER TABLE {quote(table)} ADD PRIMARY KEY (id, {quote(column)})",
+            f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT",
+        ]
+        for offset in range(MONTHS_AHEAD + 1):
+            start, end = month_start(offset), month_start(offset + 1)
+            statements.append(
+                f"CREATE TABLE {quote(f'{table}_p{start:%Y%m}')} PARTITION OF {quote(table)} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        for sql in statements:
+            schema_editor.execute(sql)
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        # Irreversible in place; rolling back 0001 drops the partitioned tables
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
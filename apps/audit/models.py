@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class AuditLog(models.Model):
+    """
+    Row-level change history. On PostgreSQL the table is range partitioned
+    by month on ``changed_at`` (see apps.audit.partitions), so its primary
+    key there is ``(id, changed_at)``. Rows are written in batches by
+    apps.audit.writer and are never updated.
+    """
+
+    ACTION_CHOICES = [
+        ("INSERT", "Insert"),
+        ("UPDATE", "Update"),
+        ("DELETE", "Delete"),
+    ]
+
+    table_name = models.CharField(max_length=100)
+    record_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    old_values = models.JSONField(null=True, blank=True)
+    new_values = models.JSONField(null=True, blank=True)
+    # No FK constraint: logs outlive users and partitions are dropped wholesale
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, null=True, blank=True,
+        db_constraint=False, db_index=False, related_name='+',
+    )
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=500, blank=True)
+    # Set when the event happens, not when the batch is flushed
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'audit_logs'
+        indexes = [
+            models.Index(fields=['table_name', 'record_id'], name='idx_audit_table_record'),
+            models.Index(fields=['changed_by', 'changed_at'], name='idx_audit_user_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.table_name}:{self.record_id}"
+
+
+class SecurityLog(models.Model):
+    """Authentication events, partitioned by month on ``created_at`` like AuditLog"""
+
+    EVENT_TYPE_CHOICES = [
+        ("login", "Login"),
+        ("logout", "Logout"),
+        ("password_change", "Password change"),
+        ("suspicious_activity", "Suspicious activity"),
+    ]
+    STATUS_CHOICES = [
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, null=True, blank=True,
+        db_constraint=False, db_index=False, related_name='+',
+    )
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=500, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="success")
+    risk_score = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'security_logs'
+        indexes = [
+            models.Index(
+                fields=['user', 'event_type', 'created_at'], name='idx_security_user_event'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.status} for {self.user_id}"
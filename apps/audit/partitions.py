@@ -0,0 +1,133 @@
+"""
+Monthly range partitions for the log tables on PostgreSQL.
+
+Migration 0002 turns both tables into partitioned tables. Partitions are named ``<table>_pYYYYMM`` and created a few months ahead;
+a DEFAULT partition (``<table>_default``) catches anything outside them
+until its month's partition is created. Retention drops whole
+partitions once their month is older than the table's retention period,
+which is a metadata change rather than a DELETE that bloats the table.
+Other backends keep plain tables and fall back to deleting rows.
+"""
+
+import re
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.audit.models import AuditLog, SecurityLog
+
+# model -> (partition column, retention setting)
+PARTITIONED = {
+    AuditLog: ('changed_at', 'AUDIT_LOG_RETENTION_MONTHS'),
+    SecurityLog: ('created_at', 'SECURITY_LOG_RETENTION_MONTHS'),
+}
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month():
+    return timezone.now().date().replace(day=1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def create_partition(cursor, table, column, start):
+    """
+    Add the partition for the month starting ``start``. PostgreSQL refuses
+    one whose range the DEFAULT partition already holds rows for, so those
+    are moved over with DEFAULT detached, all in one transaction.
+    """
+    quote = connection.ops.quote_name
+    name, end = partition_name(table, start), add_months(start, 1)
+    default = default_partition_name(table)
+    in_range = f"{quote(column)} >= %s AND {quote(column)} < %s"
+    create = (
+        f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)"
+    )
+    with transaction.atomic():
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {quote(default)} WHERE {in_range})", [start, end])
+        if not cursor.fetchone()[0]:
+            cursor.execute(create, [start, end])
+            return name
+        cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(default)}")
+        cursor.execute(create, [start, end])
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(default)} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(default)} DEFAULT")
+    return name
+
+
+def ensure_partitions(months_ahead=None):
+    """Create the partitions for this month and ``months_ahead`` following ones"""
+    if connection.vendor != 'postgresql':
+        return []
+    if months_ahead is None:
+        months_ahead = settings.LOG_PARTITIONS_AHEAD
+    created = []
+    with connection.cursor() as cursor:
+        for model, (column, _) in PARTITIONED.items():
+            table = model._meta.db_table
+            for offset in range(months_ahead + 1):
+                start = add_months(current_month(), offset)
+                cursor.execute("SELECT to_regclass(%s)", [partition_name(table, start)])
+                if cursor.fetchone()[0]:
+                    continue
+                created.append(create_partition(cursor, table, column, start))
+    return created
+
+
+def partitions(table):
+    """``{month: partition name}`` of the monthly partitions of ``table``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    result = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            result[date(int(match[1]), int(match[2]), 1)] = name
+    return result
+
+
+def drop_expired():
+    """Apply each table's retention; returns what was dropped or deleted"""
+    removed = []
+    for model, (column, retention_setting) in PARTITIONED.items():
+        cutoff = add_months(current_month(), -getattr(settings, retention_setting))
+        table = model._meta.db_table
+        if connection.vendor != 'postgresql':
+            cutoff_at = timezone.make_aware(datetime.combine(cutoff, time.min))
+            deleted, _ = model.objects.filter(**{f'{column}__lt': cutoff_at}).delete()
+            removed.append(f'{deleted} rows from {table}')
+            continue
+        for month, name in sorted(partitions(table).items()):
+            # A partition holds [month, month + 1); only drop it once all of it is expired
+            if add_months(month, 1) <= cutoff:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+                removed.append(name)
+    return removed
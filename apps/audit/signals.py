@@ -0,0 +1,121 @@
+import copy
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.audit import writer
+from apps.bookings.models import Booking
+from apps.properties.models import Property
+
+# Audited models and the fields never copied into the log
+AUDITED_MODELS = {
+    get_user_model(): {'password', 'last_login'},
+    Property: set(),
+    Booking: set(),
+}
+
+
+def audited_fields(model, update_fields=None):
+    excluded = AUDITED_MODELS[model]
+    return [
+        field for field in model._meta.concrete_fields
+        # auto_now timestamps change on every save and would make every save an UPDATE
+        if field.name not in excluded and not getattr(field, 'auto_now', False)
+        and (update_fields is None or field.name in update_fields or field.attname in update_fields)
+    ]
+
+
+def normalize(field, value):
+    if isinstance(value, FieldFile):
+        return value.name
+    if isinstance(field, DecimalField) and value is not None:
+        # Unsaved values like Decimal('120') must compare equal to the stored 120.00
+        return field.to_python(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def snapshot(fields, values):
+    values = {field.attname: normalize(field, values[field.attname]) for field in fields}
+    # Round-trip through JSON so every value compares the way it is logged
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def instance_values(instance, fields):
+    return snapshot(fields, {field.attname: getattr(instance, field.attname) for field in fields})
+
+
+def loaded_values(instance):
+    """Raw values of the instance's loaded (non-deferred) columns"""
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            # JSON values can be changed in place, which would change the copy too
+            values[field.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    return values
+
+
+def remember_loaded(sender, instance, **kwargs):
+    instance._audit_loaded = loaded_values(instance)
+
+
+for audited_model in AUDITED_MODELS:
+    post_init.connect(remember_loaded, sender=audited_model)
+
+
+@receiver(pre_save)
+def remember_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if sender not in AUDITED_MODELS:
+        return
+    instance._audit_previous = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    fields = audited_fields(sender, update_fields)
+    if not fields:
+        return
+    # The values the instance was loaded with, so a save costs no extra SELECT;
+    # only instances with deferred audited fields read the row
+    previous = getattr(instance, '_audit_loaded', {})
+    if any(field.attname not in previous for field in fields):
+        previous = sender._base_manager.filter(pk=instance.pk).values(
+            *[field.attname for field in fields]
+        ).first()
+    if previous is not None:
+        instance._audit_fields = fields
+        instance._audit_previous = snapshot(fields, previous)
+
+
+@receiver(post_save)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if sender not in AUDITED_MODELS or raw:
+        return
+    # The next save of this instance diffs against what was just written
+    instance._audit_loaded = loaded_values(instance)
+    if created:
+        writer.audit('INSERT', instance, new_values=instance_values(instance, audited_fields(sender)))
+        return
+    previous = getattr(instance, '_audit_previous', None)
+    if previous is None:
+        return
+    current = instance_values(instance, instance._audit_fields)
+    changed = [field for field in previous if previous[field] != current[field]]
+    if changed:
+        writer.audit(
+            'UPDATE', instance,
+            old_values={field: previous[field] for field in changed},
+            new_values={field: current[field] for field in changed},
+        )
+
+
+@receiver(post_delete)
+def log_delete(sender, instance, **kwargs):
+    if sender not in AUDITED_MODELS:
+        return
+    writer.audit('DELETE', instance, old_values=instance_values(instance, audited_fields(sender)))
+
@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from apps.audit import partitions, writer
+
+
+@shared_task(ignore_result=True)
+def flush_audit_events():
+    writer.drain()
+
+
+@shared_task(ignore_result=True)
+def maintain_log_partitions():
+    """Create upcoming monthly partitions and drop the expired ones"""
+    partitions.ensure_partitions()
+    partitions.drop_expired()
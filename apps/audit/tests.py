@@ -0,0 +1,134 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.audit import writer
+from apps.audit.models import AuditLog, SecurityLog
+from apps.properties.models import Address, Property
+from core.testing import redis_cache
+
+User = get_user_model()
+
+
+class AuditFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        self.host = User.objects.create_user(email='host@test.local', username='host', password='x')
+        address = Address.objects.create(
+            street_address='1 Test St', city='Hanoi', country='VN', latitude=21.03, longitude=105.85,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property = Property.objects.create(
+                host=self.host, address=address, title='Test stay', slug='stay',
+                property_type='house', base_price_per_night=Decimal('100'), max_guests=4,
+            )
+
+    def updates(self):
+        return AuditLog.objects.filter(
+            table_name=Property._meta.db_table, record_id=str(self.property.pk), action='UPDATE',
+        )
+
+
+class ChangeLogTests(AuditFixtureMixin, TestCase):
+    def reads_of_the_row(self, queries):
+        table = f'"{Property._meta.db_table}"'
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM {table}' in q['sql']]
+
+    def test_update_diffs_against_the_loaded_row_without_a_select(self):
+        prop = Property.objects.get(pk=self.property.pk)
+        prop.title = 'Renamed'
+        prop.base_price_per_night = Decimal('100.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                prop.save()
+        self.assertEqual(self.reads_of_the_row(queries.captured_queries), [])
+
+        log = self.updates().get()
+        self.assertEqual(log.old_values, {'title': 'Test stay'})
+        self.assertEqual(log.new_values, {'title': 'Renamed'})
+
+    def test_later_saves_diff_against_what_was_written(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.title = 'First'
+            self.property.save()
+            self.property.title = 'Second'
+            self.property.save()
+        self.assertEqual(
+            [log.old_values['title'] for log in self.updates().order_by('pk')], ['Test stay', 'First'],
+        )
+
+    def test_unchanged_save_is_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.get(pk=self.property.pk).save()
+        self.assertFalse(self.updates().exists())
+
+    def test_deferred_fields_fall_back_to_reading_the_row(self):
+        prop = Property.objects.only('pk').get(pk=self.property.pk)
+        prop.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.save(update_fields=['title'])
+        self.assertEqual(self.updates().get().old_values, {'title': 'Test stay'})
+
+    def test_json_changed_in_place_is_logged(self):
+        user = User.objects.get(pk=self.host.pk)
+        user.avatar_thumbnails['64'] = 'avatars/64.jpg'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['avatar_thumbnails'])
+        log = AuditLog.objects.get(table_name=User._meta.db_table, action='UPDATE')
+        self.assertEqual(log.old_values, {'avatar_thumbnails': {}})
+
+
+class SecurityLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_failed_logout_is_audited(self):
+        for payload in ({}, {'refresh': 'not-a-token'}):
+            with self.subTest(payload=payload):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post('/api/auth/logout/', payload, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            list(SecurityLog.objects.values_list('event_type', 'status', 'user_id')),
+            [('logout', 'failed', self.user.pk)] * 2,
+        )
+
+
+@redis_cache
+class BufferedWriterTests(AuditFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        # The fixture's own INSERT events
+        writer.drain()
+
+    def test_events_wait_in_the_stream_until_drained(self):
+        AuditLog.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.title = 'Renamed'
+            self.property.save()
+            writer.security('login', user_id=self.host.pk)
+        self.assertFalse(AuditLog.objects.exists())
+
+        self.assertEqual(writer.drain(batch_size=1), 2)
+        self.assertEqual(self.updates().get().new_values, {'title': 'Renamed'})
+        self.assertTrue(SecurityLog.objects.filter(user_id=self.host.pk).exists())
+        self.assertEqual(writer.drain(), 0)
+
+    def test_only_one_drainer_at_a_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            writer.security('login', user_id=self.host.pk)
+        lock = cache.client.get_client(write=True).lock(cache.make_key(writer.DRAIN_LOCK_KEY), timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+        try:
+            self.assertEqual(writer.drain(), 0)
+        finally:
+            lock.release()
+        self.assertEqual(writer.drain(), 1)
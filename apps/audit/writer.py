@@ -0,0 +1,148 @@
+"""
+Buffered writes of audit and security events.
+
+Request threads only append an event to a Redis stream (one XADD, after
+the surrounding transaction commits). ``drain`` runs periodically on
+Celery, reads the stream in batches and inserts each batch with one
+``bulk_create`` per table before trimming what it stored. A crash between
+the insert and the trim replays that batch, so delivery is at least once.
+Without a Redis cache, events are inserted directly.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import LockError, RedisError
+
+from apps.audit.context import current_user_id, request_details
+from apps.audit.models import AuditLog, SecurityLog
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'audit:events'
+DRAIN_LOCK_KEY = 'audit:drain_lock'
+MODELS = {'audit': AuditLog, 'security': SecurityLog}
+TIMESTAMP_FIELDS = {'audit': 'changed_at', 'security': 'created_at'}
+
+
+def redis_available():
+    return hasattr(cache, 'client') and hasattr(cache.client, 'get_client')
+
+
+def _redis():
+    return cache.client.get_client(write=True)
+
+
+def _insert(events):
+    """Insert ``(kind, fields)`` pairs with one bulk_create per table"""
+    emails = {fields['_email'] for kind, fields in events if fields.get('_email')}
+    user_ids = {}
+    if emails:
+        # Failed logins only know the address that was tried
+        user_ids = dict(
+            get_user_model().objects.filter(email__in=emails).values_list('email', 'pk')
+        )
+    rows = {kind: [] for kind in MODELS}
+    for kind, fields in events:
+        email = fields.pop('_email', None)
+        if email:
+            fields['user_id'] = user_ids.get(email)
+        rows[kind].append(MODELS[kind](**fields))
+    for kind, objs in rows.items():
+        if objs:
+            MODELS[kind].objects.bulk_create(objs, batch_size=settings.AUDIT_BATCH_SIZE)
+
+
+def _record(kind, fields):
+    fields.setdefault(TIMESTAMP_FIELDS[kind], timezone.now())
+    if not redis_available():
+        _insert([(kind, fields)])
+        return
+    payload = json.dumps(fields, cls=DjangoJSONEncoder)
+    try:
+        _redis().xadd(
+            cache.make_key(STREAM_KEY), {'kind': kind, 'fields': payload},
+            maxlen=settings.AUDIT_STREAM_MAXLEN, approximate=True,
+        )
+    except RedisError:
+        logger.warning("Could not buffer %s event, writing it directly", kind, exc_info=True)
+        _insert([(kind, fields)])
+
+
+def record(kind, **fields):
+    """Queue an ``audit`` or ``security`` event once the current transaction commits"""
+    fields = {**request_details(), **fields}
+    # Evaluated now, while the request (if any) is still current
+    transaction.on_commit(lambda: _record(kind, fields))
+
+
+def audit(action, instance, old_values=None, new_values=None):
+    record(
+        'audit',
+        table_name=instance._meta.db_table,
+        record_id=str(instance.pk),
+        action=action,
+        old_values=old_values,
+        new_values=new_values,
+        changed_by_id=current_user_id(),
+    )
+
+
+def security(event_type, user_id=None, status='success', email=None, **fields):
+    if user_id is None and email:
+        fields['_email'] = email
+    record('security', user_id=user_id, event_type=event_type, status=status, **fields)
+
+
+def _decode(entry):
+    kind = entry[b'kind'].decode()
+    fields = json.loads(entry[b'fields'])
+    timestamp = TIMESTAMP_FIELDS[kind]
+    fields[timestamp] = parse_datetime(fields[timestamp])
+    return kind, fields
+
+
+def drain(batch_size=None, max_batches=100):
+    """Move buffered events into the database; returns how many were stored"""
+    if not redis_available():
+        return 0
+    batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+    redis = _redis()
+    key = cache.make_key(STREAM_KEY)
+    # One drainer at a time, or two workers would insert the same batch. The
+    # lock only has to outlive one batch, since it is renewed before each
+    lock = redis.lock(
+        cache.make_key(DRAIN_LOCK_KEY), timeout=settings.AUDIT_DRAIN_LOCK_SECONDS, blocking=False
+    )
+    if not lock.acquire():
+        return 0
+    stored = 0
+    try:
+        for index in range(max_batches):
+            if index:
+                try:
+                    lock.reacquire()
+                except LockError:
+                    logger.warning("Audit drain lock expired; stopping after %d events", stored)
+                    return stored
+            entries = redis.xrange(key, count=batch_size)
+            if not entries:
+                break
+            _insert([_decode(entry) for _, entry in entries])
+            redis.xdel(key, *[entry_id for entry_id, _ in entries])
+            stored += len(entries)
+            if len(entries) < batch_size:
+                break
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass
+    return stored
@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.bookings.models import Booking
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'property', 'guest', 'check_in_date', 'check_out_date',
+        'status', 'total_amount', 'created_at'
+    ]
+    list_filter = ['status', 'check_in_date']
+    search_fields = ['guest__email', 'property__title']
+    raw_id_fields = ['guest', 'property']
+    date_hierarchy = 'check_in_date'
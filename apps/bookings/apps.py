@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bookings'
+
+    def ready(self):
+        from apps.bookings import signals  # noqa: F401
+        from apps.bookings.services import booking_ranges
+        from apps.properties.availability import UNAVAILABILITY_SOURCES
+
+        UNAVAILABILITY_SOURCES.append(booking_ranges)
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.bookings.models import Booking
+from apps.bookings.services import BookingBusy, BookingConflict, create_booking
+from apps.properties.models import Address, Property
+from core.benchmark import percentile, throwaway_database
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent overlapping bookings at one property and verify no oversell"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--attempts', type=int, default=10, help='Bookings per worker')
+        parser.add_argument('--days', type=int, default=30, help='Window the stays fall into')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(options)
+
+    def run(self, options):
+        host = User.objects.create_user(email='host@stress.local', username='host', password='x')
+        guest = User.objects.create_user(email='guest@stress.local', username='guest', password='x')
+        address = Address.objects.create(
+            street_address='1 Stress St', city='Hanoi', country='VN',
+            latitude=21.03, longitude=105.85,
+        )
+        prop = Property.objects.create(
+            host=host, address=address, title='Flash sale', slug='flash-sale',
+            property_type='house', base_price_per_night=Decimal('100'),
+            status='active', is_instant_book=True,
+        )
+
+        start = date.today() + timedelta(days=30)
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['concurrency'])
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(options['attempts']):
+                    check_in = start + timedelta(days=random.randrange(options['days']))
+                    check_out = check_in + timedelta(days=random.randint(1, 4))
+                    started = time.monotonic()
+                    try:
+                        create_booking(guest.pk, prop, check_in, check_out)
+                        outcome = 'created'
+                    except BookingConflict:
+                        outcome = 'conflict'
+                    except BookingBusy:
+                        outcome = 'busy'
+                    except Exception as e:
+                        outcome = f'error: {type(e).__name__}: {e}'
+                    with lock:
+                        outcomes[outcome] += 1
+                        latencies.append((time.monotonic() - started) * 1000)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.monotonic() - started
+
+        latencies.sort()
+        self.stdout.write(
+            f"{sum(outcomes.values())} attempts in {duration:.2f}s: {dict(outcomes)}\n"
+            f"latency p50 {percentile(latencies, 50):.1f}ms "
+            f"p99 {percentile(latencies, 99):.1f}ms max {latencies[-1]:.1f}ms"
+        )
+
+        nights = Counter()
+        for booking in Booking.objects.filter(property=prop, status__in=Booking.ACTIVE_STATUSES):
+            day = booking.check_in_date
+            while day < booking.check_out_date:
+                nights[day] += 1
+                day += timedelta(days=1)
+        oversold = sorted(day for day, count in nights.items() if count > 1)
+        if oversold:
+            raise CommandError(f'Oversold nights: {oversold}')
+        if any(outcome.startswith('error') for outcome in outcomes):
+            raise CommandError('Unexpected errors during the run')
+        self.stdout.write(self.style.SUCCESS(f'No overlapping bookings ({len(nights)} nights sold).'))
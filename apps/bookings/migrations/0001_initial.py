@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('properties', '0003_availability_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_in_date', models.DateField()),
+                ('check_out_date', models.DateField()),
+                ('guests_count', models.PositiveSmallIntegerField(default=1)),
+                ('nights', models.PositiveSmallIntegerField()),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cleaning_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('service_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('taxes', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], default='pending', max_length=10)),
+                ('special_requests', models.TextField(blank=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('cancellation_reason', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('guest', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='properties.property')),
+            ],
+            options={
+                'db_table': 'bookings',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['check_in_date', 'check_out_date'], name='idx_bookings_dates'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'created_at'], name='idx_bookings_status_date'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'check_in_date'], name='idx_bookings_property_dates'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('check_out_date__gt', django.db.models.expressions.F('check_in_date'))), name='chk_valid_booking_dates'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('total_amount__gte', 0)), name='chk_positive_total_amount'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('guests_count__gt', 0)), name='chk_guest_capacity'),
+        ),
+    ]
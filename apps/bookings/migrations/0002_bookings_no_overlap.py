@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Any two pending/confirmed bookings of a property must not share a night.
+# The exclusion constraint replaces erd.md's UNIQUE (property_id,
+# check_in_date, check_out_date), which does not catch partial overlaps.
+CREATE_CONSTRAINT = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE bookings ADD CONSTRAINT excl_bookings_no_overlap
+EXCLUDE USING gist (
+    property_id WITH =,
+    daterange(check_in_date, check_out_date, '[)') WITH &&
+) WHERE (status IN ('pending', 'confirmed'))
+"""
+DROP_CONSTRAINT = "ALTER TABLE bookings DROP CONSTRAINT IF EXISTS excl_bookings_no_overlap"
+
+
+def create_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_CONSTRAINT)
+
+
+def drop_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_constraint, drop_constraint),
+    ]
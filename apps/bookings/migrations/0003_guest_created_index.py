@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_bookings_no_overlap'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['guest', 'created_at', 'id'], name='idx_bookings_guest_created'),
+        ),
+    ]
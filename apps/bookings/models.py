@@ -1,3 +1,70 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
 
-# Create your models here.
+from apps.properties.models import Property
+
+
+class Booking(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("confirmed", "Confirmed"),
+        ("cancelled", "Cancelled"),
+        ("completed", "Completed"),
+    ]
+    # Statuses that hold the dates; covered by the overlap exclusion constraint
+    ACTIVE_STATUSES = ("pending", "confirmed")
+
+    guest = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='bookings'
+    )
+    property = models.ForeignKey(
+        Property, on_delete=models.PROTECT, related_name='bookings'
+    )
+    check_in_date = models.DateField()
+    check_out_date = models.DateField()
+    guests_count = models.PositiveSmallIntegerField(default=1)
+
+    nights = models.PositiveSmallIntegerField()
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    cleaning_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    service_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    taxes = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    special_requests = models.TextField(blank=True)
+
+    confirmed_at = models.DateTimeField(blank=True, null=True)
+    cancelled_at = models.DateTimeField(blank=True, null=True)
+    cancellation_reason = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'bookings'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['check_in_date', 'check_out_date'], name='idx_bookings_dates'),
+            models.Index(fields=['status', 'created_at'], name='idx_bookings_status_date'),
+            models.Index(fields=['property', 'check_in_date'], name='idx_bookings_property_dates'),
+            # Keyset pagination of a guest's bookings by (-created_at, -id)
+            models.Index(fields=['guest', 'created_at', 'id'], name='idx_bookings_guest_created'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(check_out_date__gt=F('check_in_date')),
+                name='chk_valid_booking_dates',
+            ),
+            models.CheckConstraint(
+                check=Q(total_amount__gte=0), name='chk_positive_total_amount'
+            ),
+            models.CheckConstraint(
+                check=Q(guests_count__gt=0), name='chk_guest_capacity'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.guest} @ {self.property} ({self.check_in_date} - {self.check_out_date})"
@@ -0,0 +1,200 @@
+"""
+Stay pricing for many properties at once.
+
+Inputs for a whole page are loaded in at most three queries (rates,
+nightly overrides and active seasons) and laid out as a ``properties x nights`` matrix of integer
+cents, so every total is a handful of NumPy operations instead of a Python
+loop per night. Integer cents with explicit half-up rounding keep the
+results identical to Decimal arithmetic.
+
+Rates always come from the ``Property`` and ``SeasonalPricing`` rows, never
+from search documents, which are reindexed asynchronously and may lag a
+price change. A stay shorter than the ``minimum_nights`` of a season it
+touches, or than its check-in night's ``minimum_nights_override``, has no
+quote (None).
+
+Quotes are memoized per property and date range. Each property has a
+version stamp in the cache that pricing changes replace once they commit,
+which orphans every quote computed from the old inputs.
+"""
+
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from apps.properties.models import Property, PropertyAvailability, SeasonalPricing
+from core.metrics import record_cache
+
+QUOTE_CACHE_TIMEOUT = 60 * 60
+
+
+def quote_cache_key(property_id, version, check_in, check_out):
+    return f'bookings:quote:{property_id}:{version}:{check_in:%Y%m%d}:{check_out:%Y%m%d}'
+
+
+def pricing_version_key(property_id):
+    return f'bookings:pricing_version:{property_id}'
+
+
+def to_cents(amount):
+    return int(Decimal(amount) * 100)
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _apply_rate(cents, rate):
+    """``cents * rate`` rounded half up, exact for any Decimal rate"""
+    numerator, denominator = Decimal(rate).as_integer_ratio()
+    return (cents * (2 * numerator) + denominator) // (2 * denominator)
+
+
+def base_rates(properties):
+    """``{property id: (base_price_per_night, cleaning_fee)}`` from Property rows"""
+    rates = {
+        prop.pk: (prop.base_price_per_night, prop.cleaning_fee)
+        for prop in properties if isinstance(prop, Property)
+    }
+    # Anything else (search documents) may carry copies older than the row
+    others = [prop.pk for prop in properties if prop.pk not in rates]
+    if others:
+        rates.update(
+            (pk, (base, cleaning_fee)) for pk, base, cleaning_fee in Property.objects.filter(
+                pk__in=others
+            ).values_list('pk', 'base_price_per_night', 'cleaning_fee')
+        )
+    return rates
+
+
+def nightly_prices(properties, check_in, check_out, rates=None):
+    """
+    ``(len(properties), nights)`` int64 matrix of nightly prices in cents,
+    and the minimum stay per property (seasons and check-in night override)
+    """
+    nights = (check_out - check_in).days
+    rates = rates or base_rates(properties)
+    row = {prop.pk: index for index, prop in enumerate(properties)}
+    base = np.array([to_cents(rates[prop.pk][0]) for prop in properties], dtype=np.int64)
+
+    # Multipliers in hundredths; seasons are applied by start date so the
+    # most recently started season wins where two overlap
+    multipliers = np.full((len(row), nights), 100, dtype=np.int64)
+    minimum_nights = np.ones(len(row), dtype=np.int64)
+    seasons = SeasonalPricing.objects.filter(
+        property_id__in=list(row), is_active=True,
+        start_date__lt=check_out, end_date__gte=check_in,
+    ).order_by('start_date', 'pk').values_list(
+        'property_id', 'start_date', 'end_date', 'price_multiplier', 'minimum_nights'
+    )
+    for property_id, start, end, multiplier, season_minimum in seasons:
+        first = max((start - check_in).days, 0)
+        last = min((end - check_in).days + 1, nights)
+        multipliers[row[property_id], first:last] = to_cents(multiplier)
+        minimum_nights[row[property_id]] = max(minimum_nights[row[property_id]], season_minimum)
+    prices = (base[:, None] * multipliers + 50) // 100
+
+    overrides = PropertyAvailability.objects.filter(
+        Q(price_override__isnull=False) | Q(date=check_in, minimum_nights_override__isnull=False),
+        property_id__in=list(row), date__gte=check_in, date__lt=check_out,
+    ).values_list('property_id', 'date', 'price_override', 'minimum_nights_override')
+    price_overrides = []
+    for property_id, day, amount, night_minimum in overrides:
+        if amount is not None:
+            price_overrides.append((row[property_id], (day - check_in).days, to_cents(amount)))
+        # A stay's check-in night may set its own minimum stay
+        if day == check_in and night_minimum is not None:
+            minimum_nights[row[property_id]] = max(minimum_nights[row[property_id]], night_minimum)
+    if price_overrides:
+        rows, days, amounts = zip(*price_overrides)
+        prices[list(rows), list(days)] = amounts
+    return prices, minimum_nights
+
+
+def compute_quotes(properties, check_in, check_out):
+    """
+    Price breakdown per property id, matching the Booking amount fields, or
+    None where the stay is shorter than its minimum for these dates
+    """
+    properties = list(properties)
+    if not properties:
+        return {}
+    nights = (check_out - check_in).days
+    rates = base_rates(properties)
+    prices, minimum_nights = nightly_prices(properties, check_in, check_out, rates)
+    subtotal = prices.sum(axis=1)
+    cleaning_fee = np.array([to_cents(rates[prop.pk][1]) for prop in properties], dtype=np.int64)
+    service_fee = _apply_rate(subtotal, settings.BOOKING_SERVICE_FEE_RATE)
+    taxes = _apply_rate(subtotal + cleaning_fee, settings.BOOKING_TAX_RATE)
+    total = subtotal + cleaning_fee + service_fee + taxes
+    price_per_night = (2 * subtotal + nights) // (2 * nights)
+
+    columns = zip(price_per_night, subtotal, cleaning_fee, service_fee, taxes, total)
+    return {
+        prop.pk: None if nights < minimum else {
+            'nights': nights,
+            'price_per_night': from_cents(values[0]),
+            'subtotal': from_cents(values[1]),
+            'cleaning_fee': from_cents(values[2]),
+            'service_fee': from_cents(values[3]),
+            'taxes': from_cents(values[4]),
+            'total_amount': from_cents(values[5]),
+        }
+        for prop, minimum, values in zip(properties, minimum_nights, columns)
+    }
+
+
+def _pricing_versions(property_ids):
+    keys = {property_id: pricing_version_key(property_id) for property_id in property_ids}
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for property_id, key in keys.items():
+        if key in found:
+            versions[property_id] = found[key]
+        else:
+            # add() so a first reader never overwrites a concurrent invalidation
+            version = time.time_ns()
+            versions[property_id] = version if cache.add(key, version, None) else cache.get(key, version)
+    return versions
+
+
+def quote_many(properties, check_in, check_out):
+    """Memoized ``compute_quotes``; only cache misses hit the database"""
+    properties = list(properties)
+    versions = _pricing_versions([prop.pk for prop in properties])
+    keys = {
+        prop.pk: quote_cache_key(prop.pk, versions[prop.pk], check_in, check_out)
+        for prop in properties
+    }
+    found = cache.get_many(list(keys.values()))
+    quotes = {}
+    for property_id, key in keys.items():
+        record_cache(key in found)
+        if key in found:
+            quotes[property_id] = found[key]
+
+    missing = [prop for prop in properties if prop.pk not in quotes]
+    if missing:
+        computed = compute_quotes(missing, check_in, check_out)
+        cache.set_many(
+            {keys[property_id]: quote for property_id, quote in computed.items()},
+            QUOTE_CACHE_TIMEOUT,
+        )
+        quotes.update(computed)
+    return quotes
+
+
+def quote(property, check_in, check_out):
+    return quote_many([property], check_in, check_out)[property.pk]
+
+
+def invalidate_quotes(property_id):
+    """Orphan the property's cached quotes once the current transaction commits"""
+    transaction.on_commit(
+        lambda: cache.set(pricing_version_key(property_id), time.time_ns(), None)
+    )
@@ -0,0 +1,62 @@
+from rest_framework import serializers
+
+from apps.bookings.models import Booking
+from apps.bookings.services import create_booking
+from apps.properties.models import Property
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    """Serializer for booking details"""
+    
+    class Meta:
+        model = Booking
+        fields = (
+            'id', 'property', 'check_in_date', 'check_out_date', 'guests_count',
+            'nights', 'price_per_night', 'subtotal', 'cleaning_fee',
+            'service_fee', 'taxes', 'total_amount', 'status', 'special_requests',
+            'confirmed_at', 'cancelled_at', 'created_at'
+        )
+        read_only_fields = fields
+        
+class BookingCreateSerializer(serializers.ModelSerializer):
+    """Serializer for creating a booking"""
+    
+    property = serializers.PrimaryKeyRelatedField(
+        queryset=Property.objects.filter(status='active')
+    )
+    
+    class Meta:
+        model = Booking
+        fields = (
+            'property', 'check_in_date', 'check_out_date',
+            'guests_count', 'special_requests'
+        )
+    
+    def validate(self, attrs):
+        property = attrs['property']
+        nights = (attrs['check_out_date'] - attrs['check_in_date']).days
+        if nights <= 0:
+            raise serializers.ValidationError("check_out_date must be after check_in_date")
+        if not property.minimum_nights <= nights <= property.maximum_nights:
+            raise serializers.ValidationError(
+                f"Stays must be between {property.minimum_nights} and "
+                f"{property.maximum_nights} nights"
+            )
+        if attrs.get('guests_count', 1) > property.max_guests:
+            raise serializers.ValidationError(
+                f"This property allows at most {property.max_guests} guests"
+            )
+        return attrs
+    
+    def create(self, validated_data):
+        return create_booking(
+            guest_id=self.context['request'].user.pk,
+            property=validated_data['property'],
+            check_in=validated_data['check_in_date'],
+            check_out=validated_data['check_out_date'],
+            guests_count=validated_data.get('guests_count', 1),
+            special_requests=validated_data.get('special_requests', ''),
+        )
+    
+class BookingCancelSerializer(serializers.Serializer):
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
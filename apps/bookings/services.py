@@ -0,0 +1,195 @@
+"""
+Booking creation without locks in the common case.
+
+On PostgreSQL the ``excl_bookings_no_overlap`` exclusion constraint is the
+source of truth: a booking is a plain INSERT, and a conflicting range makes
+it fail with an exclusion violation instead of waiting on a lock. Only
+transient failures (lock timeout, deadlock, serialization) are retried,
+with a short bounded backoff. Other backends fall back to check-then-insert.
+"""
+
+import random
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from apps.bookings.models import Booking
+from apps.bookings.pricing import compute_quotes
+from apps.notifications.models import Notification
+from apps.notifications.services import notify
+from apps.properties.availability import block_range, is_range_free, rebuild_range
+
+OVERLAP_CONSTRAINT = 'excl_bookings_no_overlap'
+# lock_not_available, deadlock_detected, serialization_failure
+RETRYABLE_SQLSTATES = {'55P03', '40P01', '40001'}
+
+# Serializes the check-then-insert fallback within a process (dev/SQLite only)
+_fallback_lock = threading.Lock()
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The selected dates are no longer available.'
+    default_code = 'booking_conflict'
+
+
+class StayTooShort(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'These dates fall in a season with a longer minimum stay.'
+    default_code = 'minimum_stay'
+
+
+class BookingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many booking requests for this property, please retry.'
+    default_code = 'booking_busy'
+    wait = 1
+
+
+def _sqlstate(error):
+    return getattr(error.__cause__, 'pgcode', None)
+
+
+def _is_overlap(error):
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) == OVERLAP_CONSTRAINT
+
+
+def _insert_postgres(booking):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Bound how long we wait behind an in-flight overlapping insert
+            cursor.execute(
+                "SET LOCAL lock_timeout = %s", [f'{settings.BOOKING_LOCK_TIMEOUT_MS}ms']
+            )
+        booking.save(force_insert=True)
+
+
+def _insert_fallback(booking):
+    with transaction.atomic():
+        overlapping = Booking.objects.filter(
+            property_id=booking.property_id,
+            status__in=Booking.ACTIVE_STATUSES,
+            check_in_date__lt=booking.check_out_date,
+            check_out_date__gt=booking.check_in_date,
+        ).exists()
+        if overlapping:
+            raise BookingConflict()
+        booking.save(force_insert=True)
+
+
+def _notify_booking(booking, notification_type, recipient_ids, title):
+    notify([
+        Notification(
+            recipient_id=recipient_id,
+            notification_type=notification_type,
+            title=title,
+            booking=booking,
+            property_id=booking.property_id,
+        )
+        for recipient_id in recipient_ids
+    ])
+
+
+def _notify_created(booking):
+    property = booking.property
+    if booking.status == 'confirmed':
+        _notify_booking(
+            booking, 'booking_confirmed', [property.host_id, booking.guest_id],
+            f"Booking confirmed: {property.title}",
+        )
+    else:
+        _notify_booking(
+            booking, 'booking_request', [property.host_id],
+            f"New booking request: {property.title}",
+        )
+
+
+def create_booking(guest_id, property, check_in, check_out, guests_count=1,
+                   special_requests=''):
+    # Cheap read against the availability bitmap rejects most losers of a
+    # burst before they reach the bookings table at all
+    if not is_range_free(property.pk, check_in, check_out):
+        raise BookingConflict()
+
+    # Always priced from the database, never from the quote cache
+    quote = compute_quotes([property], check_in, check_out)[property.pk]
+    if quote is None:
+        raise StayTooShort()
+
+    booking = Booking(
+        guest_id=guest_id,
+        property=property,
+        check_in_date=check_in,
+        check_out_date=check_out,
+        guests_count=guests_count,
+        special_requests=special_requests,
+        status='confirmed' if property.is_instant_book else 'pending',
+        confirmed_at=timezone.now() if property.is_instant_book else None,
+        **quote,
+    )
+
+    if connection.vendor != 'postgresql':
+        # SQLite cannot upgrade concurrent read transactions to writes, so
+        # the insert and the bitmap update share one process-wide lock
+        with _fallback_lock:
+            with transaction.atomic():
+                _insert_fallback(booking)
+                # Notification writes (and their on_commit delivery) stay under the lock too
+                _notify_created(booking)
+            block_range(property.pk, check_in, check_out)
+        return booking
+
+    for attempt in range(settings.BOOKING_MAX_RETRIES + 1):
+        try:
+            _insert_postgres(booking)
+            break
+        except IntegrityError as e:
+            if _is_overlap(e):
+                raise BookingConflict()
+            raise
+        except OperationalError as e:
+            booking.pk = None
+            if _sqlstate(e) not in RETRYABLE_SQLSTATES:
+                raise
+            if attempt == settings.BOOKING_MAX_RETRIES:
+                raise BookingBusy()
+            # Jittered exponential backoff: ~5ms, 10ms, 20ms...
+            time.sleep(random.uniform(0.5, 1.0) * 0.005 * (2 ** attempt))
+
+    transaction.on_commit(lambda: block_range(property.pk, check_in, check_out))
+    _notify_created(booking)
+    return booking
+
+
+def cancel_booking(booking, reason=''):
+    booking.status = 'cancelled'
+    booking.cancelled_at = timezone.now()
+    booking.cancellation_reason = reason
+    booking.save(update_fields=['status', 'cancelled_at', 'cancellation_reason', 'updated_at'])
+
+    transaction.on_commit(
+        lambda: rebuild_range(booking.property_id, booking.check_in_date, booking.check_out_date)
+    )
+    _notify_booking(
+        booking, 'booking_cancelled', [booking.property.host_id, booking.guest_id],
+        f"Booking cancelled: {booking.property.title}",
+    )
+    return booking
+
+
+def booking_ranges(property_id, year):
+    """Unavailability source for apps.properties.availability"""
+    return Booking.objects.filter(
+        property_id=property_id,
+        status__in=Booking.ACTIVE_STATUSES,
+        check_in_date__lt=date(year + 1, 1, 1),
+        check_out_date__gt=date(year, 1, 1),
+    ).values_list('check_in_date', 'check_out_date')
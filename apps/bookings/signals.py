@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.bookings.pricing import invalidate_quotes
+from apps.properties.models import Property, PropertyAvailability, SeasonalPricing
+
+PRICING_FIELDS = {'base_price_per_night', 'cleaning_fee'}
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(update_fields) & PRICING_FIELDS):
+        return
+    invalidate_quotes(instance.pk)
+
+
+@receiver(post_save, sender=PropertyAvailability)
+@receiver(post_delete, sender=PropertyAvailability)
+@receiver(post_save, sender=SeasonalPricing)
+@receiver(post_delete, sender=SeasonalPricing)
+def pricing_changed(sender, instance, **kwargs):
+    invalidate_quotes(instance.property_id)
@@ -1,3 +1,298 @@
-from django.test import TestCase
+import threading
+import unittest
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+from unittest.mock import DEFAULT
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.bookings import services
+from apps.bookings.models import Booking
+from apps.bookings.pricing import compute_quotes, pricing_version_key, quote
+from apps.bookings.services import (
+    BookingBusy, BookingConflict, StayTooShort, cancel_booking, create_booking,
+)
+from apps.properties.indexing import index_properties
+from apps.properties.models import (
+    Address, Property, PropertyAvailability, PropertySearchDocument, SeasonalPricing,
+)
+
+User = get_user_model()
+
+
+def make_property(host, slug='stay'):
+    address = Address.objects.create(
+        street_address='1 Test St', city='Hanoi', country='VN', latitude=21.03, longitude=105.85,
+    )
+    return Property.objects.create(
+        host=host, address=address, title='Test stay', slug=slug, property_type='house',
+        base_price_per_night=Decimal('100'), status='active', is_instant_book=True, max_guests=4,
+    )
+
+
+class BookingFixtureMixin:
+    def setUp(self):
+        self.host = User.objects.create_user(email='host@test.local', username='host', password='x')
+        self.guest = User.objects.create_user(email='guest@test.local', username='guest', password='x')
+        self.property = make_property(self.host)
+        self.start = date.today() + timedelta(days=30)
+
+    def book(self, first_night, nights):
+        check_in = self.start + timedelta(days=first_night)
+        return create_booking(self.guest.pk, self.property, check_in, check_in + timedelta(days=nights))
+
+
+class BookingOverlapTests(BookingFixtureMixin, TestCase):
+    def test_overlapping_stay_is_rejected(self):
+        self.book(0, 3)
+        for first_night, nights in ((0, 3), (1, 1), (2, 4), (-1, 2), (-2, 6)):
+            with self.subTest(first_night=first_night, nights=nights):
+                with self.assertRaises(BookingConflict):
+                    self.book(first_night, nights)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_checkout_day_can_be_next_check_in(self):
+        self.book(0, 3)
+        self.book(3, 2)
+        self.book(-2, 2)
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_cancelled_stay_frees_its_dates(self):
+        booking = self.book(0, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_booking(booking, 'Plans changed')
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'cancelled')
+        self.book(0, 3)
+
+    def test_api_returns_conflict_for_overlap(self):
+        client = APIClient()
+        client.force_authenticate(self.guest)
+        payload = {
+            'property': self.property.pk,
+            'check_in_date': self.start,
+            'check_out_date': self.start + timedelta(days=2),
+        }
+        self.assertEqual(client.post('/api/bookings/', payload, format='json').status_code, 201)
+        self.assertEqual(client.post('/api/bookings/', payload, format='json').status_code, 409)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PricingTests(BookingFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def stay(self, first_night, nights):
+        check_in = self.start + timedelta(days=first_night)
+        return check_in, check_in + timedelta(days=nights)
+
+    def test_seasons_and_nightly_overrides(self):
+        SeasonalPricing.objects.create(
+            property=self.property, season_name='Peak', start_date=self.start + timedelta(days=1),
+            end_date=self.start + timedelta(days=1), price_multiplier=Decimal('1.5'),
+        )
+        PropertyAvailability.objects.create(
+            property=self.property, date=self.start + timedelta(days=2), price_override=Decimal('80'),
+        )
+        result = compute_quotes([self.property], *self.stay(0, 3))[self.property.pk]
+        self.assertEqual(result['subtotal'], Decimal('330.00'))
+        self.assertEqual(result['price_per_night'], Decimal('110.00'))
+
+    def test_season_minimum_stay_has_no_quote(self):
+        SeasonalPricing.objects.create(
+            property=self.property, season_name='Peak', start_date=self.start,
+            end_date=self.start + timedelta(days=10), price_multiplier=Decimal('1'), minimum_nights=3,
+        )
+        self.assertIsNone(compute_quotes([self.property], *self.stay(0, 2))[self.property.pk])
+        self.assertIsNotNone(compute_quotes([self.property], *self.stay(0, 3))[self.property.pk])
+        with self.assertRaises(StayTooShort):
+            self.book(0, 2)
+
+    def test_check_in_night_minimum_override(self):
+        PropertyAvailability.objects.create(
+            property=self.property, date=self.start + timedelta(days=1), minimum_nights_override=4,
+        )
+        # Only the check-in night's override applies
+        self.assertIsNotNone(compute_quotes([self.property], *self.stay(0, 2))[self.property.pk])
+        self.assertIsNone(compute_quotes([self.property], *self.stay(1, 2))[self.property.pk])
+
+    def test_api_rejects_stay_below_minimum(self):
+        SeasonalPricing.objects.create(
+            property=self.property, season_name='Peak', start_date=self.start,
+            end_date=self.start + timedelta(days=10), price_multiplier=Decimal('1'), minimum_nights=3,
+        )
+        client = APIClient()
+        client.force_authenticate(self.guest)
+        check_in, check_out = self.stay(0, 2)
+        response = client.post('/api/bookings/', {
+            'property': self.property.pk, 'check_in_date': check_in, 'check_out_date': check_out,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_rates_come_from_the_property_not_a_stale_document(self):
+        index_properties([self.property.pk])
+        Property.objects.filter(pk=self.property.pk).update(base_price_per_night=Decimal('150'))
+        document = PropertySearchDocument.objects.get(pk=self.property.pk)
+        result = compute_quotes([document], *self.stay(0, 2))[self.property.pk]
+        self.assertEqual(result['subtotal'], Decimal('300.00'))
+
+    def test_cached_quotes_are_replaced_only_after_commit(self):
+        stay = self.stay(0, 2)
+        self.assertEqual(quote(self.property, *stay)['subtotal'], Decimal('200.00'))
+        version = cache.get(pricing_version_key(self.property.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.base_price_per_night = Decimal('120')
+            self.property.save(update_fields=['base_price_per_night'])
+            # Readers before the commit keep the old version
+            self.assertEqual(cache.get(pricing_version_key(self.property.pk)), version)
+        self.assertNotEqual(cache.get(pricing_version_key(self.property.pk)), version)
+        self.assertEqual(quote(self.property, *stay)['subtotal'], Decimal('240.00'))
+
+
+class ConcurrentBookingTests(BookingFixtureMixin, TransactionTestCase):
+    """Threads share one database, so inserts really race"""
+
+    threads = 8
+
+    def race(self, ranges):
+        outcomes = Counter()
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(ranges))
+
+        def worker(first_night, nights):
+            barrier.wait()
+            try:
+                self.book(first_night, nights)
+                outcome = 'created'
+            except (BookingConflict, BookingBusy) as e:
+                outcome = type(e).__name__
+            except Exception as e:
+                outcome = 'error'
+                errors.append(e)
+            finally:
+                connection.close()
+            with lock:
+                outcomes[outcome] += 1
+
+        threads = [threading.Thread(target=worker, args=stay) for stay in ranges]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return outcomes
+
+    def assert_no_overlaps(self):
+        stays = sorted(
+            Booking.objects.filter(property=self.property, status__in=Booking.ACTIVE_STATUSES)
+            .values_list('check_in_date', 'check_out_date')
+        )
+        for (_, previous_out), (next_in, _) in zip(stays, stays[1:]):
+            self.assertLessEqual(previous_out, next_in)
+
+    def test_same_dates_sell_once(self):
+        outcomes = self.race([(0, 3)] * self.threads)
+        self.assertEqual(outcomes['created'], 1)
+        self.assert_no_overlaps()
+
+    def test_overlapping_and_adjacent_stays(self):
+        outcomes = self.race([(night % 6, 2) for night in range(self.threads)])
+        # Any interleaving leaves room for at least two of the two-night stays
+        self.assertGreaterEqual(outcomes['created'], 2)
+        self.assert_no_overlaps()
+
+
+def postgres_error(sqlstate):
+    error = OperationalError()
+    error.__cause__ = SimpleNamespace(pgcode=sqlstate)
+    return error
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Exclusion constraint is PostgreSQL only')
+@override_settings(BOOKING_MAX_RETRIES=2)
+class PostgresBookingTests(BookingFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Let overlapping inserts past the bitmap check so they reach the constraint
+        patcher = mock.patch('apps.bookings.services.is_range_free', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_exclusion_constraint_rejects_overlap(self):
+        self.book(0, 3)
+        with self.assertRaises(BookingConflict):
+            self.book(2, 2)
+        self.book(3, 2)
+        check_in = self.start + timedelta(days=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.create(
+                guest=self.guest, property=self.property, check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=1), nights=1,
+                price_per_night=Decimal('100'), subtotal=Decimal('100'),
+                total_amount=Decimal('100'), status='confirmed',
+            )
+
+    def test_transient_errors_are_retried(self):
+        for index, sqlstate in enumerate(('55P03', '40P01', '40001')):
+            with self.subTest(sqlstate=sqlstate):
+                # Fails once, then really inserts
+                insert = mock.Mock(
+                    wraps=services._insert_postgres, side_effect=[postgres_error(sqlstate), DEFAULT],
+                )
+                with mock.patch('apps.bookings.services._insert_postgres', insert):
+                    booking = self.book(3 * index, 2)
+                self.assertEqual(insert.call_count, 2)
+                self.assertIsNotNone(booking.pk)
+
+    def test_retries_are_bounded(self):
+        insert = mock.Mock(side_effect=postgres_error('40001'))
+        with mock.patch('apps.bookings.services._insert_postgres', insert):
+            with self.assertRaises(BookingBusy):
+                self.book(0, 2)
+        self.assertEqual(insert.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        insert = mock.Mock(side_effect=postgres_error('53300'))
+        with mock.patch('apps.bookings.services._insert_postgres', insert):
+            with self.assertRaises(OperationalError):
+                self.book(0, 2)
+        self.assertEqual(insert.call_count, 1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Exclusion constraint is PostgreSQL only')
+@override_settings(BOOKING_MAX_RETRIES=1, BOOKING_LOCK_TIMEOUT_MS=50)
+class PostgresLockTimeoutTests(BookingFixtureMixin, TransactionTestCase):
+    def test_insert_behind_an_uncommitted_overlap_times_out_then_succeeds(self):
+        inserted, release = threading.Event(), threading.Event()
+
+        def hold_overlapping_insert():
+            try:
+                with transaction.atomic():
+                    self.book(0, 3)
+                    inserted.set()
+                    release.wait(5)
+                    transaction.set_rollback(True)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_overlapping_insert)
+        holder.start()
+        self.assertTrue(inserted.wait(5))
+        try:
+            # The exclusion check waits on the other transaction: 55P03, retried, then 503
+            with self.assertRaises(BookingBusy):
+                self.book(1, 1)
+        finally:
+            release.set()
+            holder.join()
+        self.book(1, 1)
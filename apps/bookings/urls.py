@@ -0,0 +1,10 @@
+from django.urls import path
+
+from apps.bookings.views import BookingListCreateView, cancel_booking_view
+
+app_name = 'bookings'
+
+urlpatterns = [
+    path('', BookingListCreateView.as_view(), name='list_create'),
+    path('<int:pk>/cancel/', cancel_booking_view, name='cancel'),
+]
@@ -1,3 +1,48 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404
 
-# Create your views here.
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import Response
+
+from apps.bookings.models import Booking
+from apps.bookings.serializers import (
+    BookingCancelSerializer,
+    BookingCreateSerializer,
+    BookingSerializer,
+)
+from apps.bookings.services import cancel_booking
+
+
+class BookingListCreateView(generics.ListCreateAPIView):
+    """List the current user's bookings or create a new one"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return Booking.objects.filter(guest_id=self.request.user.pk)
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return BookingCreateSerializer
+        return BookingSerializer
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        booking = serializer.save()
+        return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+    
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def cancel_booking_view(request, pk):
+    """Cancel one of the current user's bookings"""
+    booking = get_object_or_404(
+        Booking.objects.select_related('property'), pk=pk, guest_id=request.user.pk
+    )
+    if booking.status not in Booking.ACTIVE_STATUSES:
+        raise ValidationError({'status': f'Cannot cancel a {booking.status} booking'})
+    
+    serializer = BookingCancelSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    cancel_booking(booking, serializer.validated_data['reason'])
+    return Response(BookingSerializer(booking).data)
@@ -1,3 +1,25 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.messaging.models import Conversation, ConversationParticipant, Message
+
+
+class ConversationParticipantInline(admin.TabularInline):
+    model = ConversationParticipant
+    extra = 0
+    raw_id_fields = ['user']
+    readonly_fields = ['joined_at', 'last_read_at']
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation_type', 'property', 'is_archived', 'updated_at']
+    list_filter = ['conversation_type', 'is_archived']
+    raw_id_fields = ['property', 'booking']
+    inlines = [ConversationParticipantInline]
+
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'conversation', 'sender', 'message_type', 'is_read', 'created_at']
+    list_filter = ['message_type', 'is_system_message']
+    raw_id_fields = ['conversation', 'sender']
@@ -0,0 +1,79 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bookings', '0003_guest_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('properties', '0005_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conversation_type', models.CharField(choices=[('inquiry', 'Inquiry'), ('booking', 'Booking'), ('support', 'Support')], default='inquiry', max_length=10)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='bookings.booking')),
+                ('property', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='properties.property')),
+            ],
+            options={
+                'db_table': 'conversations',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('message_type', models.CharField(choices=[('text', 'Text'), ('image', 'Image'), ('file', 'File')], default='text', max_length=10)),
+                ('attachment_url', models.URLField(blank=True)),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_system_message', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='messaging.conversation')),
+                ('sender', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sent_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'messages',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='messaging.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'conversation_participants',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='idx_messages_conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', 'is_active'], name='idx_participants_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationparticipant',
+            constraint=models.UniqueConstraint(fields=('conversation', 'user'), name='uk_conversation_participant'),
+        ),
+    ]
@@ -1,3 +1,97 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Conversation(models.Model):
+    CONVERSATION_TYPE_CHOICES = [
+        ("inquiry", "Inquiry"),
+        ("booking", "Booking"),
+        ("support", "Support"),
+    ]
+
+    property = models.ForeignKey(
+        'properties.Property', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='conversations',
+    )
+    booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='conversations',
+    )
+    conversation_type = models.CharField(
+        max_length=10, choices=CONVERSATION_TYPE_CHOICES, default="inquiry"
+    )
+    is_archived = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every new message so inboxes sort by last activity
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'conversations'
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"Conversation {self.pk} ({self.conversation_type})"
+
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name='participants'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='conversation_memberships',
+    )
+    joined_at = models.DateTimeField(auto_now_add=True)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = 'conversation_participants'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['conversation', 'user'], name='uk_conversation_participant'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='idx_participants_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.conversation}"
+
+
+class Message(models.Model):
+    MESSAGE_TYPE_CHOICES = [
+        ("text", "Text"),
+        ("image", "Image"),
+        ("file", "File"),
+    ]
+
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name='messages'
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True,
+        related_name='sent_messages',
+    )
+    content = models.TextField()
+    message_type = models.CharField(max_length=10, choices=MESSAGE_TYPE_CHOICES, default="text")
+    attachment_url = models.URLField(blank=True)
+    is_read = models.BooleanField(default=False)
+    is_system_message = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'messages'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['conversation', 'created_at', 'id'],
+                name='idx_messages_conversation',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Message {self.pk} in conversation {self.conversation_id}"
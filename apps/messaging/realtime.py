@@ -0,0 +1,59 @@
+"""
+Realtime fan-out of messaging events.
+
+Every event is published to one channel per recipient on the
+MESSAGING_PUBSUB_URL Redis, and each ASGI worker subscribes only to the
+channels of users connected to it (see apps.messaging.websocket). Without
+MESSAGING_PUBSUB_URL (tests) events go straight to this process's hub
+instead.
+"""
+
+import json
+import logging
+import threading
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def user_channel(user_id):
+    return cache.make_key(f'messaging:user:{user_id}')
+
+
+def redis_available():
+    return bool(settings.MESSAGING_PUBSUB_URL)
+
+
+def _redis():
+    """Publishing client; its pool is shared by every thread of the process"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = redis.Redis.from_url(settings.MESSAGING_PUBSUB_URL)
+        return _client
+
+
+def publish(user_ids, event):
+    """Send ``event`` to every open connection of ``user_ids``; never raises"""
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+    if not redis_available():
+        from apps.messaging.websocket import hub
+
+        hub.dispatch_threadsafe(user_ids, payload)
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.publish(user_channel(user_id), payload)
+        pipe.execute()
+    except RedisError:
+        # Clients resync over REST on reconnect, so a lost event is not data loss
+        logger.warning("Could not publish %s event", event.get('type'), exc_info=True)
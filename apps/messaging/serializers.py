@@ -0,0 +1,68 @@
+from rest_framework import serializers
+
+from apps.messaging.models import Conversation, Message
+from apps.messaging.services import send_message, start_conversation
+from apps.properties.models import Property
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    """Serializer for a message, also used for realtime events"""
+    
+    class Meta:
+        model = Message
+        fields = (
+            'id', 'conversation', 'sender', 'content', 'message_type',
+            'attachment_url', 'is_system_message', 'created_at'
+        )
+        read_only_fields = fields
+    
+class MessageCreateSerializer(serializers.ModelSerializer):
+    """Serializer for sending a message to a conversation"""
+    
+    class Meta:
+        model = Message
+        fields = ('content', 'message_type', 'attachment_url')
+    
+    def create(self, validated_data):
+        return send_message(
+            conversation_id=self.context['conversation'].pk,
+            sender_id=self.context['request'].user.pk,
+            **validated_data
+        )
+    
+class ConversationSerializer(serializers.ModelSerializer):
+    """Serializer for an inbox entry"""
+    
+    participants = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Conversation
+        fields = (
+            'id', 'property', 'booking', 'conversation_type', 'is_archived',
+            'participants', 'created_at', 'updated_at'
+        )
+        read_only_fields = fields
+    
+    def get_participants(self, obj):
+        # Uses the prefetch from ConversationListCreateView
+        return [participant.user_id for participant in obj.participants.all()]
+    
+class ConversationCreateSerializer(serializers.Serializer):
+    """Start an inquiry with a property's host"""
+    
+    property = serializers.PrimaryKeyRelatedField(
+        queryset=Property.objects.filter(status='active')
+    )
+    content = serializers.CharField()
+    
+    def validate_property(self, value):
+        if value.host_id == self.context['request'].user.pk:
+            raise serializers.ValidationError("You cannot message yourself")
+        return value
+    
+    def create(self, validated_data):
+        user_id = self.context['request'].user.pk
+        property = validated_data['property']
+        conversation = start_conversation([user_id, property.host_id], property=property)
+        send_message(conversation.pk, user_id, validated_data['content'])
+        return conversation
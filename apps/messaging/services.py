@@ -0,0 +1,94 @@
+"""
+Conversation writes. Realtime events are published only after the
+transaction commits, so clients are never told about rows they cannot
+read yet.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.messaging.models import Conversation, ConversationParticipant, Message
+from apps.messaging.realtime import publish
+from apps.notifications import unread
+
+
+def participant_ids(conversation_id):
+    return list(
+        ConversationParticipant.objects.filter(
+            conversation_id=conversation_id, is_active=True
+        ).values_list('user_id', flat=True)
+    )
+
+
+def message_event(message):
+    from apps.messaging.serializers import MessageSerializer
+
+    return {
+        'type': 'message',
+        'conversation': message.conversation_id,
+        'message': MessageSerializer(message).data,
+    }
+
+
+@transaction.atomic
+def start_conversation(user_ids, property=None, booking=None, conversation_type='inquiry'):
+    conversation = Conversation.objects.create(
+        property=property, booking=booking, conversation_type=conversation_type
+    )
+    ConversationParticipant.objects.bulk_create([
+        ConversationParticipant(conversation=conversation, user_id=user_id)
+        for user_id in dict.fromkeys(user_ids)
+    ])
+    return conversation
+
+
+@transaction.atomic
+def send_message(conversation_id, sender_id, content, message_type='text', attachment_url=''):
+    message = Message.objects.create(
+        conversation_id=conversation_id,
+        sender_id=sender_id,
+        content=content,
+        message_type=message_type,
+        attachment_url=attachment_url,
+    )
+    Conversation.objects.filter(pk=conversation_id).update(updated_at=message.created_at)
+    ConversationParticipant.objects.filter(
+        conversation_id=conversation_id, user_id=sender_id
+    ).update(last_read_at=message.created_at)
+
+    recipients = participant_ids(conversation_id)
+    event = message_event(message)
+
+    def after_commit():
+        unread.message_sent(conversation_id, sender_id, recipients)
+        publish(recipients, event)
+
+    transaction.on_commit(after_commit)
+    return message
+
+
+@transaction.atomic
+def mark_read(conversation_id, user_id):
+    """Mark everything up to now as read by ``user_id`` and tell the others"""
+    read_at = timezone.now()
+    ConversationParticipant.objects.filter(
+        conversation_id=conversation_id, user_id=user_id
+    ).update(last_read_at=read_at)
+    Message.objects.filter(
+        conversation_id=conversation_id, is_read=False, created_at__lte=read_at
+    ).exclude(sender_id=user_id).update(is_read=True)
+
+    recipients = participant_ids(conversation_id)
+    event = {
+        'type': 'read',
+        'conversation': conversation_id,
+        'user': user_id,
+        'last_read_at': read_at,
+    }
+
+    def after_commit():
+        unread.conversation_read(conversation_id, user_id)
+        publish(recipients, event)
+
+    transaction.on_commit(after_commit)
+    return read_at
@@ -1,3 +1,140 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.messaging import realtime, websocket
+
+User = get_user_model()
+
+
+class FakeClient:
+    """Drives ``websocket_application`` with scripted client events"""
+
+    def __init__(self, scope=None, fail_sends=False):
+        self.scope = {'type': 'websocket', 'path': websocket.WEBSOCKET_PATH, 'headers': []}
+        self.scope.update(scope or {})
+        self.fail_sends = fail_sends
+        self.sent = []
+        self.incoming = None
+
+    def run(self, *events, until=None):
+        async def main():
+            self.incoming = asyncio.Queue()
+            for event in ({'type': 'websocket.connect'},) + events:
+                self.incoming.put_nowait(event)
+            application = asyncio.ensure_future(
+                websocket.websocket_application(self.scope, self.incoming.get, self.send)
+            )
+            if until is not None:
+                await until(self)
+                self.incoming.put_nowait({'type': 'websocket.disconnect'})
+            await asyncio.wait_for(application, 5)
+
+        asyncio.run(main())
+
+    async def send(self, event):
+        if self.fail_sends and event['type'] == 'websocket.send':
+            raise ConnectionResetError('client went away')
+        self.sent.append(event)
+
+    def of_type(self, event_type):
+        return [event for event in self.sent if event['type'] == event_type]
+
+
+def message(payload):
+    return {'type': 'websocket.receive', 'text': json.dumps(payload)}
+
+
+DISCONNECT = {'type': 'websocket.disconnect'}
+
+
+@override_settings(MESSAGING_WS_AUTH_TIMEOUT=0.05)
+class WebSocketAuthTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            websocket, 'authenticate', return_value=(1, time.time() + 60)
+        )
+        self.authenticate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_query_string_token_is_ignored(self):
+        client = FakeClient({'query_string': b'token=secret'})
+        client.run()
+        self.authenticate.assert_not_called()
+        self.assertEqual(client.sent[-1], {'type': 'websocket.close', 'code': 4001})
+
+    def test_subprotocol_token(self):
+        client = FakeClient({'subprotocols': ['bearer', 'secret']})
+        client.run(DISCONNECT)
+        self.authenticate.assert_called_once_with('secret')
+        self.assertEqual(client.sent, [{'type': 'websocket.accept', 'subprotocol': 'bearer'}])
+
+    def test_authorization_header(self):
+        client = FakeClient({'headers': [(b'authorization', b'Bearer secret')]})
+        client.run(DISCONNECT)
+        self.authenticate.assert_called_once_with('secret')
+        self.assertEqual(len(client.of_type('websocket.accept')), 1)
+
+    def test_first_message_token(self):
+        client = FakeClient()
+        client.run(message({'type': 'auth', 'token': 'secret'}), DISCONNECT)
+        self.authenticate.assert_called_once_with('secret')
+        self.assertEqual(client.sent, [{'type': 'websocket.accept'}])
+
+    def test_other_first_message_is_rejected(self):
+        client = FakeClient()
+        client.run(message({'type': 'ping'}))
+        self.authenticate.assert_not_called()
+        self.assertEqual(client.sent[-1], {'type': 'websocket.close', 'code': 4001})
+
+    def test_invalid_token_is_rejected(self):
+        self.authenticate.return_value = None
+        client = FakeClient({'subprotocols': ['bearer', 'secret']})
+        client.run()
+        self.assertEqual(client.sent, [{'type': 'websocket.close', 'code': 4001}])
+
+    def test_expired_token_closes_connection(self):
+        self.authenticate.return_value = (1, time.time() - 1)
+        client = FakeClient({'subprotocols': ['bearer', 'secret']})
+        client.run()
+        self.assertEqual(client.sent[-1], {'type': 'websocket.close', 'code': 4001})
+
+    def test_writer_failure_is_logged(self):
+        client = FakeClient({'subprotocols': ['bearer', 'secret']}, fail_sends=True)
+        with self.assertLogs('apps.messaging.websocket', 'WARNING') as logs:
+            client.run(message({'type': 'ping'}))
+        self.assertIn('write task of user 1 failed', logs.output[0])
+        self.assertIn('ConnectionResetError', logs.output[0])
+        self.assertNotIn(1, websocket.hub.connections)
+
+    def test_publish_reaches_local_hub_without_pubsub(self):
+        async def publish_and_wait(client):
+            while 1 not in websocket.hub.connections:
+                await asyncio.sleep(0)
+            realtime.publish([1], {'type': 'message.read', 'conversation': 7})
+            while not client.of_type('websocket.send'):
+                await asyncio.sleep(0.01)
+
+        client = FakeClient({'subprotocols': ['bearer', 'secret']})
+        client.run(until=publish_and_wait)
+        self.assertEqual(
+            json.loads(client.of_type('websocket.send')[0]['text']),
+            {'type': 'message.read', 'conversation': 7},
+        )
+
+
+class AuthenticateTests(TestCase):
+    def test_access_token(self):
+        user = User.objects.create_user(
+            username='guest', email='guest@example.com', password='pass12345'
+        )
+        token = AccessToken.for_user(user)
+        self.assertEqual(websocket.authenticate(str(token)), (user.pk, token['exp']))
+
+    def test_garbage_token(self):
+        self.assertIsNone(websocket.authenticate('not-a-token'))
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from apps.messaging.views import (
+    ConversationListCreateView,
+    MessageListCreateView,
+    mark_read_view,
+)
+
+app_name = 'messaging'
+
+urlpatterns = [
+    path('conversations/', ConversationListCreateView.as_view(), name='conversations'),
+    path('conversations/<int:pk>/messages/', MessageListCreateView.as_view(), name='messages'),
+    path('conversations/<int:pk>/read/', mark_read_view, name='mark_read'),
+]
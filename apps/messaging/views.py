@@ -1,3 +1,86 @@
-from django.shortcuts import render
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
 
-# Create your views here.
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.views import Response
+
+from apps.messaging.models import Conversation, ConversationParticipant, Message
+from apps.messaging.serializers import (
+    ConversationCreateSerializer,
+    ConversationSerializer,
+    MessageCreateSerializer,
+    MessageSerializer,
+)
+from apps.messaging.services import mark_read
+
+
+def get_conversation(request, pk):
+    return get_object_or_404(
+        Conversation,
+        pk=pk,
+        participants__user_id=request.user.pk,
+        participants__is_active=True,
+    )
+
+
+class ConversationListCreateView(generics.ListCreateAPIView):
+    """List the current user's conversations or start a new one"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return Conversation.objects.filter(
+            participants__user_id=self.request.user.pk,
+            participants__is_active=True,
+        ).prefetch_related(Prefetch(
+            'participants',
+            queryset=ConversationParticipant.objects.only('conversation_id', 'user_id'),
+        ))
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return ConversationCreateSerializer
+        return ConversationSerializer
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        conversation = serializer.save()
+        conversation = self.get_queryset().get(pk=conversation.pk)
+        return Response(ConversationSerializer(conversation).data, status=status.HTTP_201_CREATED)
+    
+class MessageListCreateView(generics.ListCreateAPIView):
+    """Messages of one conversation, newest first, or send a new one"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_conversation(self):
+        if not hasattr(self, '_conversation'):
+            self._conversation = get_conversation(self.request, self.kwargs['pk'])
+        return self._conversation
+    
+    def get_queryset(self):
+        return Message.objects.filter(conversation=self.get_conversation())
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return MessageCreateSerializer
+        return MessageSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['conversation'] = self.get_conversation()
+        return context
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message = serializer.save()
+        return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+    
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_read_view(request, pk):
+    """Mark a conversation as read and push a read receipt to the others"""
+    conversation = get_conversation(request, pk)
+    read_at = mark_read(conversation.pk, request.user.pk)
+    return Response({'conversation': conversation.pk, 'last_read_at': read_at})
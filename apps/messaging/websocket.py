@@ -0,0 +1,242 @@
+"""
+WebSocket endpoint pushing new messages and read receipts.
+
+Clients connect to ``/ws/messaging/`` and authenticate with an access
+token, never in the URL where proxies and access logs would keep it:
+either by offering the subprotocols ``["bearer", "<access token>"]``
+(accepted as ``bearer``), or by sending ``{"type": "auth", "token": ...}``
+as the first message within MESSAGING_WS_AUTH_TIMEOUT seconds. Non-browser
+clients may also send an ``Authorization: Bearer`` header. The server
+only pushes; sending and marking read stay on the REST API so there is a
+single write path. Each connection gets a bounded outbound buffer: the hub
+never waits on a client, and a client that falls behind by more than
+MESSAGING_WS_QUEUE_SIZE events or MESSAGING_WS_MAX_BUFFER_BYTES is
+disconnected with close code 4008 and is expected to resync over REST.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from apps.messaging.realtime import redis_available, user_channel
+from apps.users.authentication import ClaimsJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_PATH = '/ws/messaging/'
+TOKEN_SUBPROTOCOL = 'bearer'
+CLOSE_UNAUTHORIZED = 4001
+CLOSE_NOT_FOUND = 4004
+CLOSE_TOO_SLOW = 4008
+
+
+class Connection:
+    def __init__(self, user_id, send):
+        self.user_id = user_id
+        self.send = send
+        self.queue = asyncio.Queue()
+        self.buffered_bytes = 0
+        self.overflowed = asyncio.Event()
+
+    def push(self, payload):
+        """Buffer ``payload`` without waiting; flags the connection when over its caps"""
+        if self.overflowed.is_set():
+            return
+        size = len(payload)
+        if (self.queue.qsize() >= settings.MESSAGING_WS_QUEUE_SIZE
+                or self.buffered_bytes + size > settings.MESSAGING_WS_MAX_BUFFER_BYTES):
+            self.overflowed.set()
+            return
+        self.buffered_bytes += size
+        self.queue.put_nowait(payload)
+
+    async def write(self):
+        while True:
+            payload = await self.queue.get()
+            await self.send({'type': 'websocket.send', 'text': payload})
+            self.buffered_bytes -= len(payload)
+
+    async def read(self, receive):
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            try:
+                message = json.loads(event.get('text') or 'null')
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get('type') == 'ping':
+                self.push(json.dumps({'type': 'pong'}))
+
+
+class Hub:
+    """Per-process registry of open connections and their Redis subscriptions"""
+
+    def __init__(self):
+        self.connections = defaultdict(set)
+        self.loop = None
+        self.pubsub = None
+        self.listener = None
+
+    async def join(self, connection):
+        self.loop = asyncio.get_running_loop()
+        first = not self.connections[connection.user_id]
+        self.connections[connection.user_id].add(connection)
+        if first and redis_available():
+            await self._subscribe(connection.user_id)
+
+    async def leave(self, connection):
+        connections = self.connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.connections[connection.user_id]
+            if self.pubsub is not None:
+                await self.pubsub.unsubscribe(user_channel(connection.user_id))
+
+    def dispatch(self, user_ids, payload):
+        for user_id in user_ids:
+            for connection in list(self.connections.get(user_id, ())):
+                connection.push(payload)
+
+    def dispatch_threadsafe(self, user_ids, payload):
+        """Entry point for publishers running outside the event loop thread"""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.dispatch, list(user_ids), payload)
+
+    async def _subscribe(self, user_id):
+        if self.pubsub is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(settings.MESSAGING_PUBSUB_URL)
+            self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(user_channel(user_id))
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.ensure_future(self._listen())
+
+    async def _listen(self):
+        prefix = user_channel('')
+        while self.connections:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except Exception:
+                logger.warning("Messaging pub/sub connection lost, retrying", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            if message is None or message['type'] != 'message':
+                continue
+            channel = message['channel'].decode()
+            self.dispatch([int(channel[len(prefix):])], message['data'].decode())
+
+
+hub = Hub()
+
+
+def _handshake_token(scope):
+    """``(token, subprotocol to accept)`` from the handshake, or ``(None, None)``"""
+    subprotocols = scope.get('subprotocols') or []
+    if len(subprotocols) == 2 and subprotocols[0] == TOKEN_SUBPROTOCOL:
+        return subprotocols[1], TOKEN_SUBPROTOCOL
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization' and value.startswith(b'Bearer '):
+            return value[len(b'Bearer '):].decode(), None
+    return None, None
+
+
+async def _first_message_token(receive):
+    """
+    The token of an ``auth`` message sent right after the handshake, None
+    without one, or ``False`` if the client already disconnected
+    """
+    try:
+        event = await asyncio.wait_for(receive(), settings.MESSAGING_WS_AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if event['type'] == 'websocket.disconnect':
+        return False
+    if event['type'] != 'websocket.receive':
+        return None
+    try:
+        message = json.loads(event.get('text') or 'null')
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or message.get('type') != 'auth':
+        return None
+    token = message.get('token')
+    return token if isinstance(token, str) else None
+
+
+def authenticate(raw_token):
+    """Return ``(user_id, expires_at)`` for a valid access token, else None"""
+    authentication = ClaimsJWTAuthentication()
+    # Runs outside the request cycle, so manage CONN_MAX_AGE like a request would
+    close_old_connections()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    finally:
+        close_old_connections()
+    return user.pk, token['exp']
+
+
+async def websocket_application(scope, receive, send):
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    raw_token, subprotocol = _handshake_token(scope)
+    accepted = raw_token is None
+    if accepted:
+        # No token in the handshake, so it has to come as the first message
+        await send({'type': 'websocket.accept'})
+        raw_token = await _first_message_token(receive)
+        if raw_token is False:
+            return
+    identity = await sync_to_async(authenticate)(raw_token) if raw_token else None
+    if identity is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    user_id, expires_at = identity
+
+    if not accepted:
+        await send({'type': 'websocket.accept', 'subprotocol': subprotocol})
+    connection = Connection(user_id, send)
+    await hub.join(connection)
+    tasks = {
+        'read': asyncio.ensure_future(connection.read(receive)),
+        'write': asyncio.ensure_future(connection.write()),
+        'overflow': asyncio.ensure_future(connection.overflowed.wait()),
+        # The token is not re-checked later, so do not outlive it
+        'expired': asyncio.ensure_future(asyncio.sleep(max(expires_at - time.time(), 0))),
+    }
+    try:
+        done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        # Collect every outcome so no task exception goes unretrieved
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await hub.leave(connection)
+    for name, result in zip(tasks, results):
+        if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+            logger.warning(
+                "WebSocket %s task of user %s failed", name, user_id,
+                exc_info=(type(result), result, result.__traceback__),
+            )
+
+    if tasks['overflow'] in done:
+        await send({'type': 'websocket.close', 'code': CLOSE_TOO_SLOW})
+    elif tasks['expired'] in done:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.notifications.models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'notification_type', 'title', 'is_read', 'is_email_sent', 'created_at']
+    list_filter = ['notification_type', 'is_read', 'is_email_sent', 'is_push_sent']
+    search_fields = ['recipient__email', 'title']
+    raw_id_fields = ['recipient', 'booking', 'property']
@@ -0,0 +1,156 @@
+"""
+Email and push delivery for notifications, one digest per recipient.
+
+Each worker process keeps a single SMTP connection open across batches
+instead of logging in to EMAIL_HOST for every message, and sends at most
+NOTIFICATION_EMAIL_RATE messages per second. Each recipient's digest
+claims its rows with ``SELECT ... FOR UPDATE SKIP LOCKED`` and flags them
+sent in the same transaction as the send, so overlapping flushes never
+email the same notification twice and a failure part way through a batch
+only retries the digests that did not go out.
+"""
+
+import smtplib
+import time
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.messaging.realtime import publish
+from apps.notifications import unread
+from apps.notifications.models import Notification
+from apps.notifications.services import DUE_KEY
+
+_connection = None
+
+
+def get_connection():
+    """The worker's pooled mail connection, opened on first use"""
+    global _connection
+    if _connection is None:
+        connection = mail.get_connection(fail_silently=False)
+        connection.open()
+        _connection = connection
+    return _connection
+
+
+def reset_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+    _connection = None
+
+
+def pop_due(now=None):
+    """Remove and return recipients whose coalescing window has closed"""
+    key = cache.make_key(DUE_KEY)
+    now = time.time() if now is None else now
+    pipe = unread._redis().pipeline(transaction=True)
+    pipe.zrangebyscore(key, '-inf', now)
+    pipe.zremrangebyscore(key, '-inf', now)
+    due, _ = pipe.execute()
+    return [int(recipient_id) for recipient_id in due]
+
+
+def requeue(recipient_ids, now=None):
+    """Mark popped recipients due again, e.g. when their flush could not be queued"""
+    if not recipient_ids:
+        return
+    now = time.time() if now is None else now
+    unread._redis().zadd(
+        cache.make_key(DUE_KEY), {recipient_id: now for recipient_id in recipient_ids}, nx=True
+    )
+
+
+def next_due_in(now=None):
+    """Seconds until the next pending recipient is due, or None"""
+    now = time.time() if now is None else now
+    pending = unread._redis().zrange(cache.make_key(DUE_KEY), 0, 0, withscores=True)
+    if not pending:
+        return None
+    return max(pending[0][1] - now, 0)
+
+
+def build_email(recipient, notifications):
+    if len(notifications) == 1:
+        subject = notifications[0].title
+    else:
+        subject = f"You have {len(notifications)} new notifications"
+    body = '\n\n'.join(
+        '\n'.join(filter(None, [n.title, n.message, n.action_url])) for n in notifications
+    )
+    return mail.EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient.email])
+
+
+def _grouped(notifications):
+    by_recipient = {}
+    for notification in notifications:
+        by_recipient.setdefault(notification.recipient_id, []).append(notification)
+    return by_recipient
+
+
+def send_digest(recipient_id):
+    """Claim, email and flag the unsent notifications of one recipient"""
+    with transaction.atomic():
+        # Rows held by another flush are skipped; that flush is sending them
+        group = list(
+            Notification.objects.filter(recipient_id=recipient_id, is_email_sent=False)
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('recipient').order_by('created_at')
+        )
+        if not group:
+            return False
+        try:
+            get_connection().send_messages([build_email(group[0].recipient, group)])
+        except (smtplib.SMTPException, OSError):
+            # The server may have dropped an idle connection; the retry reconnects
+            reset_connection()
+            raise
+        Notification.objects.filter(pk__in=[n.pk for n in group]).update(is_email_sent=True)
+    return True
+
+
+def send_emails(recipient_ids):
+    """Email every unsent notification of ``recipient_ids``, one digest each"""
+    batch_size = settings.NOTIFICATION_EMAIL_BATCH_SIZE
+    interval = batch_size / settings.NOTIFICATION_EMAIL_RATE
+    started = time.monotonic()
+    sent = 0
+    for recipient_id in recipient_ids:
+        if not send_digest(recipient_id):
+            continue
+        sent += 1
+        if sent % batch_size == 0:
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+            started = time.monotonic()
+
+
+def send_push(recipient_ids):
+    """Publish one summary event per recipient over the realtime channels"""
+    pending = Notification.objects.filter(
+        recipient_id__in=recipient_ids, is_push_sent=False
+    ).order_by('recipient_id', 'created_at').only(
+        'id', 'recipient_id', 'notification_type', 'title', 'action_url'
+    )
+    sent = []
+    for recipient_id, group in _grouped(pending).items():
+        latest = group[-1]
+        publish([recipient_id], {
+            'type': 'notification',
+            'count': len(group),
+            'notification_type': latest.notification_type,
+            'title': latest.title,
+            'action_url': latest.action_url,
+        })
+        sent.extend(n.pk for n in group)
+    Notification.objects.filter(pk__in=sent).update(is_push_sent=True)
+
+
+def deliver(recipient_ids):
+    send_push(recipient_ids)
+    send_emails(recipient_ids)
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('properties', '0005_search_documents'),
+        ('bookings', '0003_guest_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('booking_request', 'Booking request'), ('booking_confirmed', 'Booking confirmed'), ('booking_cancelled', 'Booking cancelled'), ('new_message', 'New message'), ('new_review', 'New review'), ('system', 'System')], max_length=30)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField(blank=True)),
+                ('action_url', models.CharField(blank=True, max_length=500)),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_push_sent', models.BooleanField(default=False)),
+                ('is_email_sent', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='bookings.booking')),
+                ('property', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='properties.property')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at', 'id'], name='idx_notifications_recipient'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read'], name='idx_notifications_unread'),
+        ),
+    ]
@@ -1,3 +1,49 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Notification(models.Model):
+    NOTIFICATION_TYPE_CHOICES = [
+        ("booking_request", "Booking request"),
+        ("booking_confirmed", "Booking confirmed"),
+        ("booking_cancelled", "Booking cancelled"),
+        ("new_message", "New message"),
+        ("new_review", "New review"),
+        ("system", "System"),
+    ]
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications'
+    )
+    notification_type = models.CharField(max_length=30, choices=NOTIFICATION_TYPE_CHOICES)
+    title = models.CharField(max_length=200)
+    message = models.TextField(blank=True)
+    booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='notifications',
+    )
+    property = models.ForeignKey(
+        'properties.Property', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='notifications',
+    )
+    action_url = models.CharField(max_length=500, blank=True)
+    is_read = models.BooleanField(default=False)
+    is_push_sent = models.BooleanField(default=False)
+    is_email_sent = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['recipient', 'created_at', 'id'], name='idx_notifications_recipient'
+            ),
+            models.Index(
+                fields=['recipient', 'is_read'], name='idx_notifications_unread'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} for {self.recipient}"
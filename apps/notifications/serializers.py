@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from apps.notifications.models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer for a notification in the current user's feed"""
+    
+    class Meta:
+        model = Notification
+        fields = (
+            'id', 'notification_type', 'title', 'message', 'booking',
+            'property', 'action_url', 'is_read', 'created_at'
+        )
+        read_only_fields = fields
+        
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    """Mark the given notifications read, or all of them when ids is omitted"""
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=500
+    )
@@ -0,0 +1,63 @@
+"""
+Creating notifications never sends anything from the request thread.
+
+``notify`` writes the rows with one bulk INSERT and, after commit, marks
+each recipient as due in a Redis sorted set scored by when their digest
+should go out. The first event for a recipient sets that time and later
+ones within NOTIFICATION_COALESCE_SECONDS join the same digest; a single
+flush task per window then delivers every due recipient in batches
+(apps.notifications.delivery).
+"""
+
+import math
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.notifications import unread
+from apps.notifications.models import Notification
+
+DUE_KEY = 'notifications:due'
+FLUSH_SCHEDULED_KEY = 'notifications:flush_scheduled'
+
+
+def schedule_flush(countdown):
+    """Queue a flush in ``countdown`` seconds unless one is already pending"""
+    from apps.notifications.tasks import flush_notifications
+
+    countdown = max(math.ceil(countdown), 1)
+    if unread._redis().set(cache.make_key(FLUSH_SCHEDULED_KEY), 1, nx=True, ex=countdown):
+        flush_notifications.apply_async(countdown=countdown)
+
+
+def _schedule(recipient_ids):
+    # Eager Celery (local/test) has no countdown, so there is nothing to coalesce into
+    if not unread.redis_available() or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        from apps.notifications.tasks import flush_notifications
+
+        flush_notifications.delay(sorted(recipient_ids))
+        return
+
+    window = settings.NOTIFICATION_COALESCE_SECONDS
+    due_at = time.time() + window
+    # NX keeps the earliest due time, so a chatty stream cannot postpone a digest forever
+    unread._redis().zadd(
+        cache.make_key(DUE_KEY), {recipient_id: due_at for recipient_id in recipient_ids}, nx=True
+    )
+    schedule_flush(window)
+
+
+def notify(notifications):
+    """Store ``Notification`` instances and queue them for coalesced delivery"""
+    notifications = Notification.objects.bulk_create(notifications)
+    counts = Counter(notification.recipient_id for notification in notifications)
+
+    def after_commit():
+        unread.notifications_created(counts)
+        _schedule(set(counts))
+
+    transaction.on_commit(after_commit)
+    return notifications
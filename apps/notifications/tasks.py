@@ -0,0 +1,64 @@
+import smtplib
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from apps.notifications import delivery, unread
+from apps.notifications.services import schedule_flush
+
+User = get_user_model()
+
+
+@shared_task(ignore_result=True)
+def reconcile_unread_counters(batch_size=500, everyone=False):
+    """
+    Rewrite from SQL the unread hashes of users touched since the last run.
+    ``everyone`` sweeps every user, one id range at a time, e.g. after a
+    Redis outage lost writes.
+    """
+    if not unread.redis_available():
+        return
+    if not everyone:
+        for user_ids in unread.pop_touched(batch_size):
+            unread.reconcile(user_ids)
+        return
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return
+        unread.reconcile(user_ids)
+        last_id = user_ids[-1]
+
+
+@shared_task(
+    bind=True, ignore_result=True, autoretry_for=(smtplib.SMTPException, OSError),
+    retry_backoff=True, max_retries=5,
+)
+def flush_notifications(self, recipient_ids=None):
+    """Deliver the digests of ``recipient_ids``, or of every recipient now due"""
+    if recipient_ids is None:
+        if not unread.redis_available():
+            return
+        recipient_ids = delivery.pop_due()
+        queued = 0
+        try:
+            # A failed chunk is retried with explicit ids, since they are no longer due
+            for queued in range(0, len(recipient_ids), settings.NOTIFICATION_FLUSH_CHUNK_SIZE):
+                flush_notifications.delay(
+                    recipient_ids[queued:queued + settings.NOTIFICATION_FLUSH_CHUNK_SIZE]
+                )
+        except Exception:
+            # Popped ids live nowhere else, so the unqueued ones go back in the due set
+            delivery.requeue(recipient_ids[queued:])
+            raise
+        finally:
+            wait = delivery.next_due_in()
+            if wait is not None:
+                schedule_flush(wait)
+        return
+    delivery.deliver(recipient_ids)
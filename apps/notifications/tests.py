@@ -1,3 +1,197 @@
-from django.test import TestCase
+import smtplib
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from redis.exceptions import RedisError
+from rest_framework.test import APIClient
+
+from apps.messaging.services import mark_read, send_message, start_conversation
+from apps.notifications import delivery, unread
+from apps.notifications.models import Notification
+from apps.notifications.services import DUE_KEY, notify
+from apps.notifications.tasks import flush_notifications
+
+User = get_user_model()
+
+
+class FakeRedisMixin:
+    """Gives the default cache a django-redis style client backed by fakeredis"""
+
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        client = mock.Mock(get_client=mock.Mock(return_value=self.redis))
+        patcher = mock.patch.object(cache, 'client', client, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class NotificationFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user(email=f'u{n}@test.local', username=f'u{n}', password='x')
+            for n in range(3)
+        ]
+        delivery.reset_connection()
+        self.addCleanup(delivery.reset_connection)
+
+    def add(self, user, count=1):
+        return Notification.objects.bulk_create(
+            Notification(recipient=user, notification_type='system', title=f'Note {n}')
+            for n in range(count)
+        )
+
+
+class EmailDeliveryTests(NotificationFixtureMixin, TestCase):
+    def test_one_digest_per_recipient_and_no_resend(self):
+        self.add(self.users[0], 2)
+        self.add(self.users[1])
+        delivery.send_emails([user.pk for user in self.users])
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, 'You have 2 new notifications')
+        self.assertFalse(Notification.objects.filter(is_email_sent=False).exists())
+        delivery.send_emails([user.pk for user in self.users])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failure_keeps_digests_already_sent(self):
+        for user in self.users:
+            self.add(user)
+        connection = delivery.get_connection()
+        with mock.patch.object(
+            connection, 'send_messages', side_effect=[1, smtplib.SMTPServerDisconnected()]
+        ):
+            with self.assertRaises(smtplib.SMTPException):
+                delivery.send_emails([user.pk for user in self.users])
+
+        sent = Notification.objects.filter(is_email_sent=True)
+        self.assertEqual(list(sent.values_list('recipient_id', flat=True)), [self.users[0].pk])
+        # The retry reconnects and only sends what is left
+        delivery.send_emails([user.pk for user in self.users])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_notify_delivers_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify([Notification(recipient=self.users[0], notification_type='system', title='Hi')])
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(mail.outbox[0].subject, 'Hi')
+
+
+@override_settings(NOTIFICATION_FLUSH_CHUNK_SIZE=1)
+class FlushTests(FakeRedisMixin, NotificationFixtureMixin, TestCase):
+    def mark_due(self, due_at):
+        self.redis.zadd(cache.make_key(DUE_KEY), {user.pk: due_at for user in self.users})
+
+    def due(self):
+        return sorted(int(member) for member in self.redis.zrange(cache.make_key(DUE_KEY), 0, -1))
+
+    def test_due_recipients_are_flushed_in_chunks(self):
+        self.mark_due(time.time() - 1)
+        with mock.patch.object(flush_notifications, 'delay') as delay:
+            flush_notifications()
+        self.assertEqual(delay.call_args_list, [mock.call([user.pk]) for user in self.users])
+        self.assertEqual(self.due(), [])
+
+    def test_unqueued_recipients_become_due_again(self):
+        self.mark_due(time.time() - 1)
+        with mock.patch.object(flush_notifications, 'delay', side_effect=[None, OSError()]):
+            with mock.patch('apps.notifications.tasks.schedule_flush') as schedule:
+                with self.assertRaises(OSError):
+                    flush_notifications.run()
+        self.assertEqual(self.due(), [user.pk for user in self.users[1:]])
+        schedule.assert_called_once()
+
+
+class UnreadCounterTests(FakeRedisMixin, NotificationFixtureMixin, TestCase):
+    def test_counts_follow_creation_and_reads(self):
+        user = self.users[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            notify([Notification(recipient=user, notification_type='system', title='Hi')])
+        self.assertEqual(unread.get_counts(user.pk)['notifications'], 1)
+        unread.notifications_read(user.pk)
+        self.assertEqual(unread.get_counts(user.pk)['notifications'], 0)
+
+    def test_reconcile_repairs_drift_from_sql(self):
+        user = self.users[0]
+        self.add(user, 3)
+        self.redis.hset(unread.unread_key(user.pk), unread.NOTIFICATIONS_FIELD, 9)
+        self.redis.sadd(unread.touched_key(), user.pk)
+
+        for user_ids in unread.pop_touched(10):
+            unread.reconcile(user_ids)
+        self.assertEqual(unread.get_counts(user.pk)['notifications'], 3)
+
+    def conversation(self):
+        return start_conversation([user.pk for user in self.users])
+
+    def test_messages_count_for_everyone_but_the_sender(self):
+        conversation = self.conversation()
+        sender, reader, other = self.users
+        with self.captureOnCommitCallbacks(execute=True):
+            send_message(conversation.pk, sender.pk, 'one')
+            send_message(conversation.pk, sender.pk, 'two')
+        self.assertEqual(unread.get_counts(reader.pk)['conversations'], {conversation.pk: 2})
+        self.assertEqual(unread.get_counts(sender.pk)['conversations'], {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Replying marks the replier's side read
+            send_message(conversation.pk, reader.pk, 'reply')
+            mark_read(conversation.pk, other.pk)
+        for user in self.users:
+            self.assertEqual(
+                unread.get_counts(user.pk)['conversations'],
+                {conversation.pk: 1} if user == sender else {},
+            )
+        self.assertEqual(
+            unread.sql_counts([user.pk for user in self.users]),
+            {sender.pk: {unread.conversation_field(conversation.pk): 1}, reader.pk: {}, other.pk: {}},
+        )
+
+    def test_endpoints(self):
+        user = self.users[0]
+        self.add(user, 3)
+        unread.notifications_created({user.pk: 3})
+        first = Notification.objects.filter(recipient=user).earliest('pk')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                '/api/notifications/read/', {'ids': [first.pk]}, format='json'
+            )
+        self.assertEqual(response.data, {'updated': 1})
+        self.assertEqual(
+            client.get('/api/notifications/unread/').data,
+            {'conversations': {}, 'notifications': 2},
+        )
+
+    def test_redis_errors_do_not_fail_writes(self):
+        with mock.patch.object(self.redis, 'pipeline', side_effect=RedisError('down')):
+            with self.assertLogs('apps.notifications.unread', 'WARNING'):
+                unread.notifications_created({self.users[0].pk: 1})
+
+    def test_reconcile_backs_off_when_a_writer_races_it(self):
+        user = self.users[0]
+        self.add(user, 2)
+        read_sql = unread.sql_counts
+
+        def racing_sql_counts(user_ids):
+            counts = read_sql(user_ids)
+            unread.notifications_created({user.pk: 1})
+            return counts
+
+        with mock.patch.object(unread, 'sql_counts', side_effect=racing_sql_counts):
+            self.assertFalse(unread.reconcile([user.pk]))
+        self.assertEqual(unread.get_counts(user.pk)['notifications'], 1)
+        self.assertTrue(self.redis.sismember(unread.touched_key(), user.pk))
+
+    def test_sql_fallback_without_redis(self):
+        self.add(self.users[1], 2)
+        with mock.patch.object(unread, 'redis_available', return_value=False):
+            self.assertEqual(unread.get_counts(self.users[1].pk)['notifications'], 2)
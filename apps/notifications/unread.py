@@ -0,0 +1,202 @@
+"""
+Unread badges kept as one Redis hash per user.
+
+Fields are ``c:<conversation id>`` for unread messages and
+``notifications`` for unread notifications, so a client's full badge
+state is a single HGETALL. Writers adjust the hash after their
+transaction commits and add the user to a "touched" set; ``reconcile``
+periodically rewrites the hashes of touched users from SQL to repair any
+drift, backing off if a writer changes one meanwhile. Without a Redis
+cache the counts come from SQL.
+"""
+
+import functools
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from redis.exceptions import RedisError, WatchError
+
+from apps.messaging.models import ConversationParticipant
+from apps.notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_FIELD = 'notifications'
+CONVERSATION_PREFIX = 'c:'
+TOUCHED_KEY = 'unread:touched'
+
+
+def unread_key(user_id):
+    return cache.make_key(f'unread:{user_id}')
+
+
+def conversation_field(conversation_id):
+    return f'{CONVERSATION_PREFIX}{conversation_id}'
+
+
+def touched_key():
+    return cache.make_key(TOUCHED_KEY)
+
+
+def redis_available():
+    return hasattr(cache, 'client') and hasattr(cache.client, 'get_client')
+
+
+def _redis():
+    return cache.client.get_client(write=True)
+
+
+def best_effort(func):
+    """Badge writes run after commit; a Redis hiccup is left for ``reconcile``"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except RedisError:
+            logger.warning("Could not update unread counters", exc_info=True)
+    return wrapper
+
+
+@best_effort
+def message_sent(conversation_id, sender_id, participant_ids):
+    """Count the message for everyone else; replying marks the sender's side read"""
+    if not redis_available():
+        return
+    field = conversation_field(conversation_id)
+    pipe = _redis().pipeline(transaction=True)
+    for user_id in participant_ids:
+        if user_id == sender_id:
+            pipe.hdel(unread_key(user_id), field)
+        else:
+            pipe.hincrby(unread_key(user_id), field, 1)
+    if participant_ids:
+        pipe.sadd(touched_key(), *participant_ids)
+    pipe.execute()
+
+
+@best_effort
+def conversation_read(conversation_id, user_id):
+    if not redis_available():
+        return
+    pipe = _redis().pipeline(transaction=True)
+    pipe.hdel(unread_key(user_id), conversation_field(conversation_id))
+    pipe.sadd(touched_key(), user_id)
+    pipe.execute()
+
+
+@best_effort
+def notifications_created(counts_by_user):
+    """``counts_by_user`` maps recipient id to how many notifications they got"""
+    if not redis_available():
+        return
+    pipe = _redis().pipeline(transaction=True)
+    for user_id, count in counts_by_user.items():
+        pipe.hincrby(unread_key(user_id), NOTIFICATIONS_FIELD, count)
+    if counts_by_user:
+        pipe.sadd(touched_key(), *counts_by_user)
+    pipe.execute()
+
+
+@best_effort
+def notifications_read(user_id, count=None):
+    """Subtract ``count`` read notifications, or clear the badge when None"""
+    if not redis_available() or count == 0:
+        return
+    pipe = _redis().pipeline(transaction=True)
+    if count is None:
+        pipe.hdel(unread_key(user_id), NOTIFICATIONS_FIELD)
+    else:
+        pipe.hincrby(unread_key(user_id), NOTIFICATIONS_FIELD, -count)
+    pipe.sadd(touched_key(), user_id)
+    pipe.execute()
+
+
+def sql_counts(user_ids):
+    """``{user_id: {field: count}}`` computed from the database"""
+    counts = {user_id: {} for user_id in user_ids}
+    participants = ConversationParticipant.objects.filter(
+        user_id__in=user_ids, is_active=True
+    ).annotate(unread=Count(
+        'conversation__messages',
+        filter=Q(
+            conversation__messages__created_at__gt=Coalesce(F('last_read_at'), F('joined_at'))
+        ) & ~Q(conversation__messages__sender_id=F('user_id')),
+    )).filter(unread__gt=0).values_list('user_id', 'conversation_id', 'unread')
+    for user_id, conversation_id, unread in participants:
+        counts[user_id][conversation_field(conversation_id)] = unread
+
+    notifications = Notification.objects.filter(
+        recipient_id__in=user_ids, is_read=False
+    ).order_by().values('recipient_id').annotate(unread=Count('id')).values_list(
+        'recipient_id', 'unread'
+    )
+    for user_id, unread in notifications:
+        counts[user_id][NOTIFICATIONS_FIELD] = unread
+    return counts
+
+
+def get_counts(user_id):
+    """Badge state for one user: ``{'conversations': {id: n}, 'notifications': n}``"""
+    fields = None
+    if redis_available():
+        try:
+            fields = {
+                key.decode(): int(value)
+                for key, value in _redis().hgetall(unread_key(user_id)).items()
+            }
+        except RedisError:
+            pass
+    if fields is None:
+        fields = sql_counts([user_id])[user_id]
+
+    conversations = {
+        int(field[len(CONVERSATION_PREFIX):]): count
+        for field, count in fields.items()
+        if field.startswith(CONVERSATION_PREFIX) and count > 0
+    }
+    return {
+        'conversations': conversations,
+        'notifications': max(fields.get(NOTIFICATIONS_FIELD, 0), 0),
+    }
+
+
+def pop_touched(batch_size):
+    """Yield batches of the users touched so far; later touches wait for the next run"""
+    remaining = _redis().scard(touched_key())
+    while remaining > 0:
+        user_ids = [int(raw) for raw in _redis().spop(touched_key(), min(batch_size, remaining))]
+        if not user_ids:
+            return
+        remaining -= len(user_ids)
+        yield user_ids
+
+
+def reconcile(user_ids):
+    """
+    Overwrite the Redis hashes of ``user_ids`` with counts from SQL.
+
+    The hashes are watched before the SQL read, so a writer adjusting one
+    for a commit the read may have missed makes the rewrite fail instead
+    of being overwritten. The batch is then marked touched again for the
+    next run and False is returned.
+    """
+    client = _redis()
+    with client.pipeline(transaction=True) as pipe:
+        try:
+            pipe.watch(*[unread_key(user_id) for user_id in user_ids])
+            counts = sql_counts(user_ids)
+            pipe.multi()
+            for user_id, fields in counts.items():
+                pipe.delete(unread_key(user_id))
+                if fields:
+                    pipe.hset(unread_key(user_id), mapping=fields)
+            pipe.execute()
+        except WatchError:
+            client.sadd(touched_key(), *user_ids)
+            return False
+        except Exception:
+            client.sadd(touched_key(), *user_ids)
+            raise
+    return True
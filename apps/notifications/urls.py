@@ -0,0 +1,15 @@
+from django.urls import path
+
+from apps.notifications.views import (
+    NotificationListView,
+    mark_notifications_read_view,
+    unread_counts_view,
+)
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', NotificationListView.as_view(), name='list'),
+    path('read/', mark_notifications_read_view, name='mark_read'),
+    path('unread/', unread_counts_view, name='unread'),
+]
@@ -1,3 +1,45 @@
-from django.shortcuts import render
+from django.db import transaction
 
-# Create your views here.
+from rest_framework import generics, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.views import Response
+
+from apps.notifications import unread
+from apps.notifications.models import Notification
+from apps.notifications.serializers import (
+    MarkNotificationsReadSerializer,
+    NotificationSerializer,
+)
+
+
+class NotificationListView(generics.ListAPIView):
+    """The current user's notifications, newest first"""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return Notification.objects.filter(recipient_id=self.request.user.pk)
+    
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read_view(request):
+    """Mark notifications read and lower the unread badge accordingly"""
+    serializer = MarkNotificationsReadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data.get('ids')
+    
+    queryset = Notification.objects.filter(recipient_id=request.user.pk, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = queryset.update(is_read=True)
+        transaction.on_commit(
+            lambda: unread.notifications_read(request.user.pk, None if ids is None else updated)
+        )
+    return Response({'updated': updated})
+    
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_counts_view(request):
+    """All unread badges of the current user from a single hash read"""
+    return Response(unread.get_counts(request.user.pk))
@@ -1,3 +1,90 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.properties.availability import unavailable_ranges
+from apps.properties.models import (
+    Address,
+    Amenity,
+    BlockedDate,
+    Property,
+    PropertyAvailability,
+    PropertyCalendar,
+    PropertyImage,
+    SeasonalPricing,
+)
+
+
+@admin.register(Address)
+class AddressAdmin(admin.ModelAdmin):
+    list_display = ['street_address', 'city', 'country', 'latitude', 'longitude', 'is_verified']
+    list_filter = ['country', 'address_type', 'is_verified']
+    search_fields = ['street_address', 'city', 'postal_code']
+    readonly_fields = ['geohash']
+
+
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'is_active', 'bit']
+    list_filter = ['category', 'is_active']
+    search_fields = ['name']
+
+
+class BlockedDateInline(admin.TabularInline):
+    model = BlockedDate
+    extra = 0
+    fields = ['start_date', 'end_date', 'reason', 'notes']
+
+
+class SeasonalPricingInline(admin.TabularInline):
+    model = SeasonalPricing
+    extra = 0
+    fields = ['season_name', 'start_date', 'end_date', 'price_multiplier', 'minimum_nights', 'is_active']
+
+
+class PropertyImageInline(admin.TabularInline):
+    """Read-only gallery; images are uploaded through the API so they are hashed and deduplicated"""
+    model = PropertyImage
+    extra = 0
+    fields = ['image', 'caption', 'width', 'height', 'is_primary', 'display_order']
+    readonly_fields = ['image', 'width', 'height', 'is_primary', 'display_order']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class PropertyAvailabilityInline(admin.TabularInline):
+    model = PropertyAvailability
+    extra = 0
+    fields = ['date', 'is_available', 'price_override', 'minimum_nights_override', 'notes']
+
+
+@admin.register(Property)
+class PropertyAdmin(admin.ModelAdmin):
+    list_display = ['title', 'host', 'property_type', 'status', 'base_price_per_night', 'created_at']
+    list_filter = ['status', 'property_type', 'is_instant_book']
+    search_fields = ['title', 'slug', 'host__email']
+    prepopulated_fields = {'slug': ('title',)}
+    raw_id_fields = ['host', 'address']
+    filter_horizontal = ['amenities']
+    inlines = [
+        PropertyImageInline, BlockedDateInline, SeasonalPricingInline, PropertyAvailabilityInline
+    ]
+
+
+@admin.register(PropertyCalendar)
+class PropertyCalendarAdmin(admin.ModelAdmin):
+    """Read-only view of the availability bitmaps; edit via blocked dates"""
+    list_display = ['property', 'year', 'updated_at']
+    list_filter = ['year']
+    raw_id_fields = ['property']
+    fields = ['property', 'year', 'unavailable_days', 'updated_at']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Unavailable days')
+    def unavailable_days(self, obj):
+        return ', '.join(
+            str(start) if start == end else f'{start} - {end}'
+            for start, end in unavailable_ranges(obj)
+        ) or '-'
@@ -0,0 +1,142 @@
+"""
+Availability stored as one bitmap per property per year.
+
+A stay is free when ``bitmap & mask == 0`` for the nights it covers, so
+checking one property or a whole result page costs one query plus an
+integer AND per property and year.
+"""
+
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+
+from apps.properties.models import BlockedDate, PropertyAvailability, PropertyCalendar
+
+BITMAP_BYTES = 46  # 366 days
+
+# Callables returning (start, end_exclusive) ranges that make a property
+# unavailable in a given year; other apps append to this list.
+UNAVAILABILITY_SOURCES = []
+
+
+def to_int(bitmap):
+    return int.from_bytes(bytes(bitmap), 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def year_masks(start, end):
+    """Split [start, end) into ``{year: mask}`` with one bit per night"""
+    masks = {}
+    day = start
+    while day < end:
+        year_end = date(day.year + 1, 1, 1)
+        stop = min(end, year_end)
+        first = day.timetuple().tm_yday - 1
+        nights = (stop - day).days
+        masks[day.year] = masks.get(day.year, 0) | (((1 << nights) - 1) << first)
+        day = stop
+    return masks
+
+
+def available_property_ids(property_ids, check_in, check_out):
+    """The subset of ``property_ids`` free for every night in [check_in, check_out)"""
+    masks = year_masks(check_in, check_out)
+    busy = set()
+    calendars = PropertyCalendar.objects.filter(
+        property_id__in=property_ids, year__in=list(masks)
+    ).values_list('property_id', 'year', 'unavailable')
+    for property_id, year, bitmap in calendars:
+        if to_int(bitmap) & masks[year]:
+            busy.add(property_id)
+    return [property_id for property_id in property_ids if property_id not in busy]
+
+
+def is_range_free(property_id, check_in, check_out):
+    return bool(available_property_ids([property_id], check_in, check_out))
+
+
+def _locked_calendar(property_id, year):
+    locked = PropertyCalendar.objects.select_for_update()
+    try:
+        return locked.get(property_id=property_id, year=year)
+    except PropertyCalendar.DoesNotExist:
+        pass
+    try:
+        # A row we insert stays locked by our transaction until it ends
+        with transaction.atomic():
+            return PropertyCalendar.objects.create(property_id=property_id, year=year)
+    except IntegrityError:
+        # Created concurrently; wait for that transaction instead
+        return locked.get(property_id=property_id, year=year)
+
+
+@transaction.atomic
+def block_range(property_id, start, end):
+    """Mark [start, end) unavailable; additive, so safe to call concurrently"""
+    for year, mask in year_masks(start, end).items():
+        calendar = _locked_calendar(property_id, year)
+        calendar.unavailable = to_bytes(to_int(calendar.unavailable) | mask)
+        calendar.save(update_fields=['unavailable', 'updated_at'])
+
+
+def blocked_date_ranges(property_id, year):
+    blocks = BlockedDate.objects.filter(
+        property_id=property_id,
+        start_date__lt=date(year + 1, 1, 1),
+        end_date__gte=date(year, 1, 1),
+    ).values_list('start_date', 'end_date')
+    return [(start, end + timedelta(days=1)) for start, end in blocks]
+
+
+def closed_date_ranges(property_id, year):
+    days = PropertyAvailability.objects.filter(
+        property_id=property_id, is_available=False, date__year=year
+    ).values_list('date', flat=True)
+    return [(day, day + timedelta(days=1)) for day in days]
+
+
+UNAVAILABILITY_SOURCES.extend([blocked_date_ranges, closed_date_ranges])
+
+
+@transaction.atomic
+def rebuild_calendar(property_id, year):
+    """Recompute a year from every source; used when something is released"""
+    calendar = _locked_calendar(property_id, year)
+    bits = 0
+    for source in UNAVAILABILITY_SOURCES:
+        for start, end in source(property_id, year):
+            bits |= year_masks(start, end).get(year, 0)
+    calendar.unavailable = to_bytes(bits)
+    calendar.save(update_fields=['unavailable', 'updated_at'])
+
+
+def rebuild_range(property_id, start, end):
+    for year in range(start.year, (end - timedelta(days=1)).year + 1):
+        rebuild_calendar(property_id, year)
+
+
+def calendar_days(calendar):
+    """Row-per-day view of a calendar, only materialized for admin display"""
+    bits = to_int(calendar.unavailable)
+    day = date(calendar.year, 1, 1)
+    while day.year == calendar.year:
+        yield day, not bits & (1 << (day.timetuple().tm_yday - 1))
+        day += timedelta(days=1)
+
+
+def unavailable_ranges(calendar):
+    """Collapse a calendar into (first_day, last_day) unavailable ranges"""
+    ranges, start, previous = [], None, None
+    for day, available in calendar_days(calendar):
+        if not available and start is None:
+            start = day
+        if available and start is not None:
+            ranges.append((start, previous))
+            start = None
+        previous = day
+    if start is not None:
+        ranges.append((start, previous))
+    return ranges
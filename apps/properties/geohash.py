@@ -0,0 +1,108 @@
+"""Minimal geohash encoding and bounding-box cover for the non-PostGIS fallback"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=12):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def bounds(prefix):
+    """(south, west, north, east) of the cell named by ``prefix``"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in prefix:
+        bits = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if bits >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def farthest_km(latitude, longitude, south, west, north, east):
+    """Distance to the farthest point of a box not containing the antipode"""
+    # Great-circle distance has no maximum inside such a box, and on each
+    # edge it peaks at an end, so a corner is always the farthest point
+    return max(
+        haversine_km(latitude, longitude, lat, lng)
+        for lat in (south, north) for lng in (west, east)
+    )
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell"""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def cover(south, west, north, east, max_cells=32):
+    """Geohash prefixes whose cells together cover the bounding box"""
+    precision = 1
+    for candidate in range(12, 0, -1):
+        height, width = cell_size(candidate)
+        rows = math.ceil((north - south) / height) + 1
+        cols = math.ceil((east - west) / width) + 1
+        if rows * cols <= max_cells:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    prefixes = set()
+    lat = south
+    while True:
+        lng = west
+        while True:
+            prefixes.add(encode(min(lat, north), min(lng, east), precision))
+            if lng >= east:
+                break
+            lng += width
+        if lat >= north:
+            break
+        lat += height
+    return prefixes
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """(south, west, north, east) enclosing a circle of ``radius_km``"""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    d_lng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return (
+        max(-90.0, latitude - d_lat),
+        max(-180.0, longitude - d_lng),
+        min(90.0, latitude + d_lat),
+        min(180.0, longitude + d_lng),
+    )
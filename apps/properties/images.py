@@ -0,0 +1,192 @@
+"""
+Gallery uploads for properties.
+
+A batch of streamed uploads (core.uploads) is first checked for exact
+duplicates by content hash, then decoded in parallel on a small thread
+pool; Pillow releases the GIL while decoding, resizing and encoding. Each
+image gets a 64-bit difference hash, and one within
+``PROPERTY_IMAGE_DUPLICATE_DISTANCE`` bits of a photo already in the
+gallery (or earlier in the batch) is skipped as a near duplicate. The
+rest are stored and inserted with one bulk INSERT.
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Case, F, Max, PositiveIntegerField, Value, When
+from PIL import Image, ImageOps
+
+from apps.properties.indexing import schedule_reindex
+from apps.properties.models import Property, PropertyImage
+from core.uploads import IMAGE_FORMATS, content_name, save_content, webp_name
+
+_executor = None
+
+
+def get_executor():
+    # Created lazily so each forked worker gets its own threads
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PROPERTY_IMAGE_WORKERS, thread_name_prefix='images'
+        )
+    return _executor
+
+
+def difference_hash(image):
+    """64-bit dHash as a signed integer, so it fits a BigIntegerField"""
+    pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = value << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+def analyze(upload):
+    """Perceptual hash and WebP thumbnail bytes for one upload"""
+    width, height = settings.PROPERTY_THUMBNAIL_SIZE
+    with Image.open(upload) as image:
+        size = image.size
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        image.draft('RGB', (width * 2, height * 2))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    upload.seek(0)
+    phash = difference_hash(image)
+    image.thumbnail((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=settings.PROPERTY_THUMBNAIL_QUALITY, method=4)
+    return phash, size, buffer.getvalue()
+
+
+def store(upload, image_format, thumbnail):
+    name = content_name('properties', upload.sha256, IMAGE_FORMATS[image_format])
+    return (
+        save_content(name, upload),
+        save_content(webp_name('properties/thumbs', thumbnail), ContentFile(thumbnail)),
+    )
+
+
+def _drop_duplicates(property_id, candidates, skipped):
+    """
+    Keep the ``candidates`` (upload, ..., phash, ...) that match neither an
+    image already in the gallery nor an earlier candidate; the rest go to
+    ``skipped``.
+    """
+    existing = list(
+        PropertyImage.objects.filter(property_id=property_id)
+        .values_list('id', 'content_hash', 'perceptual_hash')
+    )
+    by_content = {content_hash: pk for pk, content_hash, _ in existing}
+    hashes = [(pk, phash) for pk, _, phash in existing]
+    distance = settings.PROPERTY_IMAGE_DUPLICATE_DISTANCE
+
+    kept = []
+    for candidate in candidates:
+        upload, phash = candidate[0], candidate[2]
+        duplicate = by_content.get(upload.sha256) or next(
+            (pk for pk, other in hashes if hamming(phash, other) <= distance), False
+        )
+        if duplicate is not False:
+            skipped.append((upload.name, duplicate))
+            continue
+        hashes.append((None, phash))
+        kept.append(candidate)
+    return kept
+
+
+def add_images(property_id, uploads):
+    """
+    Add ``[(upload, image_format)]`` to a gallery in order.
+
+    Returns ``(created images, skipped)`` where each skipped entry is
+    ``(upload name, id of the image it duplicates or None for an earlier
+    upload in the same batch)``.
+    """
+    skipped = []
+    seen_content = {}
+    unique = []
+    for upload, image_format in uploads:
+        if upload.sha256 in seen_content:
+            skipped.append((upload.name, None))
+            continue
+        seen_content[upload.sha256] = upload
+        unique.append((upload, image_format))
+
+    executor = get_executor()
+    analyzed = list(executor.map(lambda item: analyze(item[0]), unique))
+    candidates = _drop_duplicates(property_id, [
+        (upload, image_format, phash, size, thumbnail)
+        for (upload, image_format), (phash, size, thumbnail) in zip(unique, analyzed)
+    ], skipped)
+
+    # Files are written before the row lock, which apps.reviews.rollups also
+    # takes; names are content hashes, so a write that a concurrent upload
+    # makes redundant below is harmless
+    stored = list(executor.map(lambda item: (*item, store(item[0], item[1], item[4])), candidates))
+
+    with transaction.atomic():
+        # Serializes concurrent uploads to one gallery (display order, primary)
+        Property.objects.select_for_update().filter(pk=property_id).first()
+        kept = _drop_duplicates(property_id, stored, skipped)
+        aggregates = PropertyImage.objects.filter(property_id=property_id).aggregate(
+            last=Max('display_order'), primaries=Max(Case(When(is_primary=True, then=Value(1))))
+        )
+        first_order = 0 if aggregates['last'] is None else aggregates['last'] + 1
+        images = PropertyImage.objects.bulk_create([
+            PropertyImage(
+                property_id=property_id,
+                image=image_name,
+                thumbnail=thumbnail_name,
+                content_hash=upload.sha256,
+                perceptual_hash=phash,
+                width=size[0],
+                height=size[1],
+                is_primary=not aggregates['primaries'] and index == 0,
+                display_order=first_order + index,
+            )
+            for index, (upload, _, phash, size, _, (image_name, thumbnail_name))
+            in enumerate(kept)
+        ])
+        if images and images[0].is_primary:
+            schedule_reindex(property_id)
+    return images, skipped
+
+
+def reorder(property_id, image_ids):
+    """Set ``display_order`` for the whole gallery with one UPDATE"""
+    return PropertyImage.objects.filter(property_id=property_id).update(
+        display_order=Case(
+            *[When(pk=pk, then=Value(index)) for index, pk in enumerate(image_ids)],
+            default=F('display_order'),
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+@transaction.atomic
+def set_primary(image):
+    PropertyImage.objects.filter(property_id=image.property_id, is_primary=True).exclude(
+        pk=image.pk
+    ).update(is_primary=False)
+    PropertyImage.objects.filter(pk=image.pk).update(is_primary=True)
+    image.is_primary = True
+    schedule_reindex(image.property_id)
+
+
+@transaction.atomic
+def delete_image(image):
+    """Delete ``image``, promoting the next photo when it was the primary"""
+    image.delete()
+    if image.is_primary:
+        successor = PropertyImage.objects.filter(property_id=image.property_id).first()
+        if successor:
+            PropertyImage.objects.filter(pk=successor.pk).update(is_primary=True)
+        schedule_reindex(image.property_id)
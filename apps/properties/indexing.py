@@ -0,0 +1,96 @@
+"""
+Incremental maintenance of PropertySearchDocument rows.
+
+Anything that changes what search shows calls ``schedule_reindex`` with
+the affected property ids, which are indexed by a Celery task after
+commit, so a save never pays for the rebuild and a rolled back save
+never reaches the index.
+"""
+
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from apps.properties.models import Property, PropertyImage, PropertySearchDocument
+
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config='simple')
+    + SearchVector('city', 'country', weight='B', config='simple')
+    + SearchVector('property_type', weight='C', config='simple')
+)
+
+
+def amenity_mask(bits):
+    mask = 0
+    for bit in bits:
+        mask |= 1 << bit
+    return mask
+
+
+def build_document(prop):
+    """Document for an active property with address, rollup, amenities and primary image loaded"""
+    address = prop.address
+    rollup = getattr(prop, 'rating_rollup', None)
+    primary = prop.primary_images[0] if prop.primary_images else None
+    return PropertySearchDocument(
+        property=prop,
+        title=prop.title,
+        slug=prop.slug,
+        property_type=prop.property_type,
+        city=address.city,
+        country=address.country,
+        city_key=address.city.lower(),
+        country_key=address.country.lower(),
+        latitude=address.latitude,
+        longitude=address.longitude,
+        geohash=address.geohash,
+        base_price_per_night=prop.base_price_per_night,
+        cleaning_fee=prop.cleaning_fee,
+        max_guests=prop.max_guests,
+        bedrooms=prop.bedrooms,
+        is_instant_book=prop.is_instant_book,
+        amenity_mask=amenity_mask(
+            amenity.bit for amenity in prop.amenities.all() if amenity.is_active
+        ),
+        rating_average=rollup.rating_average if rollup else None,
+        review_count=rollup.review_count if rollup else 0,
+        # Listings embed only this; the gallery is fetched on the detail page
+        primary_thumbnail=primary.thumbnail if primary else '',
+    )
+
+
+@transaction.atomic
+def index_properties(property_ids):
+    """Rewrite the documents for ``property_ids``; returns how many are searchable"""
+    property_ids = list(property_ids)
+    # Row locks serialize concurrent reindexes of the same property
+    properties = (
+        Property.objects.filter(pk__in=property_ids, status='active')
+        .select_for_update(of=('self',))
+        .select_related('address', 'rating_rollup')
+        .prefetch_related(
+            'amenities',
+            Prefetch(
+                'images', queryset=PropertyImage.objects.filter(is_primary=True),
+                to_attr='primary_images',
+            ),
+        )
+    )
+    documents = [build_document(prop) for prop in properties]
+
+    PropertySearchDocument.objects.filter(property_id__in=property_ids).delete()
+    PropertySearchDocument.objects.bulk_create(documents)
+    if documents and connection.vendor == 'postgresql':
+        PropertySearchDocument.objects.filter(property_id__in=property_ids).update(
+            search_vector=SEARCH_VECTOR
+        )
+    return len(documents)
+
+
+def schedule_reindex(*property_ids):
+    """Queue property ids for indexing once the current transaction commits"""
+    from apps.properties.tasks import reindex_properties
+
+    property_ids = sorted({property_id for property_id in property_ids if property_id})
+    if property_ids:
+        transaction.on_commit(lambda: reindex_properties.delay(property_ids))
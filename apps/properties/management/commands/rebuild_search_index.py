@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from apps.properties.indexing import index_properties
+from apps.properties.models import Property
+
+
+def _init_worker():
+    # Needed when workers are spawned rather than forked
+    django.setup()
+
+
+def index_range(first_id, last_id):
+    property_ids = list(
+        Property.objects.filter(pk__range=(first_id, last_id)).values_list('pk', flat=True)
+    )
+    return len(property_ids), index_properties(property_ids)
+
+
+def id_ranges(chunk_size):
+    """``(first_id, last_id)`` for consecutive chunks of property ids"""
+    chunk = []
+    for pk in Property.objects.order_by('pk').values_list('pk', flat=True).iterator():
+        chunk.append(pk)
+        if len(chunk) == chunk_size:
+            yield chunk[0], chunk[-1]
+            chunk = []
+    if chunk:
+        yield chunk[0], chunk[-1]
+
+
+class Command(BaseCommand):
+    help = "Regenerate every property search document in parallel chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Worker processes (defaults to CPU count, 1 indexes inline)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        ranges = list(id_ranges(options['chunk_size']))
+        self.seen = self.indexed = 0
+        workers = options['workers']
+        if connection.vendor != 'postgresql':
+            # SQLite has a single writer, so parallel chunks would only contend
+            workers = 1
+
+        if workers == 1:
+            for first_id, last_id in ranges:
+                self.report(*index_range(first_id, last_id))
+        else:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker
+            ) as pool:
+                futures = [pool.submit(index_range, *bounds) for bounds in ranges]
+                for future in as_completed(futures):
+                    self.report(*future.result())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {self.indexed} searchable properties out of {self.seen} '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def report(self, seen, indexed):
+        self.seen += seen
+        self.indexed += indexed
+        self.stdout.write(f'Processed {self.seen} properties...')
@@ -0,0 +1,79 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:09
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Address',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('street_address', models.CharField(max_length=255)),
+                ('apartment_number', models.CharField(blank=True, max_length=50)),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('postal_code', models.CharField(blank=True, max_length=20)),
+                ('latitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)])),
+                ('longitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)])),
+                ('geohash', models.CharField(db_index=True, editable=False, max_length=12)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('address_type', models.CharField(choices=[('home', 'Home'), ('property', 'Property'), ('billing', 'Billing')], default='property', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Address',
+                'verbose_name_plural': 'Addresses',
+                'db_table': 'addresses',
+            },
+        ),
+        migrations.CreateModel(
+            name='Property',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=220, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('property_type', models.CharField(choices=[('apartment', 'Apartment'), ('house', 'House'), ('villa', 'Villa'), ('cabin', 'Cabin'), ('room', 'Private room')], max_length=20)),
+                ('max_guests', models.PositiveSmallIntegerField(default=1)),
+                ('bedrooms', models.PositiveSmallIntegerField(default=1)),
+                ('bathrooms', models.DecimalField(decimal_places=1, default=1, max_digits=3)),
+                ('beds', models.PositiveSmallIntegerField(default=1)),
+                ('base_price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cleaning_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('active', 'Active'), ('inactive', 'Inactive')], default='draft', max_length=10)),
+                ('is_instant_book', models.BooleanField(default=False)),
+                ('minimum_nights', models.PositiveSmallIntegerField(default=1)),
+                ('maximum_nights', models.PositiveSmallIntegerField(default=365)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('address', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='property', to='properties.address')),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='properties', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Property',
+                'verbose_name_plural': 'Properties',
+                'db_table': 'properties',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['city', 'country'], name='idx_addresses_location'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'created_at'], name='idx_properties_status'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('properties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('unavailable', models.BinaryField(default=b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendars', to='properties.property')),
+            ],
+            options={
+                'db_table': 'property_calendars',
+            },
+        ),
+        migrations.CreateModel(
+            name='BlockedDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(help_text='Inclusive')),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocked_dates', to='properties.property')),
+            ],
+            options={
+                'db_table': 'blocked_dates',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='propertycalendar',
+            constraint=models.UniqueConstraint(fields=('property', 'year'), name='uk_property_calendar_year'),
+        ),
+        migrations.AddIndex(
+            model_name='blockeddate',
+            index=models.Index(fields=['property', 'start_date', 'end_date'], name='idx_blocked_dates_range'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:17
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_availability_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonalPricing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season_name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(help_text='Inclusive')),
+                ('price_multiplier', models.DecimalField(decimal_places=2, max_digits=4, validators=[django.core.validators.MinValueValidator(0)])),
+                ('minimum_nights', models.PositiveSmallIntegerField(default=1)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seasonal_pricing', to='properties.property')),
+            ],
+            options={
+                'verbose_name_plural': 'Seasonal pricing',
+                'db_table': 'seasonal_pricing',
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_available', models.BooleanField(default=True)),
+                ('price_override', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('minimum_nights_override', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='properties.property')),
+            ],
+            options={
+                'verbose_name_plural': 'Property availability',
+                'db_table': 'property_availability',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='seasonalpricing',
+            index=models.Index(fields=['property', 'start_date', 'end_date'], name='idx_seasonal_pricing_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='seasonalpricing',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', django.db.models.expressions.F('start_date'))), name='chk_seasonal_pricing_dates'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyavailability',
+            index=models.Index(fields=['property', 'date', 'is_available'], name='idx_availability_date_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertyavailability',
+            constraint=models.UniqueConstraint(fields=('property', 'date'), name='uk_property_availability_date'),
+        ),
+    ]
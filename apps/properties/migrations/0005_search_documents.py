@@ -0,0 +1,109 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:19
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+CREATE_INDEXES = [
+    # Expression must match apps.properties.search.point_expression() exactly
+    """
+    CREATE INDEX IF NOT EXISTS idx_search_docs_coordinates ON property_search_documents
+    USING GIST (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_search_docs_vector ON property_search_documents
+    USING GIN (search_vector)
+    """,
+]
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS idx_search_docs_coordinates",
+    "DROP INDEX IF EXISTS idx_search_docs_vector",
+]
+
+
+def is_postgis(schema_editor):
+    return getattr(schema_editor.connection.ops, 'postgis', False)
+
+
+def create_indexes(apps, schema_editor):
+    if is_postgis(schema_editor):
+        for sql in CREATE_INDEXES:
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if is_postgis(schema_editor):
+        for sql in DROP_INDEXES:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('icon_class', models.CharField(blank=True, max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('bit', models.PositiveSmallIntegerField(editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Amenities',
+                'db_table': 'amenities',
+                'ordering': ['category', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertySearchDocument',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='properties.property')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=220)),
+                ('property_type', models.CharField(max_length=20)),
+                ('city', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('city_key', models.CharField(max_length=100)),
+                ('country_key', models.CharField(max_length=100)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('geohash', models.CharField(db_index=True, max_length=12)),
+                ('base_price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cleaning_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_guests', models.PositiveSmallIntegerField()),
+                ('bedrooms', models.PositiveSmallIntegerField()),
+                ('is_instant_book', models.BooleanField()),
+                ('amenity_mask', models.BigIntegerField(default=0)),
+                ('rating_average', models.DecimalField(decimal_places=2, max_digits=3, null=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'property_search_documents',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='propertysearchdocument',
+            index=models.Index(fields=['country_key', 'city_key', 'base_price_per_night'], name='idx_search_docs_location'),
+        ),
+        migrations.AddIndex(
+            model_name='propertysearchdocument',
+            index=models.Index(fields=['base_price_per_night'], name='idx_search_docs_price'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='amenities',
+            field=models.ManyToManyField(blank=True, db_table='property_amenities', related_name='properties', to='properties.Amenity'),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_search_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertysearchdocument',
+            name='primary_thumbnail',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='PropertyImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(max_length=255, upload_to='')),
+                ('thumbnail', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('perceptual_hash', models.BigIntegerField()),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('caption', models.CharField(blank=True, max_length=200)),
+                ('is_primary', models.BooleanField(default=False)),
+                ('display_order', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='properties.property')),
+            ],
+            options={
+                'db_table': 'property_images',
+                'ordering': ['display_order', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', 'display_order'], name='idx_property_images_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertyimage',
+            constraint=models.UniqueConstraint(fields=('property', 'content_hash'), name='uk_property_image_content'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertyimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_primary', True)), fields=('property',), name='uk_property_primary_image'),
+        ),
+    ]
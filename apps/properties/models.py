@@ -1,3 +1,364 @@
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from apps.properties import geohash
+
+
+class Address(models.Model):
+    ADDRESS_TYPE_CHOICES = [
+        ("home", "Home"),
+        ("property", "Property"),
+        ("billing", "Billing"),
+    ]
+
+    street_address = models.CharField(max_length=255)
+    apartment_number = models.CharField(max_length=50, blank=True)
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=100)
+    postal_code = models.CharField(max_length=20, blank=True)
+    latitude = models.FloatField(
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    # Used for radius/viewport search when PostGIS is not available
+    geohash = models.CharField(max_length=12, editable=False, db_index=True)
+    is_verified = models.BooleanField(default=False)
+    address_type = models.CharField(
+        max_length=10, choices=ADDRESS_TYPE_CHOICES, default="property"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'addresses'
+        verbose_name = 'Address'
+        verbose_name_plural = 'Addresses'
+        indexes = [
+            models.Index(fields=['city', 'country'], name='idx_addresses_location'),
+        ]
+
+    def __str__(self):
+        return f"{self.street_address}, {self.city}, {self.country}"
+
+    def save(self, *args, **kwargs):
+        self.geohash = geohash.encode(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+
+class Amenity(models.Model):
+    # Bits of PropertySearchDocument.amenity_mask, a signed 64-bit column
+    MAX_BITS = 63
+
+    name = models.CharField(max_length=100, unique=True)
+    category = models.CharField(max_length=50, blank=True)
+    icon_class = models.CharField(max_length=50, blank=True)
+    description = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    bit = models.PositiveSmallIntegerField(unique=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'amenities'
+        verbose_name_plural = 'Amenities'
+        ordering = ['category', 'name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            taken = set(Amenity.objects.values_list('bit', flat=True))
+            free = [bit for bit in range(self.MAX_BITS) if bit not in taken]
+            if not free:
+                raise ValueError(f"At most {self.MAX_BITS} amenities are supported")
+            self.bit = free[0]
+        super().save(*args, **kwargs)
+
+
+class Property(models.Model):
+    PROPERTY_TYPE_CHOICES = [
+        ("apartment", "Apartment"),
+        ("house", "House"),
+        ("villa", "Villa"),
+        ("cabin", "Cabin"),
+        ("room", "Private room"),
+    ]
+    STATUS_CHOICES = [
+        ("draft", "Draft"),
+        ("active", "Active"),
+        ("inactive", "Inactive"),
+    ]
+
+    host = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='properties'
+    )
+    address = models.OneToOneField(
+        Address, on_delete=models.PROTECT, related_name='property'
+    )
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220, unique=True)
+    description = models.TextField(blank=True)
+    property_type = models.CharField(max_length=20, choices=PROPERTY_TYPE_CHOICES)
+
+    max_guests = models.PositiveSmallIntegerField(default=1)
+    bedrooms = models.PositiveSmallIntegerField(default=1)
+    bathrooms = models.DecimalField(max_digits=3, decimal_places=1, default=1)
+    beds = models.PositiveSmallIntegerField(default=1)
+
+    base_price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    cleaning_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    amenities = models.ManyToManyField(
+        Amenity, related_name='properties', blank=True, db_table='property_amenities'
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="draft")
+    is_instant_book = models.BooleanField(default=False)
+    minimum_nights = models.PositiveSmallIntegerField(default=1)
+    maximum_nights = models.PositiveSmallIntegerField(default=365)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'properties'
+        verbose_name = 'Property'
+        verbose_name_plural = 'Properties'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_properties_status'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class PropertyImage(models.Model):
+    """
+    A gallery photo. ``image`` and ``thumbnail`` are content-hashed storage
+    names (core.uploads); ``perceptual_hash`` is a 64-bit difference hash
+    used to reject near-identical uploads (apps.properties.images).
+    """
+
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
+    image = models.ImageField(max_length=255)
+    thumbnail = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    perceptual_hash = models.BigIntegerField()
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    caption = models.CharField(max_length=200, blank=True)
+    is_primary = models.BooleanField(default=False)
+    display_order = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'property_images'
+        ordering = ['display_order', 'id']
+        indexes = [
+            models.Index(fields=['property', 'display_order'], name='idx_property_images_order'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['property', 'content_hash'], name='uk_property_image_content'
+            ),
+            models.UniqueConstraint(
+                fields=['property'], condition=Q(is_primary=True),
+                name='uk_property_primary_image',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Image {self.display_order} of {self.property_id}"
+
+
+class BlockedDate(models.Model):
+    """Host-blocked date range; folded into PropertyCalendar bitmaps"""
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name='blocked_dates'
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Inclusive")
+    reason = models.CharField(max_length=100, blank=True)
+    notes = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'blocked_dates'
+        indexes = [
+            models.Index(
+                fields=['property', 'start_date', 'end_date'],
+                name='idx_blocked_dates_range',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property} blocked {self.start_date} - {self.end_date}"
+
+
+class PropertyCalendar(models.Model):
+    """
+    One row per property per year. Bit ``n`` of ``unavailable`` is set when
+    day ``n`` of the year (0 = Jan 1) cannot be booked.
+    """
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name='calendars'
+    )
+    year = models.PositiveSmallIntegerField()
+    unavailable = models.BinaryField(default=bytes(46))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'property_calendars'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['property', 'year'], name='uk_property_calendar_year'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property} {self.year}"
+
+
+
+class PropertyAvailability(models.Model):
+    """Per-night override of price or availability for a single date"""
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name='availability'
+    )
+    date = models.DateField()
+    is_available = models.BooleanField(default=True)
+    price_override = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0)],
+    )
+    minimum_nights_override = models.PositiveSmallIntegerField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'property_availability'
+        verbose_name_plural = 'Property availability'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['property', 'date'], name='uk_property_availability_date'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['property', 'date', 'is_available'],
+                name='idx_availability_date_range',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property} on {self.date}"
+
+
+class SeasonalPricing(models.Model):
+    """Multiplier applied to the base nightly price between two dates"""
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name='seasonal_pricing'
+    )
+    season_name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Inclusive")
+    price_multiplier = models.DecimalField(
+        max_digits=4, decimal_places=2, validators=[MinValueValidator(0)]
+    )
+    minimum_nights = models.PositiveSmallIntegerField(default=1)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'seasonal_pricing'
+        verbose_name_plural = 'Seasonal pricing'
+        indexes = [
+            models.Index(
+                fields=['property', 'start_date', 'end_date'],
+                name='idx_seasonal_pricing_range',
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='chk_seasonal_pricing_dates',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property} {self.season_name}"
+
+
+class PropertySearchDocument(models.Model):
+    """
+    Flattened, search-only copy of an active property. Maintained by
+    apps.properties.indexing so search never joins at request time.
+    """
+
+    property = models.OneToOneField(
+        Property, on_delete=models.CASCADE, primary_key=True,
+        related_name='search_document',
+    )
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220)
+    property_type = models.CharField(max_length=20)
+    city = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    # Lowercased copies so city/country filters are plain index lookups
+    city_key = models.CharField(max_length=100)
+    country_key = models.CharField(max_length=100)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, db_index=True)
+
+    base_price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    cleaning_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    max_guests = models.PositiveSmallIntegerField()
+    bedrooms = models.PositiveSmallIntegerField()
+    is_instant_book = models.BooleanField()
+    amenity_mask = models.BigIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, null=True)
+    review_count = models.PositiveIntegerField(default=0)
+    # Storage name of the primary image's thumbnail, the only image cards show
+    primary_thumbnail = models.CharField(max_length=255, blank=True)
+    # Populated on PostgreSQL only
+    search_vector = SearchVectorField(null=True)
+
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'property_search_documents'
+        indexes = [
+            models.Index(
+                fields=['country_key', 'city_key', 'base_price_per_night'],
+                name='idx_search_docs_location',
+            ),
+            models.Index(
+                fields=['base_price_per_night'], name='idx_search_docs_price'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Search document for {self.title}"
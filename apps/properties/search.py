@@ -0,0 +1,193 @@
+"""
+Radius and viewport search over property search documents, ordered by
+distance with keyset pagination.
+
+PostGIS: filtered through the GiST index on the documents' point
+expression (idx_search_docs_coordinates, created by migration
+0005_search_documents) and ordered by ST_DistanceSphere. Other backends:
+candidates come from geohash prefix ranges on the B-tree indexed
+``geohash`` column. Each page reads only the ring between the cursor's
+distance and a radius that doubles until it holds a full page, skipping
+cells wholly nearer than the cursor, so deep pages do not rescan the
+area already paged through.
+"""
+
+from django.contrib.postgres.search import SearchQuery
+from django.core import signing
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+
+from apps.properties import geohash
+from apps.properties.availability import available_property_ids
+from apps.properties.indexing import amenity_mask
+
+CURSOR_SALT = 'properties.search'
+MAX_RADIUS_KM = 200
+# Sorts after every geohash character, so [prefix, prefix + '{') is a prefix range
+PREFIX_END = '{'
+# Width of the first ring read by the geohash search; later rings double
+FIRST_RING_KM = 0.5
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(distance_km, pk):
+    return signing.dumps([distance_km, pk], salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    try:
+        distance_km, pk = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    return float(distance_km), int(pk)
+
+
+def point_expression(latitude=None, longitude=None):
+    """Document point, or a constant point when coordinates are given"""
+    if latitude is None:
+        x, y = F('longitude'), F('latitude')
+    else:
+        x, y = Value(float(longitude)), Value(float(latitude))
+    return Func(Func(x, y, function='ST_MakePoint'), Value(4326), function='ST_SetSRID')
+
+
+def uses_postgis():
+    return getattr(connection.ops, 'postgis', False)
+
+
+def filter_documents(queryset, params):
+    """Apply the attribute filters of SearchPageSerializer to documents"""
+    if params.get('q'):
+        if connection.vendor == 'postgresql':
+            queryset = queryset.filter(
+                search_vector=SearchQuery(params['q'], config='simple', search_type='websearch')
+            )
+        else:
+            queryset = queryset.filter(title__icontains=params['q'])
+    if params.get('city'):
+        queryset = queryset.filter(city_key=params['city'].lower())
+    if params.get('country'):
+        queryset = queryset.filter(country_key=params['country'].lower())
+    if params.get('property_type'):
+        queryset = queryset.filter(property_type=params['property_type'])
+    if params.get('min_price') is not None:
+        queryset = queryset.filter(base_price_per_night__gte=params['min_price'])
+    if params.get('max_price') is not None:
+        queryset = queryset.filter(base_price_per_night__lte=params['max_price'])
+    if params.get('guests'):
+        queryset = queryset.filter(max_guests__gte=params['guests'])
+    if params.get('bedrooms'):
+        queryset = queryset.filter(bedrooms__gte=params['bedrooms'])
+    if params.get('min_rating') is not None:
+        queryset = queryset.filter(rating_average__gte=params['min_rating'])
+    if params.get('amenities'):
+        mask = amenity_mask(amenity.bit for amenity in params['amenities'])
+        queryset = queryset.alias(
+            matched_amenities=F('amenity_mask').bitand(mask)
+        ).filter(matched_amenities=mask)
+    return queryset
+
+
+def search_properties(queryset, latitude, longitude, bbox, radius_km=None,
+                      cursor=None, limit=20, dates=None):
+    """
+    Return ``(documents, next_cursor)`` for search documents inside ``bbox``
+    (south, west, north, east), optionally within ``radius_km`` of the
+    center and free for ``dates`` (check_in, check_out), nearest first.
+    Each document gets a ``distance_km`` attribute.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    search = _postgis_search if uses_postgis() else _geohash_search
+
+    rows = []
+    while len(rows) <= limit:
+        batch = search(queryset, latitude, longitude, bbox, radius_km, after, limit + 1)
+        if dates:
+            free = set(available_property_ids([prop.pk for prop in batch], *dates))
+            rows.extend(prop for prop in batch if prop.pk in free)
+        else:
+            rows.extend(batch)
+        if len(batch) <= limit:
+            break
+        after = (batch[-1].distance_km, batch[-1].pk)
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.distance_km, last.pk)
+    return page, next_cursor
+
+
+def _postgis_search(queryset, latitude, longitude, bbox, radius_km, after, limit):
+    south, west, north, east = bbox
+    envelope = Func(
+        Value(west), Value(south), Value(east), Value(north), Value(4326),
+        function='ST_MakeEnvelope',
+    )
+    in_box = Func(
+        point_expression(), envelope,
+        function='ST_Intersects', output_field=BooleanField(),
+    )
+    distance = Func(
+        point_expression(), point_expression(latitude, longitude),
+        function='ST_DistanceSphere', output_field=FloatField(),
+    ) / Value(1000.0)
+
+    queryset = queryset.filter(in_box).annotate(distance_km=distance)
+    if radius_km is not None:
+        queryset = queryset.filter(distance_km__lte=radius_km)
+    if after is not None:
+        distance_km, pk = after
+        queryset = queryset.filter(
+            Q(distance_km__gt=distance_km) | Q(distance_km=distance_km, pk__gt=pk)
+        )
+    return list(queryset.order_by('distance_km', 'pk')[:limit])
+
+
+def _geohash_search(queryset, latitude, longitude, bbox, radius_km, after, limit):
+    south, west, north, east = bbox
+    reach = geohash.farthest_km(latitude, longitude, *bbox)
+    if radius_km is not None:
+        reach = min(reach, radius_km)
+    inner = after[0] if after else 0.0
+    width = max(reach / 16, FIRST_RING_KM)
+
+    while True:
+        outer = min(inner + width, reach)
+        ring = geohash.radius_bbox(latitude, longitude, outer)
+        box = (max(south, ring[0]), max(west, ring[1]), min(north, ring[2]), min(east, ring[3]))
+        if box[0] > box[2] or box[1] > box[3]:
+            return []
+        in_cells = Q()
+        for prefix in geohash.cover(*box):
+            # Cells wholly nearer than the cursor only hold earlier pages
+            if geohash.farthest_km(latitude, longitude, *geohash.bounds(prefix)) < inner:
+                continue
+            in_cells |= Q(geohash__gte=prefix, geohash__lt=prefix + PREFIX_END)
+
+        rows = []
+        if in_cells:
+            candidates = queryset.filter(
+                in_cells,
+                latitude__range=(box[0], box[2]),
+                longitude__range=(box[1], box[3]),
+            )
+            for prop in candidates:
+                prop.distance_km = geohash.haversine_km(
+                    latitude, longitude, prop.latitude, prop.longitude
+                )
+                if prop.distance_km > outer:
+                    continue
+                if after is not None and (prop.distance_km, prop.pk) <= after:
+                    continue
+                rows.append(prop)
+
+        # Anything not read yet lies beyond ``outer``, so a full ring is a full page
+        if len(rows) >= limit or outer >= reach:
+            rows.sort(key=lambda prop: (prop.distance_km, prop.pk))
+            return rows[:limit]
+        width *= 2
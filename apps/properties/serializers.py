@@ -0,0 +1,177 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from apps.properties import geohash
+from apps.properties.models import Amenity, Property, PropertyImage, PropertySearchDocument
+from apps.properties.search import MAX_RADIUS_KM
+from core.uploads import IMAGE_FORMATS, inspect_image
+
+
+class PropertySearchSerializer(serializers.ModelSerializer):
+    """Compact property card for search results, read from the search document"""
+    
+    id = serializers.IntegerField(source='property_id', read_only=True)
+    distance_km = serializers.SerializerMethodField()
+    total_price = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PropertySearchDocument
+        fields = (
+            'id', 'title', 'slug', 'property_type', 'base_price_per_night',
+            'max_guests', 'bedrooms', 'city', 'country',
+            'latitude', 'longitude', 'distance_km',
+            'rating_average', 'review_count', 'total_price', 'thumbnail'
+        )
+    
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 3)
+    
+    def get_total_price(self, obj):
+        """Total for the requested stay; None without dates or below a season's minimum stay"""
+        quote = self.context.get('quotes', {}).get(obj.pk)
+        return str(quote['total_amount']) if quote else None
+    
+    def get_thumbnail(self, obj):
+        return default_storage.url(obj.primary_thumbnail) if obj.primary_thumbnail else None
+    
+class SearchPageSerializer(serializers.Serializer):
+    """
+    Pagination and attribute filters shared by the search endpoints.
+    Subclasses add ``area``, ``(latitude, longitude, bbox, radius_km)``,
+    to the validated data.
+    """
+    
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    check_in = serializers.DateField(required=False)
+    check_out = serializers.DateField(required=False)
+    q = serializers.CharField(required=False, max_length=100)
+    city = serializers.CharField(required=False, max_length=100)
+    country = serializers.CharField(required=False, max_length=100)
+    property_type = serializers.ChoiceField(choices=Property.PROPERTY_TYPE_CHOICES, required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    guests = serializers.IntegerField(required=False, min_value=1)
+    bedrooms = serializers.IntegerField(required=False, min_value=0)
+    min_rating = serializers.DecimalField(
+        max_digits=3, decimal_places=2, min_value=Decimal('0'), max_value=Decimal('5'),
+        required=False,
+    )
+    amenities = serializers.PrimaryKeyRelatedField(
+        queryset=Amenity.objects.filter(is_active=True), many=True, required=False
+    )
+    
+    def validate(self, attrs):
+        check_in, check_out = attrs.get('check_in'), attrs.get('check_out')
+        if bool(check_in) != bool(check_out):
+            raise serializers.ValidationError("check_in and check_out must be given together")
+        if check_in and check_out <= check_in:
+            raise serializers.ValidationError("check_out must be after check_in")
+        return attrs
+    
+class NearbySearchSerializer(SearchPageSerializer):
+    """Query parameters for properties within a radius of a point"""
+    
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.1, max_value=MAX_RADIUS_KM, default=10)
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        bbox = geohash.radius_bbox(attrs['lat'], attrs['lng'], attrs['radius_km'])
+        attrs['area'] = (attrs['lat'], attrs['lng'], bbox, attrs['radius_km'])
+        return attrs
+    
+class ViewportSearchSerializer(SearchPageSerializer):
+    """Query parameters for properties inside a map viewport"""
+    
+    north = serializers.FloatField(min_value=-90, max_value=90)
+    south = serializers.FloatField(min_value=-90, max_value=90)
+    east = serializers.FloatField(min_value=-180, max_value=180)
+    west = serializers.FloatField(min_value=-180, max_value=180)
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs['south'] > attrs['north']:
+            raise serializers.ValidationError("south must not be greater than north")
+        if attrs['west'] > attrs['east']:
+            raise serializers.ValidationError("Viewports crossing the antimeridian are not supported")
+        # Nearest to the viewport's center first
+        attrs['area'] = (
+            (attrs['south'] + attrs['north']) / 2,
+            (attrs['west'] + attrs['east']) / 2,
+            (attrs['south'], attrs['west'], attrs['north'], attrs['east']),
+            None,
+        )
+        return attrs
+    
+class PropertyImageSerializer(serializers.ModelSerializer):
+    """Gallery photo with storage URLs; only caption and is_primary are writable"""
+    
+    image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PropertyImage
+        fields = (
+            'id', 'image', 'thumbnail', 'width', 'height', 'caption',
+            'is_primary', 'display_order', 'created_at'
+        )
+        read_only_fields = ('width', 'height', 'display_order', 'created_at')
+    
+    def get_image(self, obj):
+        return obj.image.url
+    
+    def get_thumbnail(self, obj):
+        return default_storage.url(obj.thumbnail)
+    
+    def validate_is_primary(self, value):
+        if not value:
+            raise serializers.ValidationError("Mark another image as primary instead")
+        return value
+    
+class PropertyImageUploadSerializer(serializers.Serializer):
+    """Validates streamed gallery uploads from their headers only"""
+    
+    images = serializers.ListField(
+        child=serializers.FileField(),
+        allow_empty=False,
+        error_messages={
+            # Oversized uploads are dropped by core.uploads.HashingUploadHandler
+            'required': "No image was uploaded, or every file exceeds the upload size limit.",
+            'empty': "No image was uploaded, or every file exceeds the upload size limit.",
+        },
+    )
+    
+    def validate_images(self, value):
+        if len(value) > settings.PROPERTY_IMAGE_MAX_FILES:
+            raise serializers.ValidationError(
+                f"Upload at most {settings.PROPERTY_IMAGE_MAX_FILES} images at once"
+            )
+        uploads = []
+        for upload in value:
+            if not hasattr(upload, 'sha256'):
+                raise serializers.ValidationError(f"{upload.name} could not be processed")
+            info = inspect_image(upload)
+            if info is None or info[0] not in IMAGE_FORMATS:
+                raise serializers.ValidationError(f"{upload.name} is not a JPEG, PNG, WebP or GIF image")
+            image_format, width, height = info
+            if width * height > settings.PROPERTY_IMAGE_MAX_PIXELS:
+                raise serializers.ValidationError(f"{upload.name} dimensions are too large")
+            uploads.append((upload, image_format))
+        return uploads
+    
+class PropertyImageOrderSerializer(serializers.Serializer):
+    """The complete gallery as image ids in their new display order"""
+    
+    order = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    
+    def validate_order(self, value):
+        gallery = set(self.context['property'].images.values_list('id', flat=True))
+        if len(value) != len(set(value)) or set(value) != gallery:
+            raise serializers.ValidationError("List every image of the property exactly once")
+        return value
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.properties.availability import rebuild_range
+from apps.properties.indexing import schedule_reindex
+from apps.properties.models import Address, Amenity, BlockedDate, Property, PropertyAvailability
+
+
+@receiver(pre_save, sender=BlockedDate)
+def remember_blocked_range(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_range = (
+            BlockedDate.objects.filter(pk=instance.pk)
+            .values_list('property_id', 'start_date', 'end_date')
+            .first()
+        )
+
+
+@receiver(post_save, sender=BlockedDate)
+@receiver(post_delete, sender=BlockedDate)
+def blocked_date_changed(sender, instance, **kwargs):
+    # Dates may have moved or been released, so recompute instead of setting bits
+    ranges = [(instance.property_id, instance.start_date, instance.end_date)]
+    previous = getattr(instance, '_previous_range', None)
+    if previous and previous != ranges[0]:
+        ranges.append(previous)
+    for property_id, start, end in ranges:
+        rebuild_range(property_id, start, end + timedelta(days=1))
+
+
+@receiver(pre_save, sender=PropertyAvailability)
+def remember_availability(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_day = (
+            PropertyAvailability.objects.filter(pk=instance.pk)
+            .values_list('property_id', 'date', 'is_available')
+            .first()
+        )
+
+
+@receiver(post_save, sender=PropertyAvailability)
+@receiver(post_delete, sender=PropertyAvailability)
+def availability_changed(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, '_previous_day', None)
+    current = (instance.property_id, instance.date, instance.is_available)
+    # Price-only edits and new open days leave the bitmap untouched
+    if previous == current or (created and instance.is_available):
+        return
+    days = {current[:2]}
+    if previous:
+        days.add(previous[:2])
+    for property_id, day in days:
+        rebuild_range(property_id, day, day + timedelta(days=1))
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, **kwargs):
+    schedule_reindex(instance.pk)
+
+
+@receiver(post_save, sender=Address)
+def address_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_reindex(*Property.objects.filter(address=instance).values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def property_amenities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            schedule_reindex(instance.pk)
+        return
+    if action == 'pre_clear':
+        # clear() does not report which properties lose the amenity
+        pk_set = instance.properties.values_list('pk', flat=True)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    schedule_reindex(*pk_set)
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(pre_delete, sender=Amenity)
+def amenity_changed(sender, instance, **kwargs):
+    schedule_reindex(*instance.properties.values_list('pk', flat=True))
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from apps.properties.indexing import index_properties
+
+
+@shared_task(ignore_result=True)
+def reindex_properties(property_ids):
+    index_properties(property_ids)
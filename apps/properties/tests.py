@@ -1,3 +1,336 @@
+import io
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.properties import availability, geohash
+from apps.properties.indexing import index_properties
+from apps.properties.models import (
+    Address, Amenity, BlockedDate, Property, PropertyAvailability, PropertyCalendar,
+    PropertyImage, PropertySearchDocument,
+)
+
+User = get_user_model()
+
+CENTER = (21.03, 105.85)
+
+
+class PropertyFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        self.host = User.objects.create_user(email='host@test.local', username='host', password='x')
+        self.client = APIClient()
+
+    def make_property(self, latitude, longitude, slug, **fields):
+        address = Address.objects.create(
+            street_address='1 Test St', city='Hanoi', country='VN',
+            latitude=latitude, longitude=longitude,
+        )
+        return Property.objects.create(
+            host=self.host, address=address, title=f'Stay {slug}', slug=slug,
+            property_type='house', base_price_per_night=Decimal('100'), status='active',
+            max_guests=4, **fields
+        )
+
+
+class GeohashTests(TestCase):
+    def test_bounds_contain_the_encoded_point(self):
+        for latitude, longitude in (CENTER, (-33.86, 151.2), (64.1, -21.9)):
+            for precision in (1, 5, 9):
+                south, west, north, east = geohash.bounds(geohash.encode(latitude, longitude, precision))
+                self.assertTrue(south <= latitude <= north and west <= longitude <= east)
+
+    def test_farthest_point_of_a_box_is_a_corner(self):
+        box = (21.0, 105.8, 21.1, 105.9)
+        farthest = geohash.farthest_km(*CENTER, *box)
+        for step in range(11):
+            latitude = box[0] + (box[2] - box[0]) * step / 10
+            for longitude in (box[1], box[3]):
+                self.assertLessEqual(geohash.haversine_km(*CENTER, latitude, longitude), farthest + 1e-9)
+
+
+class GeoSearchTests(PropertyFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # A spiral of stays from a few hundred metres to ~30 km out
+        self.properties = [
+            self.make_property(
+                CENTER[0] + 0.01 * n * (-1) ** n, CENTER[1] + 0.0125 * n * (-1) ** (n // 2),
+                f'stay-{n}',
+            )
+            for n in range(1, 25)
+        ]
+        index_properties([prop.pk for prop in self.properties])
+
+    def expected(self, radius_km):
+        ranked = sorted(
+            (geohash.haversine_km(*CENTER, prop.address.latitude, prop.address.longitude), prop.pk)
+            for prop in self.properties
+        )
+        return [pk for distance, pk in ranked if distance <= radius_km]
+
+    def page_through(self, url, params):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(url, {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            cursor = response.data['next']
+            if not cursor:
+                return seen
+
+    def test_nearby_pages_are_ordered_and_complete(self):
+        params = {'lat': CENTER[0], 'lng': CENTER[1], 'radius_km': 20, 'limit': 4}
+        found = self.page_through('/api/properties/search/nearby/', params)
+        self.assertEqual(found, self.expected(20))
+        self.assertLess(len(found), len(self.properties))
+
+    def test_viewport_pages_nearest_to_the_center_first(self):
+        params = {'south': 20.7, 'north': 21.36, 'west': 105.5, 'east': 106.2, 'limit': 5}
+        found = self.page_through('/api/properties/search/viewport/', params)
+        self.assertEqual(found, self.expected(float('inf')))
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get('/api/properties/search/nearby/', {
+            'lat': CENTER[0], 'lng': CENTER[1], 'cursor': 'not-a-cursor',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityTests(PropertyFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = self.make_property(*CENTER, 'calendar')
+
+    def calendar(self, year=2030):
+        return PropertyCalendar.objects.get(property=self.prop, year=year)
+
+    def test_year_masks_split_at_new_year(self):
+        masks = availability.year_masks(date(2029, 12, 30), date(2030, 1, 2))
+        self.assertEqual(masks, {2029: 0b11 << 363, 2030: 0b1})
+
+    def test_checkout_night_stays_free(self):
+        availability.block_range(self.prop.pk, date(2030, 3, 10), date(2030, 3, 13))
+        for check_in, check_out, free in (
+            (date(2030, 3, 8), date(2030, 3, 10), True),
+            (date(2030, 3, 9), date(2030, 3, 11), False),
+            (date(2030, 3, 12), date(2030, 3, 14), False),
+            (date(2030, 3, 13), date(2030, 3, 15), True),
+        ):
+            with self.subTest(check_in=check_in):
+                self.assertEqual(availability.is_range_free(self.prop.pk, check_in, check_out), free)
+        self.assertEqual(
+            availability.unavailable_ranges(self.calendar()), [(date(2030, 3, 10), date(2030, 3, 12))]
+        )
+
+    def test_many_properties_in_one_query(self):
+        other = self.make_property(*CENTER, 'other')
+        availability.block_range(other.pk, date(2029, 12, 31), date(2030, 1, 2))
+        with self.assertNumQueries(1):
+            free = availability.available_property_ids(
+                [self.prop.pk, other.pk], date(2029, 12, 30), date(2030, 1, 3)
+            )
+        self.assertEqual(free, [self.prop.pk])
+
+    def test_blocking_reuses_the_year_row(self):
+        availability.block_range(self.prop.pk, date(2030, 1, 1), date(2030, 1, 2))
+        availability.block_range(self.prop.pk, date(2030, 1, 5), date(2030, 1, 6))
+        self.assertEqual(PropertyCalendar.objects.filter(property=self.prop).count(), 1)
+        self.assertEqual(availability.to_int(self.calendar().unavailable), 0b10001)
+
+    def test_blocked_dates_follow_edits_and_deletes(self):
+        block = BlockedDate.objects.create(
+            property=self.prop, start_date=date(2030, 5, 1), end_date=date(2030, 5, 2)
+        )
+        self.assertEqual(availability.unavailable_ranges(self.calendar()), [(date(2030, 5, 1), date(2030, 5, 2))])
+
+        block.start_date, block.end_date = date(2030, 6, 1), date(2030, 6, 1)
+        block.save()
+        self.assertEqual(availability.unavailable_ranges(self.calendar()), [(date(2030, 6, 1), date(2030, 6, 1))])
+
+        block.delete()
+        self.assertEqual(availability.unavailable_ranges(self.calendar()), [])
+
+    def test_closed_nights(self):
+        night = PropertyAvailability.objects.create(
+            property=self.prop, date=date(2030, 7, 4), is_available=False
+        )
+        self.assertFalse(availability.is_range_free(self.prop.pk, date(2030, 7, 4), date(2030, 7, 5)))
+
+        night.price_override = Decimal('80')
+        with self.assertNumQueries(2):
+            # Loading the previous row and the update; the bitmap is left alone
+            night.save()
+
+        night.is_available = True
+        night.save()
+        self.assertTrue(availability.is_range_free(self.prop.pk, date(2030, 7, 4), date(2030, 7, 5)))
+
+
+class IndexingTests(PropertyFixtureMixin, TestCase):
+    def document(self, prop):
+        return PropertySearchDocument.objects.filter(property=prop).first()
+
+    def create(self, slug='indexed', **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.make_property(*CENTER, slug, **fields)
+
+    def test_documents_are_written_only_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            prop = self.make_property(*CENTER, 'pending')
+        self.assertIsNone(self.document(prop))
+        for callback in callbacks:
+            callback()
+        document = self.document(prop)
+        self.assertEqual((document.title, document.city_key), ('Stay pending', 'hanoi'))
+
+    def test_edits_to_the_property_and_its_address(self):
+        prop = self.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.base_price_per_night = Decimal('150')
+            prop.save()
+            prop.address.city = 'Da Nang'
+            prop.address.save()
+        document = self.document(prop)
+        self.assertEqual((document.base_price_per_night, document.city_key), (Decimal('150'), 'da nang'))
+
+    def test_amenity_mask_follows_links_and_deactivation(self):
+        prop = self.create()
+        wifi, pool = Amenity.objects.create(name='Wifi'), Amenity.objects.create(name='Pool')
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.amenities.add(wifi, pool)
+        self.assertEqual(self.document(prop).amenity_mask, (1 << wifi.bit) | (1 << pool.bit))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pool.is_active = False
+            pool.save()
+        self.assertEqual(self.document(prop).amenity_mask, 1 << wifi.bit)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            wifi.properties.clear()
+        self.assertEqual(self.document(prop).amenity_mask, 0)
+
+    def test_inactive_properties_leave_the_index(self):
+        prop = self.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.status = 'inactive'
+            prop.save()
+        self.assertIsNone(self.document(prop))
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        amenity = Amenity.objects.create(name='Wifi')
+        properties = [self.make_property(*CENTER, f'batch-{i}') for i in range(4)]
+        for prop in properties:
+            prop.amenities.add(amenity)
+        # Both runs then replace existing documents
+        index_properties([prop.pk for prop in properties])
+        with CaptureQueriesContext(connection) as one:
+            index_properties([properties[0].pk])
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(index_properties([prop.pk for prop in properties]), 4)
+        self.assertEqual(len(one), len(many))
+
+
+def noise_image(seed, image_format='PNG', brighten=0):
+    """An upload whose difference hash differs from other seeds"""
+    rnd = random.Random(seed)
+    image = Image.new('L', (9, 8))
+    image.putdata([min(rnd.randrange(200) + brighten, 255) for _ in range(72)])
+    buffer = io.BytesIO()
+    image.resize((360, 320), Image.NEAREST).convert('RGB').save(buffer, image_format)
+    buffer.seek(0)
+    buffer.name = f'photo-{seed}.{image_format.lower()}'
+    return buffer
+
+
+class PropertyImageTests(PropertyFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = self.make_property(*CENTER, 'gallery')
+        self.client.force_authenticate(self.host)
+        self.url = f'/api/properties/{self.prop.pk}/images/'
+
+    def upload(self, *files):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'images': list(files)}, format='multipart')
+
+    def gallery(self):
+        return list(PropertyImage.objects.filter(property=self.prop))
+
+    def test_batch_is_stored_in_order_with_thumbnails(self):
+        response = self.upload(noise_image(1), noise_image(2), noise_image(3))
+        self.assertEqual(response.status_code, 201)
+        gallery = self.gallery()
+        self.assertEqual([image.display_order for image in gallery], [0, 1, 2])
+        self.assertEqual([image.is_primary for image in gallery], [True, False, False])
+        self.assertEqual((gallery[0].width, gallery[0].height), (360, 320))
+        with default_storage.open(gallery[0].thumbnail) as f, Image.open(f) as thumbnail:
+            self.assertEqual(thumbnail.format, 'WEBP')
+            self.assertLessEqual(thumbnail.width, 480)
+        document = PropertySearchDocument.objects.get(property=self.prop)
+        self.assertEqual(document.primary_thumbnail, gallery[0].thumbnail)
+
+        self.upload(noise_image(4))
+        self.assertEqual([(image.display_order, image.is_primary) for image in self.gallery()][-1], (3, False))
+
+    def test_exact_and_near_duplicates_are_skipped(self):
+        self.upload(noise_image(1))
+        original = self.gallery()[0]
+        response = self.upload(
+            noise_image(1, 'JPEG', brighten=20), noise_image(2), noise_image(2), noise_image(1),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['duplicates'], [
+            {'name': 'photo-2.png', 'duplicate_of': None},
+            {'name': 'photo-1.jpeg', 'duplicate_of': original.pk},
+            {'name': 'photo-1.png', 'duplicate_of': original.pk},
+        ])
+        self.assertEqual(len(self.gallery()), 2)
+
+        response = self.upload(noise_image(2))
+        self.assertEqual((response.status_code, response.data['created']), (200, []))
+
+    def test_rejected_uploads(self):
+        text = io.BytesIO(b'not an image')
+        text.name = 'notes.png'
+        self.assertEqual(self.upload(noise_image(1), text).status_code, 400)
+        with self.settings(PROPERTY_IMAGE_MAX_FILES=1):
+            self.assertEqual(self.upload(noise_image(1), noise_image(2)).status_code, 400)
+        self.assertEqual(self.gallery(), [])
+
+        self.client.force_authenticate(User.objects.create_user(
+            email='guest@test.local', username='guest', password='x'
+        ))
+        self.assertEqual(self.upload(noise_image(1)).status_code, 404)
+
+    def test_reorder_the_whole_gallery(self):
+        self.upload(noise_image(1), noise_image(2), noise_image(3))
+        ids = [image.pk for image in self.gallery()]
+        # Property, gallery ids to validate, one UPDATE, the reordered gallery
+        with self.assertNumQueries(4):
+            response = self.client.post(f'{self.url}order/', {'order': ids[::-1]}, format='json')
+        self.assertEqual([image['id'] for image in response.data], ids[::-1])
+        self.assertEqual(
+            self.client.post(f'{self.url}order/', {'order': ids[:2]}, format='json').status_code, 400
+        )
+
+    def test_primary_changes_and_deletion(self):
+        self.upload(noise_image(1), noise_image(2), noise_image(3))
+        first, second, third = self.gallery()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'{self.url}{third.pk}/', {'is_primary': True}, format='json')
+        self.assertEqual([image.pk for image in self.gallery() if image.is_primary], [third.pk])
+        document = PropertySearchDocument.objects.get(property=self.prop)
+        self.assertEqual(document.primary_thumbnail, third.thumbnail)
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'{self.url}{third.pk}/').status_code, 204)
+        self.assertEqual([image.pk for image in self.gallery() if image.is_primary], [first.pk])
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from apps.properties.views import (
+    NearbyPropertySearchView,
+    PropertyImageDetailView,
+    PropertyImageListView,
+    PropertyImageOrderView,
+    ViewportPropertySearchView,
+)
+
+app_name = 'properties'
+
+urlpatterns = [
+    # Search endpoints
+    path('search/nearby/', NearbyPropertySearchView.as_view(), name='search_nearby'),
+    path('search/viewport/', ViewportPropertySearchView.as_view(), name='search_viewport'),
+    
+    # Gallery endpoints
+    path('<int:property_pk>/images/', PropertyImageListView.as_view(), name='image_list'),
+    path('<int:property_pk>/images/order/', PropertyImageOrderView.as_view(), name='image_order'),
+    path('<int:property_pk>/images/<int:pk>/', PropertyImageDetailView.as_view(), name='image_detail'),
+]
@@ -1,3 +1,130 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.views import Response
 
-# Create your views here.
+from apps.bookings.pricing import quote_many
+from apps.properties import images
+from apps.properties.models import Property, PropertyImage, PropertySearchDocument
+from apps.properties.search import InvalidCursor, filter_documents, search_properties
+from apps.properties.serializers import (
+    NearbySearchSerializer,
+    PropertyImageOrderSerializer,
+    PropertyImageSerializer,
+    PropertyImageUploadSerializer,
+    PropertySearchSerializer,
+    ViewportSearchSerializer,
+)
+from core.uploads import HashingUploadHandler
+
+
+class PropertySearchView(generics.GenericAPIView):
+    """
+    Base for geo search endpoints ordered by distance with keyset cursors.
+    Subclasses set ``params_serializer_class``, whose validated data
+    carries the search ``area``.
+    """
+    serializer_class = PropertySearchSerializer
+    permission_classes = [permissions.AllowAny]
+    params_serializer_class = None
+    
+    def get_queryset(self):
+        return PropertySearchDocument.objects.all()
+    
+    def get(self, request, *args, **kwargs):
+        params_serializer = self.params_serializer_class(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        params = params_serializer.validated_data
+        
+        latitude, longitude, bbox, radius_km = params['area']
+        dates = (params['check_in'], params['check_out']) if params.get('check_in') else None
+        try:
+            page, next_cursor = search_properties(
+                filter_documents(self.get_queryset(), params), latitude, longitude, bbox,
+                radius_km=radius_km, cursor=params.get('cursor'),
+                limit=params['limit'], dates=dates,
+            )
+        except InvalidCursor:
+            raise ValidationError({'cursor': 'Invalid cursor'})
+        
+        context = self.get_serializer_context()
+        if dates:
+            context['quotes'] = quote_many(page, *dates)
+        return Response({
+            'next': next_cursor,
+            'results': self.get_serializer(page, many=True, context=context).data,
+        })
+    
+class NearbyPropertySearchView(PropertySearchView):
+    """Properties within radius_km of (lat, lng), nearest first"""
+    params_serializer_class = NearbySearchSerializer
+    
+class ViewportPropertySearchView(PropertySearchView):
+    """Properties inside a map viewport, nearest to its center first"""
+    params_serializer_class = ViewportSearchSerializer
+    
+class HostPropertyMixin:
+    """Resolves the ``property_pk`` URL argument to a property of the current user"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_property(self):
+        return get_object_or_404(Property, pk=self.kwargs['property_pk'], host_id=self.request.user.pk)
+    
+class PropertyImageListView(HostPropertyMixin, generics.GenericAPIView):
+    """List a property's gallery, or add several images to it in one request"""
+    serializer_class = PropertyImageSerializer
+    
+    def get_parsers(self):
+        if self.request.method == 'POST':
+            return [MultiPartParser()]
+        return super().get_parsers()
+    
+    def get(self, request, *args, **kwargs):
+        gallery = self.get_property().images.all()
+        return Response(self.get_serializer(gallery, many=True).data)
+    
+    def post(self, request, *args, **kwargs):
+        prop = self.get_property()
+        # Must be set before request.data is first read
+        request.upload_handlers = [
+            HashingUploadHandler(request, max_bytes=settings.PROPERTY_IMAGE_MAX_UPLOAD_BYTES)
+        ]
+        upload_serializer = PropertyImageUploadSerializer(data=request.data)
+        upload_serializer.is_valid(raise_exception=True)
+        created, skipped = images.add_images(prop.pk, upload_serializer.validated_data['images'])
+        return Response({
+            'created': self.get_serializer(created, many=True).data,
+            'duplicates': [{'name': name, 'duplicate_of': pk} for name, pk in skipped],
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+class PropertyImageOrderView(HostPropertyMixin, generics.GenericAPIView):
+    """Reorder the whole gallery with a single UPDATE"""
+    serializer_class = PropertyImageOrderSerializer
+    
+    def post(self, request, *args, **kwargs):
+        prop = self.get_property()
+        serializer = self.get_serializer(data=request.data, context={'property': prop})
+        serializer.is_valid(raise_exception=True)
+        images.reorder(prop.pk, serializer.validated_data['order'])
+        return Response(PropertyImageSerializer(prop.images.all(), many=True).data)
+    
+class PropertyImageDetailView(HostPropertyMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Edit the caption, make an image the primary one, or delete it"""
+    serializer_class = PropertyImageSerializer
+    http_method_names = ['get', 'patch', 'delete', 'head', 'options']
+    
+    def get_queryset(self):
+        return PropertyImage.objects.filter(
+            property_id=self.kwargs['property_pk'], property__host_id=self.request.user.pk
+        )
+    
+    def perform_update(self, serializer):
+        make_primary = serializer.validated_data.pop('is_primary', False)
+        image = serializer.save()
+        if make_primary and not image.is_primary:
+            images.set_primary(image)
+    
+    def perform_destroy(self, instance):
+        images.delete_image(instance)
@@ -1,3 +1,44 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.reviews.models import PropertyRatingRollup, Review, UserRatingRollup
+from apps.reviews.services import moderate_review
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'property', 'reviewer', 'reviewee', 'review_type',
+        'overall_rating', 'moderation_status', 'is_public', 'created_at'
+    ]
+    list_filter = ['review_type', 'moderation_status', 'is_public']
+    search_fields = ['reviewer__email', 'reviewee__email', 'property__title']
+    raw_id_fields = ['booking', 'reviewer', 'reviewee', 'property', 'moderated_by']
+    actions = ['approve', 'reject']
+
+    def _moderate(self, request, queryset, moderation_status):
+        # One save per review so the rollups see every change
+        for review in queryset:
+            moderate_review(review, moderation_status, request.user.pk)
+
+    @admin.action(description="Approve selected reviews")
+    def approve(self, request, queryset):
+        self._moderate(request, queryset, 'approved')
+
+    @admin.action(description="Reject selected reviews")
+    def reject(self, request, queryset):
+        self._moderate(request, queryset, 'rejected')
+
+
+class RatingRollupAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'review_count', 'rating_average', 'updated_at']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Rebuilt by rebuild_rating_rollups, never edited by hand
+        return [field.name for field in self.model._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(PropertyRatingRollup, RatingRollupAdmin)
+admin.site.register(UserRatingRollup, RatingRollupAdmin)
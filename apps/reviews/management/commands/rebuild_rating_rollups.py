@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.properties.indexing import schedule_reindex
+from apps.reviews import rollups
+from apps.reviews.models import PropertyRatingRollup, Review, UserRatingRollup
+
+ROLLUP_MODELS = (PropertyRatingRollup, UserRatingRollup)
+
+
+def expected_rollups(batch_size):
+    """Rollups recomputed from every counted review, keyed by model"""
+    expected = {model: {} for model in ROLLUP_MODELS}
+    reviews = Review.objects.filter(is_public=True, moderation_status='approved').only(
+        'review_type', 'reviewee', 'property', 'overall_rating', 'ratings',
+        'is_public', 'moderation_status',
+    ).order_by()
+    for review in reviews.iterator(chunk_size=batch_size):
+        overall_rating, ratings = rollups.contribution(review)
+        for model, pk in rollups.targets(review):
+            if pk not in expected[model]:
+                expected[model][pk] = model(pk=pk)
+            expected[model][pk].add(overall_rating, ratings)
+    return expected
+
+
+class Command(BaseCommand):
+    help = "Recompute property and user rating rollups from the reviews table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Report rollups that disagree with the reviews, without fixing them',
+        )
+
+    def handle(self, *args, **options):
+        expected = expected_rollups(options['batch_size'])
+        drifted = 0
+        for model in ROLLUP_MODELS:
+            stale = self.compare(model, expected[model])
+            drifted += len(stale)
+            if stale and not options['verify']:
+                self.rewrite(model, stale, expected[model])
+
+        if options['verify'] and drifted:
+            raise CommandError(f'{drifted} rating rollups are out of date.')
+        verb = 'Found' if options['verify'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {drifted} out of date rating rollups.'))
+
+    def compare(self, model, expected):
+        """Primary keys whose stored rollup differs from ``expected``"""
+        stale = set()
+        stored = model.objects.all()
+        for rollup in stored.iterator():
+            target = expected.get(rollup.pk) or model(pk=rollup.pk)
+            if not rollup.same_totals(target):
+                stale.add(rollup.pk)
+        stored_ids = set(stored.values_list('pk', flat=True))
+        stale.update(pk for pk in expected if pk not in stored_ids)
+        for pk in sorted(stale):
+            self.stdout.write(f'{model._meta.db_table} {pk} is out of date')
+        return stale
+
+    @transaction.atomic
+    def rewrite(self, model, stale, expected):
+        model.objects.filter(pk__in=stale).delete()
+        model.objects.bulk_create([expected[pk] for pk in stale if pk in expected])
+        if model is PropertyRatingRollup:
+            schedule_reindex(*stale)
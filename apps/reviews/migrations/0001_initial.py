@@ -0,0 +1,124 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bookings', '0003_guest_created_index'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('properties', '0005_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyRatingRollup',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_average', models.DecimalField(decimal_places=2, max_digits=3, null=True)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('category_sums', models.JSONField(default=dict)),
+                ('category_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_rollup', serialize=False, to='properties.property')),
+            ],
+            options={
+                'db_table': 'property_rating_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_type', models.CharField(choices=[('guest_to_host', 'Guest to host'), ('host_to_guest', 'Host to guest'), ('guest_to_property', 'Guest to property')], max_length=20)),
+                ('overall_rating', models.PositiveSmallIntegerField()),
+                ('ratings', models.JSONField(blank=True, default=dict)),
+                ('comment', models.TextField(blank=True)),
+                ('is_public', models.BooleanField(default=True)),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('moderation_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('moderated_at', models.DateTimeField(blank=True, null=True)),
+                ('host_response', models.TextField(blank=True)),
+                ('host_response_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='bookings.booking')),
+                ('moderated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviews_moderated', to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='properties.property')),
+                ('reviewee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews_received', to=settings.AUTH_USER_MODEL)),
+                ('reviewer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews_written', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reviews',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRatingRollup',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_average', models.DecimalField(decimal_places=2, max_digits=3, null=True)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('category_sums', models.JSONField(default=dict)),
+                ('category_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_rollup', serialize=False, to='users.user')),
+            ],
+            options={
+                'db_table': 'user_rating_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vote_type', models.CharField(choices=[('helpful', 'Helpful'), ('not_helpful', 'Not helpful')], max_length=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='reviews.review')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'review_votes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reviewvote',
+            index=models.Index(fields=['review', 'vote_type'], name='idx_review_votes_helpful'),
+        ),
+        migrations.AddConstraint(
+            model_name='reviewvote',
+            constraint=models.UniqueConstraint(fields=('review', 'user'), name='uk_review_vote_user'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['property', 'overall_rating'], name='idx_reviews_property_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewee', 'review_type'], name='idx_reviews_user_type'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(check=models.Q(('overall_rating__gte', 1), ('overall_rating__lte', 5)), name='chk_valid_rating_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('booking', 'reviewer', 'review_type'), name='uk_review_booking_reviewer'),
+        ),
+    ]
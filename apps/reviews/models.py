@@ -1,3 +1,197 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+
+from apps.bookings.models import Booking
+from apps.properties.models import Property
+
+
+class Review(models.Model):
+    REVIEW_TYPE_CHOICES = [
+        ("guest_to_host", "Guest to host"),
+        ("host_to_guest", "Host to guest"),
+        ("guest_to_property", "Guest to property"),
+    ]
+    MODERATION_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("approved", "Approved"),
+        ("rejected", "Rejected"),
+    ]
+    # Keys expected in ``ratings``; each holds a 1-5 score
+    RATING_CATEGORIES = (
+        "cleanliness", "accuracy", "communication", "location", "check_in", "value"
+    )
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='reviews')
+    reviewer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_written'
+    )
+    reviewee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_received'
+    )
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='reviews')
+    review_type = models.CharField(max_length=20, choices=REVIEW_TYPE_CHOICES)
+    overall_rating = models.PositiveSmallIntegerField()
+    ratings = models.JSONField(default=dict, blank=True)
+    comment = models.TextField(blank=True)
+    is_public = models.BooleanField(default=True)
+    is_anonymous = models.BooleanField(default=False)
+
+    moderation_status = models.CharField(
+        max_length=10, choices=MODERATION_STATUS_CHOICES, default="pending"
+    )
+    moderated_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='reviews_moderated',
+    )
+    moderated_at = models.DateTimeField(blank=True, null=True)
+    host_response = models.TextField(blank=True)
+    host_response_date = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'reviews'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['property', 'overall_rating'], name='idx_reviews_property_rating'),
+            models.Index(fields=['reviewee', 'review_type'], name='idx_reviews_user_type'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(overall_rating__gte=1, overall_rating__lte=5),
+                name='chk_valid_rating_range',
+            ),
+            models.UniqueConstraint(
+                fields=['booking', 'reviewer', 'review_type'], name='uk_review_booking_reviewer'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.overall_rating}* {self.review_type} by {self.reviewer}"
+
+    def is_counted(self):
+        """Whether the review contributes to the rating rollups"""
+        return self.is_public and self.moderation_status == 'approved'
+
+
+class ReviewVote(models.Model):
+    VOTE_TYPE_CHOICES = [
+        ("helpful", "Helpful"),
+        ("not_helpful", "Not helpful"),
+    ]
+
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='votes')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='review_votes'
+    )
+    vote_type = models.CharField(max_length=12, choices=VOTE_TYPE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'review_votes'
+        indexes = [
+            models.Index(fields=['review', 'vote_type'], name='idx_review_votes_helpful'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['review', 'user'], name='uk_review_vote_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.vote_type} on review {self.review_id}"
+
+
+class RatingRollup(models.Model):
+    """
+    Precomputed rating aggregates, maintained by apps.reviews.rollups.
+
+    ``category_sums``/``category_counts`` are keyed by rating category,
+    since a review may leave some categories unrated.
+    """
+
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, null=True)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    category_sums = models.JSONField(default=dict)
+    category_counts = models.JSONField(default=dict)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    TOTAL_FIELDS = (
+        'review_count', 'rating_sum', 'rating_average', 'rating_1', 'rating_2',
+        'rating_3', 'rating_4', 'rating_5', 'category_sums', 'category_counts',
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def histogram(self):
+        return [self.rating_1, self.rating_2, self.rating_3, self.rating_4, self.rating_5]
+
+    @property
+    def category_averages(self):
+        return {
+            category: round(total / self.category_counts[category], 2)
+            for category, total in self.category_sums.items()
+            if self.category_counts.get(category)
+        }
+
+    def add(self, overall_rating, ratings, sign=1):
+        """Count a review in (``sign=1``) or out (``sign=-1``) of the rollup"""
+        self.review_count += sign
+        self.rating_sum += sign * overall_rating
+        field = f'rating_{overall_rating}'
+        setattr(self, field, getattr(self, field) + sign)
+        for category, score in ratings.items():
+            self.category_sums[category] = self.category_sums.get(category, 0) + sign * score
+            self.category_counts[category] = self.category_counts.get(category, 0) + sign
+            if not self.category_counts[category]:
+                del self.category_sums[category], self.category_counts[category]
+        self.rating_average = (
+            (Decimal(self.rating_sum) / self.review_count).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            ) if self.review_count else None
+        )
+
+    def same_totals(self, other):
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.TOTAL_FIELDS
+        )
+
+
+class PropertyRatingRollup(RatingRollup):
+    """Approved public guest_to_property reviews of a property"""
+
+    property = models.OneToOneField(
+        Property, on_delete=models.CASCADE, primary_key=True, related_name='rating_rollup'
+    )
+
+    class Meta:
+        db_table = 'property_rating_rollups'
+
+    def __str__(self):
+        return f"{self.rating_average} ({self.review_count}) for {self.property_id}"
+
+
+class UserRatingRollup(RatingRollup):
+    """Approved public reviews received by a user, as host or as guest"""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+        related_name='rating_rollup',
+    )
+
+    class Meta:
+        db_table = 'user_rating_rollups'
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.rating_average} ({self.review_count}) for {self.user_id}"
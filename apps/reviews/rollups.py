@@ -0,0 +1,67 @@
+"""
+Rating rollups maintained in the same transaction as the review write.
+
+A review counts once it is public and approved. Every save compares what
+the review contributed before with what it contributes now and moves the
+difference into the affected rollup rows, which are locked in a fixed
+order so concurrent moderation cannot deadlock or lose an update. Rows
+changed through ``QuerySet.update`` bypass this and are repaired by the
+``rebuild_rating_rollups`` command.
+"""
+
+from apps.properties.indexing import schedule_reindex
+from apps.reviews.models import PropertyRatingRollup, Review, UserRatingRollup
+
+
+def contribution(review):
+    """``(overall_rating, ratings)`` counted for ``review``, or None"""
+    if not review.is_counted():
+        return None
+    ratings = {
+        category: score for category, score in (review.ratings or {}).items()
+        if category in Review.RATING_CATEGORIES and isinstance(score, int)
+    }
+    return review.overall_rating, ratings
+
+
+def targets(review):
+    rollups = [(UserRatingRollup, review.reviewee_id)]
+    if review.review_type == 'guest_to_property':
+        rollups.append((PropertyRatingRollup, review.property_id))
+    return rollups
+
+
+def changes(previous, current):
+    """``(model, pk, overall_rating, ratings, sign)`` to move ``previous`` to ``current``"""
+    states = [
+        (review, sign, review is not None and contribution(review))
+        for review, sign in ((previous, -1), (current, 1))
+    ]
+    (old, _, old_counted), (new, _, new_counted) = states
+    if old_counted == new_counted and (not new_counted or targets(old) == targets(new)):
+        return []
+    moves = []
+    for review, sign, counted in states:
+        if counted:
+            moves.extend((model, pk, *counted, sign) for model, pk in targets(review))
+    return moves
+
+
+def apply(moves):
+    # A fixed lock order keeps two reviews of the same host and property from deadlocking
+    moves = sorted(moves, key=lambda move: (move[0]._meta.db_table, move[1], move[4]))
+    touched = {}
+    for model, pk, overall_rating, ratings, sign in moves:
+        if (model, pk) not in touched:
+            if sign > 0:
+                model.objects.get_or_create(pk=pk)
+            # Removals skip missing rows, e.g. a rollup already deleted by a cascade
+            touched[model, pk] = model.objects.select_for_update().filter(pk=pk).first()
+        rollup = touched[model, pk]
+        if rollup is not None:
+            rollup.add(overall_rating, ratings, sign)
+
+    for (model, pk), rollup in touched.items():
+        if rollup is not None:
+            rollup.save()
+    schedule_reindex(*(pk for model, pk in touched if model is PropertyRatingRollup))
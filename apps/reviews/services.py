@@ -0,0 +1,58 @@
+"""
+Review writes. Each runs in one transaction with the rollup updates done
+by apps.reviews.signals, so a rollup never counts a review that was not
+committed.
+"""
+
+import copy
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.reviews.models import Review
+
+
+def reviewee_id(booking, review_type):
+    if review_type == 'host_to_guest':
+        return booking.guest_id
+    return booking.property.host_id
+
+
+@transaction.atomic
+def create_review(booking, reviewer_id, review_type, overall_rating, ratings=None, **fields):
+    return Review.objects.create(
+        booking=booking,
+        reviewer_id=reviewer_id,
+        reviewee_id=reviewee_id(booking, review_type),
+        property_id=booking.property_id,
+        review_type=review_type,
+        overall_rating=overall_rating,
+        ratings=ratings or {},
+        **fields
+    )
+
+
+def lock_review(review):
+    """
+    Reload ``review`` under a row lock, remembering the locked state as the
+    previous state for the rollup signals
+    """
+    review = Review.objects.select_for_update().get(pk=review.pk)
+    review._previous_review = copy.copy(review)
+    return review
+
+
+@transaction.atomic
+def moderate_review(review, moderation_status, moderator_id=None):
+    # Concurrent moderations of one review queue here, so each diffs from the last
+    review = lock_review(review)
+    review.moderation_status = moderation_status
+    review.moderated_by_id = moderator_id
+    review.moderated_at = timezone.now()
+    review.save(update_fields=['moderation_status', 'moderated_by', 'moderated_at', 'updated_at'])
+    return review
+
+
+@transaction.atomic
+def delete_review(review):
+    lock_review(review).delete()
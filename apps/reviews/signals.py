@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.reviews import rollups
+from apps.reviews.models import Review
+
+ROLLUP_FIELDS = (
+    'review_type', 'reviewee_id', 'property_id', 'overall_rating', 'ratings',
+    'is_public', 'moderation_status',
+)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review(sender, instance, **kwargs):
+    if hasattr(instance, '_previous_review'):
+        # Already read under a row lock by apps.reviews.services.lock_review
+        return
+    instance._previous_review = None
+    if instance.pk:
+        values = Review.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+        if values:
+            instance._previous_review = Review(**values)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, **kwargs):
+    rollups.apply(rollups.changes(instance.__dict__.pop('_previous_review', None), instance))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    rollups.apply(rollups.changes(instance, None))
@@ -1,3 +1,83 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-# Create your tests here.
+from apps.bookings.services import create_booking
+from apps.properties.models import Address, Property
+from apps.reviews.models import PropertyRatingRollup, Review, UserRatingRollup
+from apps.reviews.services import create_review, delete_review, moderate_review
+
+User = get_user_model()
+
+
+class ReviewFixtureMixin:
+    def setUp(self):
+        self.host = User.objects.create_user(email='host@test.local', username='host', password='x')
+        self.guest = User.objects.create_user(email='guest@test.local', username='guest', password='x')
+        address = Address.objects.create(
+            street_address='1 Test St', city='Hanoi', country='VN', latitude=21.03, longitude=105.85,
+        )
+        self.property = Property.objects.create(
+            host=self.host, address=address, title='Test stay', slug='stay', property_type='house',
+            base_price_per_night=Decimal('100'), status='active', is_instant_book=True, max_guests=4,
+        )
+        check_in = date.today() + timedelta(days=30)
+        self.booking = create_booking(self.guest.pk, self.property, check_in, check_in + timedelta(days=2))
+
+    def review(self, overall_rating=4, **fields):
+        return create_review(
+            self.booking, self.guest.pk, 'guest_to_property', overall_rating,
+            ratings={'cleanliness': overall_rating, 'unknown': 1}, **fields
+        )
+
+    def rollup(self):
+        return PropertyRatingRollup.objects.filter(pk=self.property.pk).first()
+
+
+class RatingRollupTests(ReviewFixtureMixin, TestCase):
+    def test_only_approved_public_reviews_count(self):
+        review = self.review()
+        self.assertIsNone(self.rollup())
+
+        moderate_review(review, 'approved')
+        rollup = self.rollup()
+        self.assertEqual((rollup.review_count, rollup.rating_average), (1, Decimal('4.00')))
+        self.assertEqual(rollup.category_sums, {'cleanliness': 4})
+        self.assertEqual(UserRatingRollup.objects.get(pk=self.host.pk).review_count, 1)
+
+        moderate_review(review, 'rejected')
+        self.assertEqual(self.rollup().review_count, 0)
+        self.assertIsNone(self.rollup().rating_average)
+
+    def test_moderation_diffs_from_the_stored_row(self):
+        review = self.review()
+        stale = Review.objects.get(pk=review.pk)
+        moderate_review(review, 'approved')
+        # A second moderator still holding the pending copy must not count it twice
+        moderate_review(stale, 'approved')
+        self.assertEqual(self.rollup().review_count, 1)
+
+        moderate_review(stale, 'rejected')
+        self.assertEqual(self.rollup().review_count, 0)
+
+    def test_delete_uses_the_stored_row(self):
+        review = self.review(moderation_status='approved')
+        stale = Review.objects.get(pk=review.pk)
+        moderate_review(review, 'rejected')
+        delete_review(stale)
+        self.assertEqual(self.rollup().review_count, 0)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.review(moderation_status='approved')
+        PropertyRatingRollup.objects.filter(pk=self.property.pk).update(review_count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rating_rollups', verify=True, stdout=io.StringIO())
+
+        call_command('rebuild_rating_rollups', stdout=io.StringIO())
+        self.assertEqual(self.rollup().review_count, 1)
+        call_command('rebuild_rating_rollups', verify=True, stdout=io.StringIO())
+
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.cache import claims_changed_at, get_cached_user
+
+User = get_user_model()
+
+
+class ClaimsUser(TokenUser):
+    """Lightweight user built from the claims set in CustomTokenObtainPairSerializer"""
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def user_type(self):
+        return self.token.get('user_type', 'guest')
+
+    @cached_property
+    def is_verified(self):
+        return self.token.get('is_verified', False)
+
+    def can_host(self):
+        """Check if user can create property listings"""
+        return self.user_type in ['host', 'admin']
+
+    @cached_property
+    def instance(self):
+        """Full User model, loaded only when a view actually needs it"""
+        try:
+            return get_cached_user(self.id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+
+def get_user_instance(user):
+    """Return a full User for either a ClaimsUser or a model instance"""
+    if isinstance(user, ClaimsUser):
+        return user.instance
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token claims instead of loading the
+    users row on every request. When the user changed after the token was
+    issued, the full user is read through the cache instead.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        changed_at = claims_changed_at(user_id)
+        if changed_at is None or validated_token.get('iat', 0) > changed_at:
+            return ClaimsUser(validated_token)
+
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
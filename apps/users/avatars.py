@@ -0,0 +1,56 @@
+"""
+Avatar storage and thumbnails.
+
+The original is stored under its content hash (core.uploads) and WebP
+thumbnails in ``AVATAR_THUMBNAIL_SIZES`` are rendered by a Celery task
+(apps.users.tasks), also under content-hashed names, so every URL can be
+cached forever.
+"""
+
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.uploads import IMAGE_FORMATS, content_name, save_content, webp_name
+
+
+def store_original(upload, image_format):
+    """Save ``upload`` under its content hash; identical files share one copy"""
+    name = content_name('avatars', upload.sha256, IMAGE_FORMATS[image_format])
+    return save_content(name, upload)
+
+
+def render_thumbnails(name):
+    """``{size: storage name}`` of square WebP thumbnails of the stored avatar ``name``"""
+    sizes = sorted(settings.AVATAR_THUMBNAIL_SIZES, reverse=True)
+    with default_storage.open(name) as source, Image.open(source) as image:
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        image.draft('RGB', (sizes[0] * 2, sizes[0] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    thumbnails = {}
+    for size in sizes:
+        image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=settings.AVATAR_THUMBNAIL_QUALITY, method=4)
+        content = buffer.getvalue()
+        thumbnails[str(size)] = save_content(
+            webp_name('avatars/thumbs', content), ContentFile(content)
+        )
+    return thumbnails
+
+
+def thumbnail_urls(user):
+    """``{size: url}``; every size points at the original until its thumbnails exist"""
+    if not user.avatar:
+        return None
+    if not user.avatar_thumbnails:
+        original = user.avatar.url
+        return {str(size): original for size in settings.AVATAR_THUMBNAIL_SIZES}
+    return {
+        size: default_storage.url(name) for size, name in user.avatar_thumbnails.items()
+    }
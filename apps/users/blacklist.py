@@ -0,0 +1,121 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+BLACKLIST_LOG_KEY = 'users:blacklist:log'
+
+
+def blacklist_key(jti):
+    return f'users:blacklist:{jti}'
+
+
+class BloomFilter:
+    """Fixed-size bloom filter using double hashing over a single blake2b digest"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RedisTokenBlacklist:
+    """
+    Revoked JTIs live in the default Redis cache with a TTL equal to the
+    token expiry. Each worker keeps a bloom filter of recent revocations,
+    synced from a Redis sorted set, so lookups for tokens that were never
+    revoked are answered without a network round-trip. Refreshes check
+    strictly, straight against Redis, since the filter trails revocations
+    made on other workers.
+    """
+
+    def __init__(self):
+        self.capacity = getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 100000)
+        self.sync_interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_SECONDS', 1)
+        self.sync_overlap = getattr(settings, 'TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS', 30)
+        self.retention = int(
+            settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()
+        )
+        self._lock = threading.Lock()
+        self._reset()
+
+    @staticmethod
+    def is_available():
+        return hasattr(cache, 'client') and hasattr(cache.client, 'get_client')
+
+    def _redis(self):
+        return cache.client.get_client(write=True)
+
+    def _reset(self):
+        self._bloom = BloomFilter(self.capacity)
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+
+    def _sync(self):
+        now = time.time()
+        if now - self._synced_at < self.sync_interval:
+            return
+
+        with self._lock:
+            # Start over once expired entries make up the bulk of the filter
+            if now - self._rebuilt_at > self.retention / 4:
+                self._reset()
+                self._rebuilt_at = now
+            # Scores come from the revoking host's clock and may land just
+            # before our last sync, so each read overlaps the previous one;
+            # adding a JTI to the filter twice is harmless
+            since = self._synced_at - self.sync_overlap if self._synced_at else 0
+            jtis = self._redis().zrangebyscore(
+                cache.make_key(BLACKLIST_LOG_KEY), since, '+inf'
+            )
+            for jti in jtis:
+                self._bloom.add(jti.decode())
+            # Only advanced once the read succeeded
+            self._synced_at = now
+
+    def add(self, jti, exp):
+        now = time.time()
+        ttl = max(1, int(exp - now))
+        cache.set(blacklist_key(jti), 1, ttl)
+
+        log_key = cache.make_key(BLACKLIST_LOG_KEY)
+        pipe = self._redis().pipeline()
+        pipe.zadd(log_key, {jti: now})
+        pipe.zremrangebyscore(log_key, '-inf', now - self.retention)
+        pipe.execute()
+
+        self._bloom.add(jti)
+
+    def contains(self, jti, strict=False):
+        """
+        Whether ``jti`` is revoked. A bloom miss answers without Redis but may
+        lag revocations on other workers by up to the sync interval;
+        ``strict`` always asks Redis.
+        """
+        if not strict:
+            self._sync()
+            if jti not in self._bloom:
+                return False
+        return cache.get(blacklist_key(jti)) is not None
+
+
+token_blacklist = RedisTokenBlacklist()
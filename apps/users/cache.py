@@ -0,0 +1,130 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.metrics import record_cache
+
+USER_CACHE_TIMEOUT = 60 * 15
+PROFILE_CACHE_TIMEOUT = 60 * 60
+CLAIM_FIELDS = (
+    'email', 'user_type', 'is_verified', 'is_staff', 'is_active', 'password'
+)
+
+
+def user_cache_key(user_id):
+    return f'users:instance:{user_id}'
+
+
+def profile_cache_key(user_id):
+    return f'users:profile:{user_id}'
+
+
+def profile_version_key(user_id):
+    return f'users:profile_version:{user_id}'
+
+
+def claims_changed_key(user_id):
+    return f'users:claims_changed:{user_id}'
+
+
+def _concrete_field_names(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def get_cached_user(user_id):
+    """Return the full User for ``user_id``, reading through the default cache.
+
+    Raises ``User.DoesNotExist`` when the row is gone.
+    """
+    User = get_user_model()
+    payload = cache.get(user_cache_key(user_id))
+    record_cache(payload is not None)
+    if payload is not None:
+        user = next(serializers.deserialize('json', payload)).object
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
+
+    user = User.objects.get(pk=user_id)
+    cache_user(user)
+    return user
+
+
+def cache_user(user):
+    payload = serializers.serialize(
+        'json', [user], fields=_concrete_field_names(type(user))
+    )
+    cache.set(user_cache_key(user.pk), payload, USER_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def mark_claims_changed(user_id):
+    """Flag tokens issued before now as carrying stale claims for this user."""
+    lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME']
+    cache.set(
+        claims_changed_key(user_id),
+        int(time.time()),
+        int(lifetime.total_seconds()),
+    )
+
+
+def claims_changed_at(user_id):
+    return cache.get(claims_changed_key(user_id))
+
+
+def _store_profile(user, version):
+    from apps.users.serializers import UserProfileSerializer
+
+    data = UserProfileSerializer(user).data
+    body = json.dumps(data, cls=DjangoJSONEncoder)
+    entry = {
+        'version': version,
+        'etag': '"%s"' % hashlib.md5(body.encode()).hexdigest(),
+        'data': json.loads(body),
+    }
+    cache.set(profile_cache_key(user.pk), entry, PROFILE_CACHE_TIMEOUT)
+    return entry
+
+
+def get_profile(user_id):
+    """Return ``{'version', 'etag', 'data'}`` for the user's rendered profile.
+
+    An entry only counts as a hit when its version matches the current
+    version key, so a reader that raced a write can never put stale data back.
+    """
+    keys = [profile_cache_key(user_id), profile_version_key(user_id)]
+    found = cache.get_many(keys)
+    version = found.get(keys[1], 0)
+    entry = found.get(keys[0])
+    hit = entry is not None and entry['version'] == version
+    record_cache(hit)
+    if hit:
+        return entry
+    return _store_profile(get_cached_user(user_id), version)
+
+
+def refresh_profile(user):
+    """Bump the profile version and write the new rendering through"""
+    key = profile_version_key(user.pk)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+    return _store_profile(user, version)
+
+
+def invalidate_profile(user_id):
+    cache.delete_many([profile_cache_key(user_id), profile_version_key(user_id)])
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many authentication requests, please retry shortly.'
+    default_code = 'hashing_unavailable'
+    # Picked up by DRF's exception handler as a Retry-After header
+    wait = 1
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing. PBKDF2 in hashlib releases
+    the GIL, so hashing runs in parallel while request threads only wait.
+    Work beyond ``max_queue`` in-flight jobs is rejected immediately.
+
+    The bound is per process and only matters when a process serves several
+    requests at once: gunicorn runs threaded (gthread) workers for this
+    (config/gunicorn.conf.py), and ``max_queue`` below the thread count keeps
+    threads free for other endpoints during a login burst. Under
+    config/asgi.py, Django 3.2 runs every sync view on one shared thread, so
+    HTTP traffic should be served by gunicorn rather than ASGI.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self):
+        # Created lazily so each forked worker gets its own threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='hashing'
+            )
+        return self._executor
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_ms': round(self.total_seconds * 1000 / self.completed, 3)
+                if self.completed else 0.0,
+            }
+
+    def _timed(self, fn, *args):
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self.total_seconds += time.monotonic() - started
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHashingUnavailable()
+            self._pending += 1
+            executor = self._get_executor()
+
+        future = executor.submit(self._timed, fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordHashingUnavailable()
+
+
+hashing_pool = HashingPool(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    max_queue=settings.PASSWORD_HASHING_QUEUE,
+    timeout=settings.PASSWORD_HASHING_TIMEOUT,
+)
+
+
+def hash_password(raw_password):
+    return hashing_pool.run(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    Check ``raw_password`` against ``user`` on the hashing pool and
+    re-hash it with the preferred hasher when PASSWORD_HASHERS changed.
+    """
+    needs_upgrade = []
+    is_correct = hashing_pool.run(
+        check_password, raw_password, user.password, needs_upgrade.append
+    )
+
+    if is_correct and needs_upgrade:
+        # The password is already verified; a busy pool only postpones the
+        # upgrade to a later login
+        try:
+            user.password = hash_password(raw_password)
+        except PasswordHashingUnavailable:
+            logger.info("Skipped password hash upgrade for user %s, hashing pool busy", user.pk)
+        else:
+            get_user_model().objects.filter(pk=user.pk).update(password=user.password)
+
+    return is_correct
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.users.tasks import generate_avatar_thumbnails
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Enqueue thumbnail rendering for avatars uploaded before thumbnails existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            rows = list(
+                User.objects
+                .filter(id__gt=last_id, avatar_thumbnails={})
+                .exclude(avatar__isnull=True).exclude(avatar='')
+                .order_by('id')
+                .values_list('id', 'avatar')[:batch_size]
+            )
+            if not rows:
+                break
+
+            # The task skips users who replaced their avatar in the meantime
+            for user_id, name in rows:
+                generate_avatar_thumbnails.delay(user_id, name)
+            last_id = rows[-1][0]
+            total += len(rows)
+            self.stdout.write(f'Enqueued {total} avatars...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done. Enqueued {total} avatars.'))
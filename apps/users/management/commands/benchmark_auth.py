@@ -0,0 +1,235 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from rest_framework.test import APIClient
+
+from core.benchmark import percentile, throwaway_database
+
+User = get_user_model()
+
+PASSWORD = 'Bench-Pass-123!'
+ENDPOINTS = ('register', 'login', 'refresh', 'verify', 'profile', 'profile_update')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class InProcessClient:
+    """Drives the API through the Django test client, counting queries"""
+
+    def __init__(self):
+        self.client = APIClient()
+
+    def request(self, method, path, data=None, token=None):
+        self.client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}))
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = getattr(self.client, method)(path, data, format='json')
+        is_json = response.get('Content-Type', '').startswith('application/json')
+        return response.status_code, json.loads(response.content) if is_json else {}, counter.count
+
+
+class HTTPClient:
+    """Drives a running gunicorn/uvicorn instance; query counts are unknown"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode() if data is not None and method != 'get' else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method.upper()
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or b'{}'), None
+        except urllib.error.HTTPError as e:
+            return e.code, {}, None
+
+
+class Command(BaseCommand):
+    help = "Benchmark the /api/auth/ endpoints and compare against a JSON baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to seed before the run')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=20, help='Sessions per worker')
+        parser.add_argument('--url', help='Base URL of a running server instead of the test client')
+        parser.add_argument('--save', help='Write results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against this JSON file')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed relative slowdown of p95 latency or throughput',
+        )
+
+    def handle(self, *args, **options):
+        self.samples = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+        if options['url']:
+            self.make_client = lambda: HTTPClient(options['url'])
+            results = self.run(options)
+        else:
+            self.make_client = InProcessClient
+            with throwaway_database():
+                self.seed(options['users'])
+                results = self.run(options)
+
+        self.print_results(results)
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+
+    def seed(self, count):
+        encoded = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [
+                User(email=f'seed{i}@bench.local', username=f'seed{i}', password=encoded)
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+
+    def record(self, name, started, status, expected, queries):
+        elapsed = (time.monotonic() - started) * 1000
+        with self.lock:
+            if status != expected:
+                self.errors[name] += 1
+                return
+            self.samples[name].append(elapsed)
+            if queries is not None:
+                self.queries[name].append(queries)
+
+    def call(self, client, name, expected, method, path, data=None, token=None):
+        started = time.monotonic()
+        status, body, queries = client.request(method, path, data, token)
+        self.record(name, started, status, expected, queries)
+        return body if status == expected else None
+
+    def session(self, client):
+        """One register -> login -> refresh -> verify -> profile -> update cycle"""
+        suffix = uuid.uuid4().hex[:12]
+        email = f'bench-{suffix}@bench.local'
+        registered = self.call(client, 'register', 201, 'post', '/api/auth/register/', {
+            'email': email, 'username': f'bench-{suffix}',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        })
+        if registered is None:
+            return
+
+        tokens = self.call(client, 'login', 200, 'post', '/api/auth/login/', {
+            'email': email, 'password': PASSWORD,
+        })
+        if tokens is None:
+            return
+
+        self.call(client, 'refresh', 200, 'post', '/api/auth/refresh/', {'refresh': tokens['refresh']})
+        access = tokens['access']
+        self.call(client, 'verify', 200, 'get', '/api/auth/verify/', token=access)
+        self.call(client, 'profile', 200, 'get', '/api/auth/profile/', token=access)
+        self.call(client, 'profile_update', 200, 'patch', '/api/auth/profile/update/', {
+            'bio': f'Benchmark {suffix}',
+        }, token=access)
+
+    def worker(self, iterations):
+        client = self.make_client()
+        try:
+            for _ in range(iterations):
+                self.session(client)
+        finally:
+            connection.close()
+
+    def run(self, options):
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [
+                pool.submit(self.worker, options['iterations'])
+                for _ in range(options['concurrency'])
+            ]
+            for future in futures:
+                future.result()
+        duration = time.monotonic() - started
+
+        results = {}
+        for name in ENDPOINTS:
+            samples = sorted(self.samples[name])
+            if not samples:
+                results[name] = {'requests': 0, 'errors': self.errors[name]}
+                continue
+            queries = self.queries[name]
+            results[name] = {
+                'requests': len(samples),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(samples) / duration, 2),
+                'p50_ms': round(percentile(samples, 50), 3),
+                'p95_ms': round(percentile(samples, 95), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+                'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+            }
+        return results
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'endpoint':<16}{'reqs':>7}{'err':>6}{'rps':>10}"
+            f"{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}"
+        )
+        for name, row in results.items():
+            if not row['requests']:
+                self.stdout.write(f"{name:<16}{0:>7}{row['errors']:>6}")
+                continue
+            queries = row['queries_per_request']
+            self.stdout.write(
+                f"{name:<16}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>10}"
+                f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+                f"{'-' if queries is None else queries:>9}"
+            )
+
+    def compare(self, results, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        failures = []
+        for name, base in baseline.items():
+            current = results.get(name)
+            if not base.get('requests') or not current or not current.get('requests'):
+                continue
+            if current['p95_ms'] > base['p95_ms'] * (1 + threshold):
+                failures.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current['throughput_rps'] < base['throughput_rps'] * (1 - threshold):
+                failures.append(
+                    f"{name}: throughput {base['throughput_rps']} -> {current['throughput_rps']} rps"
+                )
+            base_queries = base.get('queries_per_request')
+            queries = current.get('queries_per_request')
+            if base_queries is not None and queries is not None and queries > base_queries:
+                failures.append(f'{name}: queries/request {base_queries} -> {queries}')
+
+        if failures:
+            raise CommandError('Benchmark regressed:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}.'))
+
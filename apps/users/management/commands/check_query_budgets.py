@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import throwaway_database
+from core.query_budgets import (
+    BUDGETS_PATH,
+    DEFAULT_SIZES,
+    evaluate,
+    load_budgets,
+    measure,
+    write_budgets,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Count SQL queries per API endpoint at two data sizes and check them "
+        "against the budget file; --update rewrites the file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH), help='Budget JSON file')
+        parser.add_argument('--sizes', type=int, nargs=2, default=DEFAULT_SIZES, metavar=('SMALL', 'LARGE'))
+        parser.add_argument('--update', action='store_true', help='Write the measured counts as the new budgets')
+
+    def handle(self, *args, **options):
+        small, large = sorted(options['sizes'])
+        if small < 1 or small == large:
+            raise CommandError("--sizes needs two different sizes of at least 1")
+        measured = {}
+        for size in (small, large):
+            with throwaway_database():
+                measured[size] = measure(size)
+
+        budgets = None if options['update'] else load_budgets(options['budgets'])
+        counts, rows, problems = evaluate(measured, budgets)
+        self.stdout.write(f"{'endpoint':<44}{f'n={small}':>8}{f'n={large}':>8}{'budget':>8}  status")
+        for key, small_count, large_count, budget, status in rows:
+            self.stdout.write(
+                f"{key:<44}{small_count:>8}{large_count:>8}{'-' if budget is None else budget:>8}  {status}"
+            )
+        if problems:
+            raise CommandError('\n'.join(["Query budget check failed:", *problems]))
+
+        if options['update']:
+            written = write_budgets(counts, options['budgets'])
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(written)} budgets to {options['budgets']}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All endpoints are within their query budgets"))
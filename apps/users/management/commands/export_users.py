@@ -0,0 +1,52 @@
+import csv
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.users.serializers import UserProfileSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream users as UserProfileSerializer rows to CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, '-' for stdout")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='jsonl')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        out = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        try:
+            count = self.export(out, options['format'], options['chunk_size'])
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        self.stderr.write(self.style.SUCCESS(f'Exported {count} users.'))
+
+    def export(self, out, fmt, chunk_size):
+        # iterator() streams rows from the cursor instead of caching the queryset
+        users = User.objects.order_by('pk').iterator(chunk_size=chunk_size)
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(out, fieldnames=UserProfileSerializer.Meta.fields)
+            writer.writeheader()
+
+        count = 0
+        for user in users:
+            row = UserProfileSerializer(user).data
+            if writer:
+                # Nested values (avatar URLs by size) as JSON, not a Python repr
+                writer.writerow({
+                    name: json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for name, value in row.items()
+                })
+            else:
+                out.write(json.dumps(row) + '\n')
+            count += 1
+        return count
@@ -0,0 +1,167 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.users.serializers import UserImportSerializer
+
+User = get_user_model()
+
+
+def _init_worker():
+    # Needed when workers are spawned rather than forked
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password or None)
+
+
+class MalformedLine:
+    def __init__(self, error):
+        self.error = error
+
+
+def read_rows(path, fmt):
+    """Yield ``(line_number, row)`` without reading the whole file.
+
+    A JSONL line that does not parse is yielded as a ``MalformedLine``
+    instead of ending the import.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, MalformedLine(str(e))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Stream users from a CSV or JSONL file into the users table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processes used to hash passwords (defaults to CPU count)',
+        )
+        parser.add_argument(
+            '--rejects', metavar='PATH',
+            help='Write skipped lines to this JSONL file instead of stderr',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        self.dry_run = options['dry_run']
+        self.seen_emails = set()
+        self.seen_usernames = set()
+        self.created = self.duplicates = self.invalid = 0
+
+        try:
+            self.rejects = open(options['rejects'], 'w', encoding='utf-8') if options['rejects'] else None
+        except OSError as e:
+            raise CommandError(f"Could not open {options['rejects']}: {e}")
+        try:
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=_init_worker
+            ) as pool:
+                try:
+                    for chunk in chunked(read_rows(path, fmt), options['batch_size']):
+                        self.import_chunk(chunk, pool)
+                except (OSError, ValueError) as e:
+                    raise CommandError(f'Could not read {path}: {e}')
+        finally:
+            if self.rejects:
+                self.rejects.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {self.created} users, skipped {self.duplicates} duplicates '
+            f'and {self.invalid} invalid rows.'
+        ))
+        if self.rejects and self.duplicates + self.invalid:
+            self.stdout.write(f"Skipped lines are listed in {options['rejects']}")
+
+    def reject(self, line_number, errors):
+        # Only line numbers and errors, so the report never repeats passwords
+        if self.rejects:
+            self.rejects.write(json.dumps({'line': line_number, 'errors': errors}) + '\n')
+        else:
+            self.stderr.write(f'Line {line_number}: {json.dumps(errors)}')
+
+    def import_chunk(self, chunk, pool):
+        valid = []
+        for line_number, row in chunk:
+            if isinstance(row, MalformedLine):
+                self.invalid += 1
+                self.reject(line_number, {'non_field_errors': [f'Malformed JSON: {row.error}']})
+                continue
+            serializer = UserImportSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((line_number, serializer.validated_data))
+            else:
+                self.invalid += 1
+                self.reject(line_number, serializer.errors)
+
+        # One query per field for the whole chunk instead of one per row;
+        # rows and stored values are compared in the same normalized form
+        emails = {User.objects.normalize_email(data['email']) for _, data in valid}
+        usernames = {User.normalize_username(data['username']) for _, data in valid}
+        existing_emails = {
+            User.objects.normalize_email(email)
+            for email in User.objects.filter(email__in=emails).values_list('email', flat=True)
+        }
+        existing_usernames = {
+            User.normalize_username(username)
+            for username in User.objects.filter(username__in=usernames).values_list('username', flat=True)
+        }
+
+        rows = []
+        for line_number, data in valid:
+            email = User.objects.normalize_email(data['email'])
+            username = User.normalize_username(data['username'])
+            if email in existing_emails or email in self.seen_emails:
+                self.duplicates += 1
+                self.reject(line_number, {'email': [f'Duplicate email {email}']})
+                continue
+            if username in existing_usernames or username in self.seen_usernames:
+                self.duplicates += 1
+                self.reject(line_number, {'username': [f'Duplicate username {username}']})
+                continue
+            self.seen_emails.add(email)
+            self.seen_usernames.add(username)
+            rows.append(dict(data, email=email, username=username))
+
+        passwords = [data.pop('password', '') for data in rows]
+        hashes = pool.map(_hash, passwords, chunksize=max(1, len(passwords) // 16))
+        users = [User(password=encoded, **data) for data, encoded in zip(rows, hashes)]
+
+        if not self.dry_run:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=len(users) or None)
+        self.created += len(users)
+        self.stdout.write(f'Imported {self.created} users...')
@@ -0,0 +1,224 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: argv = [mode, warm, workers]
+PROBE = r'''
+import json, os, sys, time
+started = time.perf_counter()
+mode, warm, workers = sys.argv[1], sys.argv[2] == '1', int(sys.argv[3])
+if mode == 'memory':
+    import tracemalloc
+    tracemalloc.start()
+from core.startup import memory_kb
+phases = [('interpreter', 0.0, *memory_kb())]
+
+def phase(name):
+    phases.append((name, time.perf_counter() - started, *memory_kb()))
+
+# Charge each app for what importing it, its models and its ready() add;
+# shared dependencies count against the first app that pulls them in
+from django.apps.config import AppConfig
+apps_loaded = {}
+
+def measured(func, key=None):
+    def wrapper(*args, **kwargs):
+        before, rss = time.perf_counter(), memory_kb()[0]
+        result = func(*args, **kwargs)
+        row = apps_loaded.setdefault(key or result.name, [0.0, 0])
+        row[0] += time.perf_counter() - before
+        row[1] += memory_kb()[0] - rss
+        return result
+    return wrapper
+
+create = AppConfig.create.__func__
+
+def create_measured(cls, entry):
+    app_config = measured(create)(cls, entry)
+    app_config.import_models = measured(app_config.import_models, app_config.name)
+    app_config.ready = measured(app_config.ready, app_config.name)
+    return app_config
+
+AppConfig.create = classmethod(create_measured)
+
+import django
+django.setup()
+phase('django.setup')
+from django.urls import get_resolver
+get_resolver().url_patterns
+phase('urlconf')
+if warm:
+    from core.startup import warm as warm_up
+    warm_up()
+    phase('warm')
+result = {'phases': phases, 'apps': apps_loaded}
+
+if mode == 'memory':
+    snapshot = tracemalloc.take_snapshot()
+    result['allocations'] = {
+        stat.traceback[0].filename: stat.size for stat in snapshot.statistics('filename')
+    }
+
+forked = []
+for _ in range(workers):
+    read_end, write_end = os.pipe()
+    fork_started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        # What a worker does before and during its first requests
+        import gc
+        from core.startup import warm as warm_up
+        warm_up(freeze=False)
+        ready = time.perf_counter() - fork_started
+        gc.collect()
+        os.write(write_end, json.dumps([ready, *memory_kb()]).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        forked.append(json.loads(pipe.read()))
+    os.waitpid(pid, 0)
+result['workers'] = forked
+print(json.dumps(result))
+'''
+
+
+def run_probe(mode, warm, workers):
+    command = [sys.executable]
+    if mode == 'time':
+        command += ['-X', 'importtime']
+    command += ['-c', PROBE, mode, '1' if warm else '0', str(workers)]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+    process = subprocess.run(
+        command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode:
+        raise CommandError(f"Startup probe failed:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.splitlines()[-1]), process.stderr
+
+
+def owner(module):
+    """Group a dotted module name by local app, or by top-level package"""
+    parts = module.split('.')
+    if parts[0] == 'apps' and len(parts) > 1:
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def import_times(stderr):
+    """``{module: self microseconds}`` from ``python -X importtime`` output"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(own)
+    return times
+
+
+def path_module(filename, roots):
+    """Dotted module name for a source file, or None outside any import root"""
+    path = Path(filename)
+    for root in roots:
+        try:
+            relative = path.relative_to(root)
+        except ValueError:
+            continue
+        parts = list(relative.with_suffix('').parts)
+        if parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts) or None
+    return None
+
+
+def top(values, limit, scale):
+    ordered = sorted(values.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return {name: round(value / scale, 1) for name, value in ordered}
+
+
+class Command(BaseCommand):
+    help = "Measure import time and memory of a cold start, per app and module"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warm', action='store_true', help='Boot the way preload mode does (core.startup.warm)')
+        parser.add_argument('--workers', type=int, default=2, help='Workers to fork after boot')
+        parser.add_argument('--top', type=int, default=15, help='Rows per table')
+        parser.add_argument('--save', help='Write results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['workers'] and not hasattr(os, 'fork'):
+            raise CommandError("--workers needs os.fork")
+        timed, stderr = run_probe('time', options['warm'], options['workers'])
+        traced, _ = run_probe('memory', options['warm'], 0)
+
+        module_times = import_times(stderr)
+        app_times = defaultdict(int)
+        for module, micros in module_times.items():
+            app_times[owner(module)] += micros
+
+        # Longest roots first, so site-packages wins over the stdlib directory above it
+        roots = sorted(
+            {Path(p) for p in sys.path if p} | {Path(settings.BASE_DIR)},
+            key=lambda p: len(str(p)), reverse=True,
+        )
+        module_memory = defaultdict(int)
+        app_memory = defaultdict(int)
+        for filename, size in traced['allocations'].items():
+            # Bytecode of imported modules is charged to the import machinery
+            module = path_module(filename, roots) or filename
+            module_memory[module] += size
+            app_memory[owner(module)] += size
+
+        results = {
+            'settings': settings.SETTINGS_MODULE,
+            'warm': options['warm'],
+            'phases': [
+                {'phase': name, 'seconds': round(seconds, 4), 'rss_kb': rss, 'private_kb': private}
+                for name, seconds, rss, private in timed['phases']
+            ],
+            'workers': [
+                {'ready_seconds': round(ready, 4), 'rss_kb': rss, 'private_kb': private}
+                for ready, rss, private in timed['workers']
+            ],
+            'apps': {
+                name: {'seconds': round(seconds, 4), 'rss_kb': rss}
+                for name, (seconds, rss) in timed['apps'].items()
+            },
+            'import_ms_by_package': top(app_times, None, 1000),
+            'import_ms_by_module': top(module_times, options['top'], 1000),
+            'allocated_kb_by_app': top(app_memory, None, 1024),
+            'allocated_kb_by_module': top(module_memory, options['top'], 1024),
+        }
+        self.print_results(results, options['top'])
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def print_results(self, results, limit):
+        self.stdout.write(f"{'phase':<16}{'seconds':>10}{'rss KiB':>12}{'private KiB':>14}")
+        for row in results['phases']:
+            self.stdout.write(
+                f"{row['phase']:<16}{row['seconds']:>10.3f}{row['rss_kb']:>12}{row['private_kb'] or '-':>14}"
+            )
+        for index, row in enumerate(results['workers']):
+            self.stdout.write(
+                f"{f'worker {index}':<16}{row['ready_seconds']:>10.3f}{row['rss_kb']:>12}"
+                f"{row['private_kb'] or '-':>14}"
+            )
+        self.stdout.write(f"\n{'app (INSTALLED_APPS order)':<40}{'seconds':>10}{'rss KiB':>12}")
+        for name, row in results['apps'].items():
+            self.stdout.write(f"{name:<40}{row['seconds']:>10.3f}{row['rss_kb']:>12}")
+        for title, key, unit in (
+            ('Import time by package', 'import_ms_by_package', 'ms'),
+            ('Slowest modules (self time)', 'import_ms_by_module', 'ms'),
+            ('Allocated at startup by app', 'allocated_kb_by_app', 'KiB'),
+            ('Largest modules by allocation', 'allocated_kb_by_module', 'KiB'),
+        ):
+            self.stdout.write(f"\n{title} ({unit})")
+            for name, value in list(results[key].items())[:limit]:
+                self.stdout.write(f"  {name:<50}{value:>10}")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding/blacklisted token rows in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Seconds to pause between batches to limit lock pressure',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        total = 0
+
+        while True:
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lte=now)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            # BlacklistedToken rows go with their OutstandingToken (CASCADE)
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            self.stdout.write(f'Pruned {total} expired tokens...')
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done. Pruned {total} expired tokens.'))
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
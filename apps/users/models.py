@@ -16,6 +16,8 @@ class User(AbstractUser):
     )
     phone = models.CharField(max_length=15, blank=True, null=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    # {size: storage name} of the WebP renditions of ``avatar`` (apps.users.avatars)
+    avatar_thumbnails = models.JSONField(default=dict, blank=True)
     bio = models.TextField(blank=True, null=True)
     is_verified = models.BooleanField(default=False)
     date_of_birth = models.DateField(blank=True, null=True)
@@ -1,16 +1,30 @@
 from typing import Any, Dict
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework.validators import UniqueValidator
+
+from apps.users.avatars import store_original, thumbnail_urls
+from apps.users.hashing import hash_password
+from apps.users.tasks import generate_avatar_thumbnails
+from apps.users.tokens import RefreshToken
+from core.uploads import IMAGE_FORMATS, inspect_image
 
 User = get_user_model()
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom JWT serializer to return user info with tokens"""
     
+    token_class = RefreshToken
+    
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -19,6 +33,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         token['user_type'] = user.user_type
         token['is_verified'] = user.is_verified
+        token['is_staff'] = user.is_staff
         
         return token
     
@@ -35,6 +50,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         }
         return data
     
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer backed by the Redis token blacklist"""
+    
+    token_class = RefreshToken
+    
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     
@@ -58,13 +78,44 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        
+        # Same as create_user, but the hash is computed on the hashing pool
+        validated_data['email'] = User.objects.normalize_email(validated_data['email'])
+        validated_data['username'] = User.normalize_username(validated_data['username'])
+        user = User(**validated_data)
+        user.password = hash_password(password)
+        user.save()
         return user
     
+class UserImportSerializer(serializers.ModelSerializer):
+    """Row-level validation for bulk imports; uniqueness is checked per chunk"""
+    
+    password = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    
+    class Meta:
+        model = User
+        fields = (
+            'email', 'username', 'password',
+            'first_name', 'last_name', 'user_type', 'phone'
+        )
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        # Uniqueness is checked per chunk by the command; format validators stay
+        for name in ('email', 'username'):
+            fields[name].validators = [
+                validator for validator in fields[name].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+    
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile"""
     
     full_name = serializers.ReadOnlyField()
+    # Thumbnail URLs by size (the original until they are rendered); null without an avatar
+    avatar = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -74,6 +125,9 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'is_verified', 'date_of_birth', 'date_joined', 'updated_at'
         )
         read_only_fields = ('id', 'email', 'date_joined', 'is_verified')
+    
+    def get_avatar(self, obj):
+        return thumbnail_urls(obj)
 
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating user profile"""
@@ -82,11 +136,43 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         model = User
         fields = (
             'username', 'first_name', 'last_name', 'phone', 
-            'bio', 'avatar', 'date_of_birth'
+            'bio', 'date_of_birth'
         )
     
     def validate_username(self, value):
         user = self.context['request'].user
         if User.objects.exclude(pk=user.pk).filter(username=value).exists():
             raise serializers.ValidationError("Username already exists")
-        return value
\ No newline at end of file
+        return value
+    
+class AvatarUploadSerializer(serializers.Serializer):
+    """Validates a streamed avatar from its header only; the pixels are never decoded here"""
+    
+    avatar = serializers.FileField(error_messages={
+        # Oversized uploads are dropped by core.uploads.HashingUploadHandler
+        'required': "No image was uploaded, or it exceeds the upload size limit.",
+    })
+    
+    def validate_avatar(self, value):
+        if not hasattr(value, 'sha256'):
+            raise serializers.ValidationError("Avatar upload could not be processed")
+        info = inspect_image(value)
+        if info is None or info[0] not in IMAGE_FORMATS:
+            raise serializers.ValidationError("Upload a JPEG, PNG, WebP or GIF image")
+        image_format, width, height = info
+        if width * height > settings.AVATAR_MAX_PIXELS:
+            raise serializers.ValidationError("Image dimensions are too large")
+        value.image_format = image_format
+        return value
+    
+    def save(self):
+        user = self.context['request'].user
+        upload = self.validated_data['avatar']
+        with transaction.atomic():
+            user = User.objects.select_for_update().get(pk=user.pk)
+            user.avatar.name = store_original(upload, upload.image_format)
+            user.avatar_thumbnails = {}
+            user.save(update_fields=['avatar', 'avatar_thumbnails', 'updated_at'])
+            name = user.avatar.name
+            transaction.on_commit(lambda: generate_avatar_thumbnails.delay(user.pk, name))
+        return user
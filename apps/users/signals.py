@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.cache import (
+    CLAIM_FIELDS,
+    invalidate_profile,
+    invalidate_user,
+    mark_claims_changed,
+    refresh_profile,
+)
+from apps.users.serializers import UserProfileSerializer
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # After commit, so a reader in between cannot cache the old row again
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+    # Covers UserProfileUpdateSerializer, UserAdmin and any other save()
+    profile_fields = set(UserProfileSerializer.Meta.fields)
+    if update_fields is None or set(update_fields) & profile_fields:
+        # Rendered once committed, so a rolled-back save never reaches the cache
+        transaction.on_commit(lambda: refresh_profile(instance))
+
+    # Logins only touch last_login, which no token claim depends on
+    if update_fields is not None and not set(update_fields) & set(CLAIM_FIELDS):
+        return
+    # Tokens refreshed before the commit still carry the old claims
+    transaction.on_commit(lambda: mark_claims_changed(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+
+    def forget():
+        invalidate_user(user_id)
+        invalidate_profile(user_id)
+        mark_claims_changed(user_id)
+
+    transaction.on_commit(forget)
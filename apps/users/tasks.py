@@ -0,0 +1,20 @@
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from apps.users.avatars import render_thumbnails
+
+User = get_user_model()
+
+
+@shared_task(ignore_result=True)
+def generate_avatar_thumbnails(user_id, avatar_name):
+    """Render thumbnails for ``avatar_name`` unless the user has replaced it since"""
+    thumbnails = render_thumbnails(avatar_name)
+    with transaction.atomic():
+        user = User.objects.select_for_update().filter(pk=user_id, avatar=avatar_name).first()
+        if user is None:
+            return
+        user.avatar_thumbnails = thumbnails
+        # Through save() so the profile cache is refreshed by apps.users.signals
+        user.save(update_fields=['avatar_thumbnails', 'updated_at'])
@@ -1,3 +1,597 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from redis.exceptions import RedisError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.users import throttling
+from apps.users.authentication import ClaimsJWTAuthentication, ClaimsUser, get_user_instance
+from apps.users.blacklist import RedisTokenBlacklist, token_blacklist
+from apps.users.cache import (
+    claims_changed_at, claims_changed_key, get_cached_user, get_profile, user_cache_key,
+)
+from apps.users.hashing import HashingPool, PasswordHashingUnavailable, verify_password
+from apps.users.management.commands import benchmark_auth
+from apps.users.serializers import CustomTokenObtainPairSerializer, UserImportSerializer
+from apps.users.tasks import generate_avatar_thumbnails
+from apps.users.tokens import RefreshToken
+from core.benchmark import percentile
+from core.testing import redis_cache
+
+User = get_user_model()
+
+
+class TempFileMixin:
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+class UserImportTests(TempFileMixin, TestCase):
+    def run_import(self, path, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_users', path, workers=1, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_serializer_keeps_format_validators(self):
+        serializer = UserImportSerializer(data={'email': 'not-an-email', 'username': 'bad name!!/$'})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'email', 'username'})
+
+    def test_import_serializer_skips_uniqueness(self):
+        User.objects.create_user(email='taken@test.local', username='taken', password='x')
+        serializer = UserImportSerializer(data={'email': 'taken@test.local', 'username': 'taken'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_csv_import_skips_duplicates_and_hashes_passwords(self):
+        User.objects.create_user(email='old@test.local', username='old', password='x')
+        path = self.write_file('.csv', (
+            'email,username,password,user_type\n'
+            'a@test.local,a,secret-a,host\n'
+            'old@TEST.local,other,x,guest\n'
+            'b@test.local,a,x,guest\n'
+            'c@test.local,c,,guest\n'
+        ))
+        out, _ = self.run_import(path, batch_size=2)
+
+        self.assertIn('Created 2 users, skipped 2 duplicates and 0 invalid rows.', out)
+        self.assertTrue(User.objects.get(email='a@test.local').check_password('secret-a'))
+        self.assertFalse(User.objects.get(email='c@test.local').has_usable_password())
+
+    def test_usernames_are_compared_normalized(self):
+        User.objects.create_user(email='b@test.local', username='b', password='x')
+        # Fullwidth "ｂ" is "b" after NFKC normalization
+        path = self.write_file('.jsonl', json.dumps({'email': 'c@test.local', 'username': 'ｂ'}) + '\n')
+        out, _ = self.run_import(path)
+        self.assertIn('skipped 1 duplicates', out)
+        self.assertFalse(User.objects.filter(email='c@test.local').exists())
+
+    def test_malformed_lines_go_to_the_reject_report(self):
+        path = self.write_file('.jsonl', (
+            '{"email": "a@test.local", "username": "a", "password": "pw"}\n'
+            '{"email": "b@test.local", "username": \n'
+            '\n'
+            '{"email": "c@test.local", "username": "bad name!!/$", "password": "pw"}\n'
+        ))
+        rejects = self.write_file('.jsonl', '')
+        out, _ = self.run_import(path, rejects=rejects)
+
+        self.assertIn('Created 1 users, skipped 0 duplicates and 2 invalid rows.', out)
+        with open(rejects, encoding='utf-8') as f:
+            report = [json.loads(line) for line in f]
+        self.assertEqual([entry['line'] for entry in report], [2, 4])
+        self.assertIn('username', report[1]['errors'])
+        self.assertNotIn('pw', json.dumps(report))
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_file('.csv', 'email,username\na@test.local,a\n')
+        self.run_import(path, dry_run=True)
+        self.assertFalse(User.objects.exists())
+
+
+class UserExportTests(TempFileMixin, TestCase):
+    def test_csv_export_writes_nested_values_as_json(self):
+        user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        user.avatar.name = 'avatars/a.jpg'
+        user.save(update_fields=['avatar'])
+        path = self.write_file('.csv', '')
+        call_command('export_users', path, format='csv', stderr=io.StringIO())
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0]['avatar'])['64'], '/media/avatars/a.jpg')
+
+    def test_jsonl_export_round_trips_through_import(self):
+        User.objects.create_user(email='a@test.local', username='a', password='x', first_name='Ann')
+        path = self.write_file('.jsonl', '')
+        call_command('export_users', path, stderr=io.StringIO())
+        User.objects.all().delete()
+
+        call_command('import_users', path, workers=1, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(User.objects.get(email='a@test.local').first_name, 'Ann')
+
+
+class HashingPoolTests(TestCase):
+    def test_rejects_beyond_max_queue_while_threads_wait(self):
+        pool = HashingPool(max_workers=1, max_queue=2, timeout=5)
+        release = threading.Event()
+        # One job runs and the other waits behind it; both count as in flight
+        threads = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while pool.stats()['pending'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        with self.assertRaises(PasswordHashingUnavailable):
+            pool.run(len, 'extra')
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(pool.stats()['rejected'], 1)
+        self.assertEqual(pool.run(len, 'after'), 5)
+
+    def test_timeout_answers_503(self):
+        pool = HashingPool(max_workers=1, max_queue=4, timeout=0.01)
+        release = threading.Event()
+        with self.assertRaises(PasswordHashingUnavailable):
+            pool.run(release.wait)
+        release.set()
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.SHA1PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class PasswordUpgradeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='a@test.local', username='a')
+        self.user.password = make_password('secret', hasher='md5')
+        self.user.save(update_fields=['password'])
+
+    def test_verified_password_is_rehashed_with_preferred_hasher(self):
+        self.assertTrue(verify_password(self.user, 'secret'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('sha1$'))
+
+    def test_busy_pool_skips_the_upgrade_instead_of_failing_the_login(self):
+        with mock.patch('apps.users.hashing.hash_password', side_effect=PasswordHashingUnavailable):
+            self.assertTrue(verify_password(self.user, 'secret'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+    def test_wrong_password_is_not_upgraded(self):
+        self.assertFalse(verify_password(self.user, 'wrong'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='a@test.local', username='a', password='x', user_type='guest'
+        )
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Bearer {token or self.token}'
+        )
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def save(self, **fields):
+        for name, value in fields.items():
+            setattr(self.user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=list(fields))
+
+    def test_fresh_token_needs_no_query(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.email, user.user_type), (self.user.pk, 'a@test.local', 'guest'))
+        self.assertFalse(user.can_host())
+
+    def test_full_user_is_loaded_only_when_needed(self):
+        user = self.authenticate()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_instance(user), self.user)
+        self.assertEqual(get_user_instance(self.user), self.user)
+
+    def test_claim_change_loads_the_current_user(self):
+        self.save(user_type='host')
+        user = self.authenticate()
+        self.assertIsInstance(user, User)
+        self.assertTrue(user.can_host())
+
+    def test_tokens_issued_after_the_change_use_the_claims_again(self):
+        self.save(user_type='host')
+        # iat has one second resolution; move the change into the past instead of sleeping
+        cache.set(claims_changed_key(self.user.pk), claims_changed_at(self.user.pk) - 2)
+        user = self.authenticate(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.user_type, 'host')
+
+    def test_login_does_not_invalidate_claims(self):
+        self.save(last_login=timezone.now())
+        self.assertIsInstance(self.authenticate(), ClaimsUser)
+
+    def test_deactivated_user_is_rejected(self):
+        self.save(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_user_is_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_saved_user_is_evicted_only_after_commit(self):
+        get_cached_user(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ann'
+            self.user.save()
+            self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(get_cached_user(self.user.pk).first_name, 'Ann')
+
+    def test_claim_change_is_marked_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_type = 'host'
+            self.user.save(update_fields=['user_type'])
+            self.assertIsNone(claims_changed_at(self.user.pk))
+        self.assertIsNotNone(claims_changed_at(self.user.pk))
+
+    def test_deleted_user_is_forgotten(self):
+        user_id = self.user.pk
+        get_cached_user(user_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(User.DoesNotExist):
+            get_cached_user(user_id)
+
+    def test_profile_etag_matching(self):
+        etag = self.client.get('/api/auth/profile/')['ETag']
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                response = self.client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+        response = self.client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_update_changes_the_etag(self):
+        etag = get_profile(self.user.pk)['etag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/auth/profile/update/', {'first_name': 'Ann'}, format='json')
+        response = self.client.get('/api/auth/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Ann')
+
+
+class TokenFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/refresh/', {'refresh': str(token)}, format='json')
+
+    def logout(self, token):
+        access = token.access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post('/api/auth/logout/', {'refresh': str(token)}, format='json')
+        self.client.credentials()
+        return response
+
+
+@redis_cache
+class RedisTokenBlacklistTests(TokenFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        token_blacklist._reset()
+        super().setUp()
+
+    def test_issuing_and_revoking_write_no_sql_rows(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.logout(token).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_rotation_revokes_the_old_token(self):
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_revocation_on_another_worker_is_seen_before_the_next_sync(self):
+        token = RefreshToken.for_user(self.user)
+        jti = token['jti']
+        # Our filter has just synced; another worker then revokes the token
+        self.assertFalse(token_blacklist.contains(jti))
+        RedisTokenBlacklist().add(jti, token['exp'])
+
+        self.assertFalse(token_blacklist.contains(jti))
+        self.assertTrue(token_blacklist.contains(jti, strict=True))
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+class SQLTokenBlacklistTests(TokenFixtureMixin, TestCase):
+    def test_falls_back_to_the_blacklist_tables(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertTrue(OutstandingToken.objects.filter(jti=token['jti']).exists())
+        self.assertEqual(self.logout(token).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_prune_deletes_only_expired_rows(self):
+        live = RefreshToken.for_user(self.user)
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now())
+
+        call_command('prune_token_blacklist', sleep=0, stdout=io.StringIO())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class FakeBenchmarkServer:
+    """Stands in for HTTPClient; ``failing`` paths answer 500"""
+
+    failing = ()
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def request(self, method, path, data=None, token=None):
+        if path in self.failing:
+            return 500, {}, None
+        if path == '/api/auth/register/':
+            return 201, {}, None
+        if path == '/api/auth/login/':
+            return 200, {'access': 'access', 'refresh': 'refresh'}, None
+        return 200, {}, None
+
+
+class BenchmarkAuthTests(TempFileMixin, TestCase):
+    def run_benchmark(self, **options):
+        path = self.write_file('.json', '')
+        out = io.StringIO()
+        with mock.patch.object(benchmark_auth, 'HTTPClient', FakeBenchmarkServer):
+            call_command(
+                'benchmark_auth', url='http://bench', concurrency=2, iterations=3,
+                save=path, stdout=out, **options,
+            )
+        with open(path) as f:
+            return json.load(f), out.getvalue()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, pct) for pct in (50, 95, 99)], [51, 95, 99])
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_sessions_are_timed_per_endpoint(self):
+        with mock.patch.object(FakeBenchmarkServer, 'failing', ('/api/auth/verify/',)):
+            results, out = self.run_benchmark()
+        self.assertEqual(results['login']['requests'], 6)
+        self.assertEqual(results['profile_update']['requests'], 6)
+        self.assertEqual(results['verify'], {'requests': 0, 'errors': 6})
+        self.assertIsNone(results['login']['queries_per_request'])
+        self.assertIn('profile_update', out)
+
+    def test_failed_login_ends_the_session(self):
+        with mock.patch.object(FakeBenchmarkServer, 'failing', ('/api/auth/login/',)):
+            results, _ = self.run_benchmark()
+        self.assertEqual(results['login']['errors'], 6)
+        self.assertEqual(results['profile']['requests'], 0)
+
+    def test_regressions_against_a_baseline_fail(self):
+        results, _ = self.run_benchmark()
+        fast = {name: dict(row, throughput_rps=10 ** 9) for name, row in results.items()}
+        baseline = self.write_file('.json', json.dumps(fast))
+        with self.assertRaisesMessage(CommandError, 'Benchmark regressed'):
+            self.run_benchmark(baseline=baseline)
+
+        slow = {name: dict(row, p95_ms=60000, throughput_rps=0) for name, row in results.items()}
+        baseline = self.write_file('.json', json.dumps(slow))
+        self.assertIn('No regressions', self.run_benchmark(baseline=baseline)[1])
+
+    def test_more_queries_per_request_is_a_regression(self):
+        row = {'requests': 1, 'p95_ms': 1, 'throughput_rps': 1, 'queries_per_request': 3}
+        baseline = self.write_file('.json', json.dumps({'profile': row}))
+        with self.assertRaisesMessage(CommandError, 'profile: queries/request 3 -> 4'):
+            benchmark_auth.Command().compare(
+                {'profile': dict(row, queries_per_request=4)}, baseline, 0.2
+            )
+
+    def test_in_process_client_counts_queries(self):
+        user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client = benchmark_auth.InProcessClient()
+        status, body, queries = client.request('get', '/api/auth/profile/', token=str(token))
+        self.assertEqual((status, body['email']), (200, 'a@test.local'))
+        self.assertGreater(queries, 0)
+
+
+@redis_cache
+@override_settings(
+    AUTH_THROTTLE_LIMITS={'ip': 4, 'email': 3, 'global': 100}, AUTH_THROTTLE_WINDOW_SECONDS=60
+)
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # The registered script is bound to the client of an earlier cache
+        throttling._script = None
+        patcher = mock.patch.object(throttling, 'deny_list', throttling.DenyList())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def login(self, email='a@test.local', ip='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/', {'email': email, 'password': 'wrong'},
+            format='json', REMOTE_ADDR=ip,
+        )
+
+    def allowed(self, ip='10.0.0.1', at=600.0):
+        request = Request(
+            APIRequestFactory().post('/', {}, format='json', REMOTE_ADDR=ip), parsers=[JSONParser()]
+        )
+        with mock.patch('time.time', return_value=at):
+            return throttling.LoginRateThrottle().allow_request(request, None)
+
+    def test_ip_limit_answers_429_before_touching_the_database(self):
+        for n in range(4):
+            self.assertEqual(self.login(f'user{n}@test.local').status_code, 401)
+        with self.assertNumQueries(0):
+            response = self.login('user9@test.local')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 60)
+        self.assertEqual(self.login('user9@test.local', ip='10.0.0.2').status_code, 401)
+
+    def test_email_limit_spans_addresses_and_case(self):
+        for n in range(3):
+            self.login('Victim@Test.local', ip=f'10.0.1.{n}')
+        self.assertEqual(self.login('victim@test.local', ip='10.0.2.1').status_code, 429)
+
+    def test_rejected_keys_skip_redis_for_a_while(self):
+        for n in range(4):
+            self.login(f'user{n}@test.local')
+        self.assertEqual(self.login().status_code, 429)
+        with mock.patch.object(throttling, 'sliding_window_script') as script:
+            self.assertEqual(self.login().status_code, 429)
+        script.assert_not_called()
+
+    def test_previous_window_counts_by_its_overlap(self):
+        self.assertEqual([self.allowed(at=600.0) for _ in range(5)], [True] * 4 + [False])
+        throttling.deny_list = throttling.DenyList()
+        # Halfway through the next window half of the previous count still applies
+        self.assertEqual([self.allowed(at=690.0) for _ in range(3)], [True, True, False])
+
+    def test_fails_open_when_redis_errors(self):
+        script = mock.Mock(side_effect=RedisError('down'))
+        with mock.patch.object(throttling, 'sliding_window_script', return_value=script):
+            with self.assertLogs('apps.users.throttling', 'WARNING'):
+                self.assertTrue(self.allowed())
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_no_throttling_without_redis(self):
+        self.assertTrue(all(self.allowed() for _ in range(10)))
+
+
+def image_upload(size=(300, 200), color='red', image_format='PNG', name='avatar.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, file, execute=True):
+        with self.captureOnCommitCallbacks(execute=execute):
+            return self.client.post('/api/auth/profile/avatar/', {'avatar': file}, format='multipart')
+
+    def test_upload_stores_by_content_and_renders_thumbnails(self):
+        response = self.upload(image_upload())
+        self.assertEqual(response.status_code, 202)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.avatar.name, r'^avatars/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+
+        self.assertEqual(set(self.user.avatar_thumbnails), {'64', '160', '400'})
+        for size, name in self.user.avatar_thumbnails.items():
+            with default_storage.open(name) as f, Image.open(f) as thumbnail:
+                self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (int(size), int(size))))
+
+    def test_profile_serves_the_original_until_thumbnails_exist(self):
+        self.upload(image_upload(), execute=False)
+        avatar = self.client.get('/api/auth/profile/').data['avatar']
+        self.user.refresh_from_db()
+        self.assertEqual(set(avatar.values()), {self.user.avatar.url})
+
+        generate_avatar_thumbnails(self.user.pk, self.user.avatar.name)
+        avatar = self.client.get('/api/auth/profile/').data['avatar']
+        self.assertEqual(len(set(avatar.values())), 3)
+        self.assertTrue(all(url.endswith('.webp') for url in avatar.values()))
+
+    def test_identical_uploads_share_one_file(self):
+        other = User.objects.create_user(email='b@test.local', username='b', password='x')
+        self.upload(image_upload(color='blue'))
+        self.client.force_authenticate(other)
+        self.upload(image_upload(color='blue', name='copy.png'))
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, other.avatar.name)
+
+    def test_rejected_uploads(self):
+        not_an_image = io.BytesIO(b'plain text')
+        not_an_image.name = 'avatar.png'
+        self.assertEqual(self.upload(not_an_image).status_code, 400)
+        with self.settings(AVATAR_MAX_PIXELS=100):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        with self.settings(AVATAR_MAX_UPLOAD_BYTES=100):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_stale_thumbnails_are_discarded(self):
+        self.upload(image_upload(color='green'), execute=False)
+        self.user.refresh_from_db()
+        replaced = self.user.avatar.name
+        self.upload(image_upload(color='black'), execute=False)
+
+        generate_avatar_thumbnails(self.user.pk, replaced)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_thumbnails, {})
+
+    def test_backfill_enqueues_avatars_without_thumbnails(self):
+        self.upload(image_upload(), execute=False)
+        other = User.objects.create_user(email='b@test.local', username='b', password='x')
+        other.avatar_thumbnails = {'64': 'done.webp'}
+        other.avatar.name = 'avatars/done.png'
+        other.save()
+        self.user.refresh_from_db()
+
+        with mock.patch.object(generate_avatar_thumbnails, 'delay') as delay:
+            call_command('backfill_avatar_thumbnails', batch_size=1, stdout=io.StringIO())
+        delay.assert_called_once_with(self.user.pk, self.user.avatar.name)
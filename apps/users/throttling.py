@@ -0,0 +1,147 @@
+"""
+Sliding-window throttles for the unauthenticated auth endpoints.
+
+Every attempt is counted per client IP, per submitted email and globally
+per endpoint. Each counter is a pair of fixed windows whose previous half
+is weighted by how much of it still overlaps the sliding window, and all
+of them are checked and incremented by one Lua script, so a request costs
+a single Redis round trip. Rejected keys are also remembered in-process
+for a few seconds, so a hot offender stops reaching Redis at all.
+
+DRF runs throttles in ``APIView.initial``, before the view parses
+credentials, touches the database or hashes a password.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+from rest_framework.throttling import BaseThrottle
+
+from core.http import client_ip
+
+logger = logging.getLogger(__name__)
+
+# KEYS: (current window, previous window) per counter
+# ARGV: window seconds, elapsed fraction of the current window, limit per counter
+# Returns the 1-based index of the first counter over its limit, or 0 after counting
+SLIDING_WINDOW_SCRIPT = """
+local window = tonumber(ARGV[1])
+local elapsed = tonumber(ARGV[2])
+local counters = #KEYS / 2
+for i = 1, counters do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    if previous * (1 - elapsed) + current >= tonumber(ARGV[2 + i]) then
+        return i
+    end
+end
+for i = 1, counters do
+    redis.call('INCR', KEYS[2 * i - 1])
+    redis.call('EXPIRE', KEYS[2 * i - 1], window * 2)
+end
+return 0
+"""
+
+
+class DenyList:
+    """Process-local ``{key: deny until}``; pruned when it grows past ``max_size``"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def remaining(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return max((self._until.get(key, 0) - now for key in keys), default=0)
+
+    def add(self, key, seconds):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_size:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[key] = now + seconds
+
+
+deny_list = DenyList()
+_script = None
+
+
+def sliding_window_script():
+    global _script
+    if _script is None:
+        # register_script sends EVALSHA and falls back to EVAL only once per process
+        _script = cache.client.get_client(write=True).register_script(SLIDING_WINDOW_SCRIPT)
+    return _script
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Subclasses set ``scope``; limits come from ``AUTH_THROTTLE_LIMITS``"""
+
+    scope = None
+
+    def __init__(self):
+        self.retry_after = None
+
+    def identities(self, request):
+        """``[(counter name, identity)]`` for the counters this request is checked against"""
+        identities = [('ip', client_ip(request) or 'unknown'), ('global', '')]
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+            identities.insert(1, ('email', digest))
+        return identities
+
+    def allow_request(self, request, view):
+        if not (hasattr(cache, 'client') and hasattr(cache.client, 'get_client')):
+            return True
+
+        limits = settings.AUTH_THROTTLE_LIMITS
+        window = settings.AUTH_THROTTLE_WINDOW_SECONDS
+        counters = [
+            (f'auth_throttle:{self.scope}:{name}:{identity}', limits[name])
+            for name, identity in self.identities(request)
+        ]
+        denied_for = deny_list.remaining(prefix for prefix, _ in counters)
+        if denied_for > 0:
+            self.retry_after = denied_for
+            return False
+
+        now = time.time()
+        current = int(now // window)
+        keys = []
+        for prefix, _ in counters:
+            keys += [cache.make_key(f'{prefix}:{current}'), cache.make_key(f'{prefix}:{current - 1}')]
+        elapsed = (now % window) / window
+        try:
+            over = sliding_window_script()(
+                keys=keys, args=[window, elapsed, *(limit for _, limit in counters)]
+            )
+        except RedisError:
+            # Fail open: an unreachable Redis must not lock everybody out
+            logger.warning("Auth throttle check failed", exc_info=True)
+            return True
+        if not over:
+            return True
+
+        prefix = counters[over - 1][0]
+        self.retry_after = window - now % window
+        deny_list.add(prefix, min(self.retry_after, settings.AUTH_THROTTLE_DENY_SECONDS))
+        return False
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginRateThrottle(AuthRateThrottle):
+    scope = 'login'
+
+
+class RegisterRateThrottle(AuthRateThrottle):
+    scope = 'register'
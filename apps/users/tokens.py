@@ -0,0 +1,37 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as BaseRefreshToken
+
+from apps.users.blacklist import token_blacklist
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token that keeps its blacklist in Redis instead of the
+    token_blacklist tables. Falls back to the SQL blacklist when the
+    default cache is not Redis (tests, local runs without Redis).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        if not token_blacklist.is_available():
+            return super().for_user(user)
+        # Skip BlacklistMixin, which records every issued token in OutstandingToken
+        return super(BlacklistMixin, cls).for_user(user)
+
+    def check_blacklist(self):
+        if not token_blacklist.is_available():
+            return super().check_blacklist()
+
+        # Strict: a token revoked on another worker since our last bloom sync
+        # must not refresh or rotate again
+        if token_blacklist.contains(self.payload[api_settings.JTI_CLAIM], strict=True):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        if not token_blacklist.is_available():
+            return super().blacklist()
+
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
@@ -1,10 +1,11 @@
 from django.urls import path
 
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 
 from apps.users.views import (
+    AvatarUploadView,
     CustomTokenObtainPairView,
+    CustomTokenRefreshView,
     UserProfileUpdateView,
     UserProfileView,
     UserRegistrationView,
@@ -19,10 +20,11 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
     path('logout/', logout_view, name='logout'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('verify/', verify_token_view, name='verify_token'),
     
     # Profile endpoints
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('profile/update/', UserProfileUpdateView.as_view(), name='profile_update'),
+    path('profile/avatar/', AvatarUploadView.as_view(), name='profile_avatar'),
 ]
\ No newline at end of file
@@ -1,18 +1,31 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from apps.audit import writer as audit
+from apps.users.authentication import get_user_instance
+from apps.users.cache import get_profile
 from apps.users.serializers import (
+    AvatarUploadSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
     UserProfileSerializer,
     UserProfileUpdateSerializer,
     UserRegistrationSerializer,
 )
+from apps.users.throttling import LoginRateThrottle, RegisterRateThrottle
+from apps.users.tokens import RefreshToken
+from core.uploads import HashingUploadHandler
 
 User = get_user_model()
 
@@ -20,12 +33,27 @@ User = get_user_model()
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom login view with user info"""
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginRateThrottle]
+    
+    def post(self, request, *args, **kwargs):
+        try:
+            response = super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            audit.security('login', status='failed', email=request.data.get('email'))
+            raise
+        audit.security('login', user_id=response.data['user']['id'])
+        return response
+    
+class CustomTokenRefreshView(TokenRefreshView):
+    """Token refresh view using the Redis token blacklist"""
+    serializer_class = CustomTokenRefreshSerializer
     
 class UserRegistrationView(generics.CreateAPIView):
     """User registration view"""
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterRateThrottle]
     
     def create(self, request, *args, **kwargs):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -44,13 +72,36 @@ class UserRegistrationView(generics.CreateAPIView):
             'message': 'Registration successful'
         }, status=status.HTTP_201_CREATED)
         
+def cached_profile_response(request, wrap=None):
+    """Serve the current user's cached profile, answering 304 on a matching ETag"""
+    try:
+        profile = get_profile(request.user.pk)
+    except User.DoesNotExist:
+        # Deleted after the token was issued
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    
+    # If-None-Match uses weak comparison and may list several tags or "*"
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if '*' in etags or profile['etag'] in {etag[2:] if etag.startswith('W/') else etag for etag in etags}:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        data = profile['data']
+        response = Response(wrap(data) if wrap else data)
+    
+    response['ETag'] = profile['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+    
 class UserProfileView(generics.RetrieveAPIView):
     """Get current user profile"""
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        return get_user_instance(self.request.user)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return cached_profile_response(request)
     
 class UserProfileUpdateView(generics.UpdateAPIView):
     """Update current user profile"""
@@ -58,29 +109,49 @@ class UserProfileUpdateView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # Writes always start from the current row, never a cached snapshot
+        return User.objects.get(pk=self.request.user.pk)
+    
+class AvatarUploadView(generics.GenericAPIView):
+    """Replace the current user's avatar; thumbnails follow asynchronously"""
+    serializer_class = AvatarUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request, *args, **kwargs):
+        # Must be set before request.data is first read
+        request.upload_handlers = [
+            HashingUploadHandler(request, max_bytes=settings.AVATAR_MAX_UPLOAD_BYTES)
+        ]
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.save()
+        return Response(
+            {'avatar': user.avatar.url, 'thumbnails': 'pending'},
+            status=status.HTTP_202_ACCEPTED,
+        )
     
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def logout_view(request):
     """Logout user by blacklisting refresh token"""
     try:
-        refresh_token = request.data["refresh"]
-        token = RefreshToken(refresh_token)
+        token = RefreshToken(request.data["refresh"])
         token.blacklist()
-        return Response({
-            'message': 'Logout successful'
-        }, status=status.HTTP_200_OK)
-    except Exception as e:
+    except (KeyError, TypeError, TokenError):
+        audit.security('logout', user_id=request.user.pk, status='failed')
         return Response({
             'error': 'Invalid token'
         }, status=status.HTTP_400_BAD_REQUEST)
+    audit.security('logout', user_id=request.user.pk)
+    return Response({
+        'message': 'Logout successful'
+    }, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def verify_token_view(request):
     """Verify if token is valid"""
-    return Response({
-        'valid': True,
-        'user': UserProfileSerializer(request.user).data
-    })
\ No newline at end of file
+    return cached_profile_response(
+        request, lambda data: {'valid': True, 'user': data}
+    )
\ No newline at end of file
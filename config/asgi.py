@@ -2,6 +2,7 @@
 ASGI config for aircnc_clone project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the messaging push endpoint.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +14,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up
+from apps.messaging.websocket import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings: ``gunicorn -c config/gunicorn.conf.py config.wsgi``
+
+The application is imported and warmed (``STARTUP_WARM``, core.startup)
+once in the master and workers are forked from it, so they start in
+milliseconds and share the imported code and warmed state copy-on-write
+instead of each holding a private copy.
+
+Workers are threaded (gthread), so one slow request such as a login
+waiting on the password hashing pool (apps.users.hashing) does not hold
+up the whole process.
+"""
+
+import multiprocessing
+import os
+
+from decouple import config
+
+bind = config("GUNICORN_BIND", default="0.0.0.0:8000")
+# Concurrency comes from threads, so fewer processes (and DB connections) than
+# the usual 2 * CPUs + 1
+workers = config("GUNICORN_WORKERS", default=multiprocessing.cpu_count() + 1, cast=int)
+worker_class = "gthread"
+threads = config("GUNICORN_THREADS", default=4, cast=int)
+preload_app = config("GUNICORN_PRELOAD", default=True, cast=bool)
+max_requests = config("GUNICORN_MAX_REQUESTS", default=0, cast=int)
+max_requests_jitter = config("GUNICORN_MAX_REQUESTS_JITTER", default=0, cast=int)
+
+if preload_app:
+    os.environ.setdefault("STARTUP_WARM", "True")
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        # Connections opened while loading must not be inherited by workers
+        from django.db import connections
+
+        connections.close_all()
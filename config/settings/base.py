@@ -3,6 +3,7 @@ Base settings for aircnc_clone project.
 """
 
 from datetime import timedelta
+from decimal import Decimal
 from pathlib import Path
 
 from decouple import Csv, config
@@ -18,6 +19,10 @@ SECRET_KEY = config(
 
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'apps.users.backends.PooledModelBackend',
+]
+
 DEBUG = config("DEBUG", default=False, cast=bool)
 ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="localhost,127.0.0.1", cast=Csv())
 
@@ -48,18 +53,22 @@ LOCAL_APPS = [
     "apps.reviews",
     "apps.messaging",
     "apps.notifications",
+    "apps.audit",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    # Session, CSRF and messages are skipped for Bearer /api/ calls (core.middleware)
+    'core.middleware.APISessionMiddleware',
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
+    'core.middleware.APICsrfViewMiddleware',
     "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    'apps.audit.context.AuditContextMiddleware',
+    'core.middleware.APIMessageMiddleware',
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -135,6 +144,8 @@ SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "sessions"
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True
+# Bearer-authenticated requests under this prefix run without sessions
+API_PATH_PREFIX = "/api/"
 
 
 # Password validation
@@ -155,6 +166,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs on a bounded pool (apps.users.hashing). QUEUE counts
+# in-flight hashes per process and should stay below GUNICORN_THREADS, so
+# that a login burst is answered with 503s instead of occupying every thread
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=2, cast=int)
+PASSWORD_HASHING_QUEUE = config("PASSWORD_HASHING_QUEUE", default=3, cast=int)
+PASSWORD_HASHING_TIMEOUT = config("PASSWORD_HASHING_TIMEOUT", default=10.0, cast=float)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -212,10 +230,16 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
 }
 
+# Redis-backed refresh token blacklist (apps.users.blacklist)
+TOKEN_BLACKLIST_BLOOM_CAPACITY = config("TOKEN_BLACKLIST_BLOOM_CAPACITY", default=100000, cast=int)
+TOKEN_BLACKLIST_SYNC_SECONDS = config("TOKEN_BLACKLIST_SYNC_SECONDS", default=1, cast=float)
+# Each sync re-reads this far back, covering clock skew between hosts and in-flight writes
+TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS = config("TOKEN_BLACKLIST_SYNC_OVERLAP_SECONDS", default=30, cast=float)
+
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.ClaimsJWTAuthentication',
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -224,7 +248,7 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "PAGE_SIZE": 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -233,6 +257,112 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Bookings (apps.bookings.services)
+BOOKING_SERVICE_FEE_RATE = config("BOOKING_SERVICE_FEE_RATE", default="0.12", cast=Decimal)
+BOOKING_TAX_RATE = config("BOOKING_TAX_RATE", default="0.08", cast=Decimal)
+BOOKING_MAX_RETRIES = config("BOOKING_MAX_RETRIES", default=3, cast=int)
+BOOKING_LOCK_TIMEOUT_MS = config("BOOKING_LOCK_TIMEOUT_MS", default=200, cast=int)
+
+# Messaging WebSockets (apps.messaging.websocket): per-connection outbound caps
+MESSAGING_WS_QUEUE_SIZE = config("MESSAGING_WS_QUEUE_SIZE", default=100, cast=int)
+MESSAGING_WS_MAX_BUFFER_BYTES = config("MESSAGING_WS_MAX_BUFFER_BYTES", default=262144, cast=int)
+# Seconds a connection may take to send its {"type": "auth"} message
+MESSAGING_WS_AUTH_TIMEOUT = config("MESSAGING_WS_AUTH_TIMEOUT", default=10, cast=float)
+# Redis server carrying realtime events between workers (apps.messaging.realtime);
+# empty delivers only to connections on the publishing process
+MESSAGING_PUBSUB_URL = config("MESSAGING_PUBSUB_URL", default="redis://localhost:6379/0")
+
+# Unread badges (apps.notifications.unread): periodic repair of the Redis hashes
+# of users touched since the previous run
+UNREAD_RECONCILE_SECONDS = config("UNREAD_RECONCILE_SECONDS", default=900, cast=int)
+
+# Notification delivery (apps.notifications.delivery): per-recipient digest
+# window, SMTP batch size and messages per second
+NOTIFICATION_COALESCE_SECONDS = config("NOTIFICATION_COALESCE_SECONDS", default=30, cast=int)
+NOTIFICATION_FLUSH_CHUNK_SIZE = config("NOTIFICATION_FLUSH_CHUNK_SIZE", default=500, cast=int)
+NOTIFICATION_EMAIL_BATCH_SIZE = config("NOTIFICATION_EMAIL_BATCH_SIZE", default=50, cast=int)
+NOTIFICATION_EMAIL_RATE = config("NOTIFICATION_EMAIL_RATE", default=10, cast=int)
+
+# Audit and security logs (apps.audit): Redis stream buffering, batch
+# inserts and retention by dropping monthly partitions
+AUDIT_FLUSH_SECONDS = config("AUDIT_FLUSH_SECONDS", default=5, cast=int)
+AUDIT_BATCH_SIZE = config("AUDIT_BATCH_SIZE", default=1000, cast=int)
+# Renewed before every batch, so it only has to outlive one slow batch
+AUDIT_DRAIN_LOCK_SECONDS = config("AUDIT_DRAIN_LOCK_SECONDS", default=300, cast=int)
+AUDIT_STREAM_MAXLEN = config("AUDIT_STREAM_MAXLEN", default=1000000, cast=int)
+AUDIT_LOG_RETENTION_MONTHS = config("AUDIT_LOG_RETENTION_MONTHS", default=24, cast=int)
+SECURITY_LOG_RETENTION_MONTHS = config("SECURITY_LOG_RETENTION_MONTHS", default=12, cast=int)
+LOG_PARTITIONS_AHEAD = config("LOG_PARTITIONS_AHEAD", default=2, cast=int)
+
+# Login/registration throttles (apps.users.throttling): attempts per
+# sliding window for each client IP, submitted email and endpoint overall
+AUTH_THROTTLE_WINDOW_SECONDS = config("AUTH_THROTTLE_WINDOW_SECONDS", default=60, cast=int)
+AUTH_THROTTLE_LIMITS = {
+    "ip": config("AUTH_THROTTLE_IP_LIMIT", default=20, cast=int),
+    "email": config("AUTH_THROTTLE_EMAIL_LIMIT", default=10, cast=int),
+    "global": config("AUTH_THROTTLE_GLOBAL_LIMIT", default=6000, cast=int),
+}
+AUTH_THROTTLE_DENY_SECONDS = config("AUTH_THROTTLE_DENY_SECONDS", default=10, cast=int)
+
+# Avatars (apps.users.avatars): upload caps and WebP thumbnail sizes in pixels
+AVATAR_MAX_UPLOAD_BYTES = config("AVATAR_MAX_UPLOAD_BYTES", default=10 * 1024 * 1024, cast=int)
+AVATAR_MAX_PIXELS = config("AVATAR_MAX_PIXELS", default=40_000_000, cast=int)
+AVATAR_THUMBNAIL_SIZES = (64, 160, 400)
+AVATAR_THUMBNAIL_QUALITY = config("AVATAR_THUMBNAIL_QUALITY", default=80, cast=int)
+
+# Property images (apps.properties.images): per-request caps, decode threads,
+# listing thumbnail box in pixels and the dHash distance treated as a duplicate
+PROPERTY_IMAGE_MAX_UPLOAD_BYTES = config("PROPERTY_IMAGE_MAX_UPLOAD_BYTES", default=15 * 1024 * 1024, cast=int)
+PROPERTY_IMAGE_MAX_FILES = config("PROPERTY_IMAGE_MAX_FILES", default=50, cast=int)
+PROPERTY_IMAGE_MAX_PIXELS = config("PROPERTY_IMAGE_MAX_PIXELS", default=40_000_000, cast=int)
+PROPERTY_IMAGE_WORKERS = config("PROPERTY_IMAGE_WORKERS", default=4, cast=int)
+PROPERTY_IMAGE_DUPLICATE_DISTANCE = config("PROPERTY_IMAGE_DUPLICATE_DISTANCE", default=4, cast=int)
+PROPERTY_THUMBNAIL_SIZE = (480, 320)
+PROPERTY_THUMBNAIL_QUALITY = config("PROPERTY_THUMBNAIL_QUALITY", default=80, cast=int)
+
+# Startup (core.startup): warm lazy URL, model, serializer and translation
+# state when the WSGI application loads; pair with gunicorn's preload_app
+STARTUP_WARM = config("STARTUP_WARM", default=False, cast=bool)
+
+# Reverse proxies allowed to append to X-Forwarded-For (core.http.client_ip)
+TRUSTED_PROXY_COUNT = config("TRUSTED_PROXY_COUNT", default=0, cast=int)
+
+# Image work is CPU bound; run it on its own prefork (process pool) worker:
+#   celery -A config worker -Q images --pool=prefork
+CELERY_TASK_ROUTES = {
+    "apps.users.tasks.generate_avatar_thumbnails": {"queue": "images"},
+}
+
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-unread-counters": {
+        "task": "apps.notifications.tasks.reconcile_unread_counters",
+        "schedule": UNREAD_RECONCILE_SECONDS,
+    },
+    # Safety net for flushes lost with a worker; normally each window schedules its own
+    "flush-notifications": {
+        "task": "apps.notifications.tasks.flush_notifications",
+        "schedule": NOTIFICATION_COALESCE_SECONDS * 2,
+    },
+    "flush-audit-events": {
+        "task": "apps.audit.tasks.flush_audit_events",
+        "schedule": AUDIT_FLUSH_SECONDS,
+    },
+    "maintain-log-partitions": {
+        "task": "apps.audit.tasks.maintain_log_partitions",
+        "schedule": 60 * 60 * 24,
+    },
+}
+
+# Request metrics (core.metrics)
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=10.0, cast=float)
+# Reported percentiles cover the last METRICS_WINDOW_SECONDS, summed from
+# per-slot Redis hashes that expire shortly after leaving the window
+METRICS_WINDOW_SECONDS = config("METRICS_WINDOW_SECONDS", default=15 * 60, cast=int)
+METRICS_WINDOW_BUCKET_SECONDS = config("METRICS_WINDOW_BUCKET_SECONDS", default=60, cast=int)
+METRICS_SLOW_REQUEST_MS = config("METRICS_SLOW_REQUEST_MS", default=500.0, cast=float)
+METRICS_SQL_SAMPLE_RATE = config("METRICS_SQL_SAMPLE_RATE", default=0.01, cast=float)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
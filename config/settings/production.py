@@ -9,21 +9,42 @@ DEBUG = False
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=Csv())
 
 # Database - PostgreSQL with PostGIS
+# DB_POOL_MODE:
+#   persistent - one long-lived connection per worker thread (CONN_MAX_AGE)
+#   pool       - bounded in-process pool per gunicorn worker (core.db.pool)
+#   pgbouncer  - DB_HOST/DB_PORT point at a local PgBouncer in transaction mode
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'ENGINE': 'core.db.backends.postgis',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
         'OPTIONS': {
-            'conn_max_age': 600,  # Connection reuse for 10 minutes
-            'conn_health_checks': True,  # Verify connections are healthy
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
         }
     }
 }
 
+if DB_POOL_MODE == 'pool':
+    # Connections go back to the pool at the end of every request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'max_size': config('DB_POOL_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=5.0, cast=float),
+        'health_check_interval': config('DB_POOL_HEALTH_CHECK_INTERVAL', default=30.0, cast=float),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600.0, cast=float),
+        'slow_wait': config('DB_POOL_SLOW_WAIT', default=0.1, cast=float),
+    }
+elif DB_POOL_MODE == 'pgbouncer':
+    # Transaction pooling cannot keep named cursors across transactions
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 # Cache Configuration - Production Redis
 CACHES = {
     'default': {
@@ -55,6 +76,9 @@ CACHES = {
     }
 }
 
+# Realtime pub/sub; may be its own Redis so chat traffic does not compete with the cache
+MESSAGING_PUBSUB_URL = config('MESSAGING_PUBSUB_URL', default=config('REDIS_URL'))
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -99,6 +123,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'console_verbose': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -115,6 +144,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'aircnc_clone.performance': {
+            'handlers': ['console_verbose', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -38,6 +38,9 @@ CACHES = {
     }
 }
 
+# Realtime events stay in this process
+MESSAGING_PUBSUB_URL = ''
+
 # Use dummy session backend for tests
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
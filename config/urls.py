@@ -18,9 +18,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 
+from core.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.users.urls')),
+    path('api/properties/', include('apps.properties.urls')),
+    path('api/bookings/', include('apps.bookings.urls')),
+    path('api/messaging/', include('apps.messaging.urls')),
+    path('api/notifications/', include('apps.notifications.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.STARTUP_WARM:
+    # Under gunicorn's preload_app this runs once in the master (core.startup)
+    from core.startup import warm
+
+    warm()
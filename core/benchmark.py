@@ -0,0 +1,33 @@
+"""Helpers shared by the load/stress management commands"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def throwaway_database():
+    """Run against a fresh test database built from the current settings"""
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        # A file database lets worker threads share data and wait on locks
+        test_settings['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
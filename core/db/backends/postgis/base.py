@@ -0,0 +1,64 @@
+"""
+PostGIS backend with optional in-process connection pooling.
+
+``DATABASES[alias]['POOL']`` configures the pool; when it is missing the
+backend behaves like the stock PostGIS backend plus connection health
+checks on persistent connections.
+"""
+
+from django.contrib.gis.db.backends.postgis.base import (
+    DatabaseWrapper as PostGISDatabaseWrapper,
+)
+
+from core.db.pool import existing_pool, get_pool
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+    health_check_done = False
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get('POOL') or None
+
+    def get_new_connection(self, conn_params):
+        if self.pool_options is None:
+            return super().get_new_connection(conn_params)
+
+        pool = get_pool(
+            self.alias,
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            **self.pool_options,
+        )
+        return pool.getconn()
+
+    def _close(self):
+        if self.pool_options is None or self.connection is None:
+            return super()._close()
+
+        pool = existing_pool(self.alias)
+        with self.wrap_database_errors:
+            if pool is None:
+                self.connection.close()
+            else:
+                pool.putconn(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Re-check the connection on its first use in the next request
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -0,0 +1,176 @@
+"""
+Small bounded connection pool, one per process and database alias.
+
+Pools are created lazily after gunicorn forks and are discarded if the
+process id changes, so connections are never shared across workers.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger('aircnc_clone')
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, factory, max_size=10, timeout=5.0, health_check_interval=30.0,
+                 max_lifetime=3600.0, slow_wait=0.1):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+        self.slow_wait = slow_wait
+
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'total_wait_ms': round(self.total_wait * 1000, 3),
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
+
+    def getconn(self):
+        started = time.monotonic()
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available after {self.timeout}s '
+                        f'(pool size {self.max_size})'
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - started
+            self.checkouts += 1
+            if waited > 0.001:
+                self.waits += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+            if self._idle:
+                connection, idle_since = self._idle.pop()
+            else:
+                connection, idle_since = None, None
+                self._size += 1
+
+        if waited >= self.slow_wait:
+            logger.warning('Waited %.1f ms for a pooled database connection', waited * 1000)
+
+        if connection is not None and self._is_healthy(connection, idle_since):
+            return connection
+        if connection is not None:
+            self._discard(connection, reopen=True)
+
+        try:
+            connection = self.factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def putconn(self, connection):
+        if id(connection) not in self._created_at:
+            # Not ours, e.g. inherited from the parent process before fork
+            connection.close()
+            return
+
+        if connection.closed or self._expired(connection):
+            self._discard(connection)
+            return
+
+        # Never hand out a connection that is still inside a transaction
+        if connection.get_transaction_status() != 0:
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                return
+
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def _expired(self, connection):
+        created_at = self._created_at.get(id(connection), 0)
+        return time.monotonic() - created_at > self.max_lifetime
+
+    def _is_healthy(self, connection, idle_since):
+        if connection.closed or self._expired(connection):
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection, reopen=False):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+        if reopen:
+            # The slot stays reserved for the replacement connection
+            return
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory, **options):
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(factory, **options)
+        return _pools[alias]
+
+
+def existing_pool(alias):
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            return None
+        return _pools.get(alias)
+
+
+def pool_stats():
+    with _pools_lock:
+        return {alias: pool.stats() for alias, pool in _pools.items()}
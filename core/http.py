@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def client_ip(request):
+    """
+    The client address, trusting only the ``TRUSTED_PROXY_COUNT`` proxies
+    in front of us to have appended to X-Forwarded-For.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get('REMOTE_ADDR')
@@ -0,0 +1,220 @@
+"""
+In-process request metrics with periodic flush to Redis.
+
+Each worker records into log-linear (HDR-style) histograms keyed by URL
+name. Every ``METRICS_FLUSH_INTERVAL`` seconds the bucket counts are added
+to Redis hashes, where they merge with every other worker's counts. Those
+hashes are per ``METRICS_WINDOW_BUCKET_SECONDS`` time slot and expire, and
+reports sum the slots of the last ``METRICS_WINDOW_SECONDS`` only.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+METRICS_VIEWS_KEY = 'metrics:views'
+HISTOGRAMS = ('wall_ms', 'db_ms', 'db_queries', 'response_bytes')
+COUNTERS = ('requests', 'cache_hits', 'cache_misses')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def time_slot(now=None):
+    return int((time.time() if now is None else now) // settings.METRICS_WINDOW_BUCKET_SECONDS)
+
+
+def views_key(slot):
+    return cache.make_key(f'{METRICS_VIEWS_KEY}:{slot}')
+
+
+def metric_key(slot, view_name, name):
+    return cache.make_key(f'metrics:{slot}:{view_name}:{name}')
+
+
+def bucket_for(value):
+    """Round ``value`` down to two significant digits (about 1% error)"""
+    if value < 100:
+        return int(value)
+    magnitude = 10 ** (int(math.log10(value)) - 1)
+    return int(value // magnitude * magnitude)
+
+
+class Histogram:
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else defaultdict(int)
+
+    def record(self, value):
+        self.counts[bucket_for(value)] += 1
+
+    def percentile(self, pct):
+        total = sum(self.counts.values())
+        if not total:
+            return 0
+        threshold = total * pct / 100.0
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= threshold:
+                return bucket
+        return max(self.counts)
+
+
+class RequestMetrics:
+    """Per-request collector, reachable from anywhere through a contextvar"""
+
+    def __init__(self, capture_sql=False):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.capture_sql = capture_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # Used as a connection.execute_wrapper()
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.monotonic() - started
+            self.db_queries += 1
+            self.db_seconds += elapsed
+            if self.capture_sql:
+                self.queries.append((elapsed * 1000, sql))
+
+
+def start_request(capture_sql=False):
+    metrics = RequestMetrics(capture_sql)
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_cache(hit):
+    """Called by cache helpers so hits/misses show up per view"""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._flushed_at = time.monotonic()
+
+    def _reset(self):
+        self.histograms = defaultdict(lambda: defaultdict(Histogram))
+        self.counters = defaultdict(lambda: defaultdict(int))
+
+    def observe(self, view_name, wall_ms, metrics, response_bytes):
+        with self._lock:
+            histograms = self.histograms[view_name]
+            histograms['wall_ms'].record(wall_ms)
+            histograms['db_ms'].record(metrics.db_seconds * 1000)
+            histograms['db_queries'].record(metrics.db_queries)
+            histograms['response_bytes'].record(response_bytes)
+
+            counters = self.counters[view_name]
+            counters['requests'] += 1
+            counters['cache_hits'] += metrics.cache_hits
+            counters['cache_misses'] += metrics.cache_misses
+
+        if time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            histograms, counters = self.histograms, self.counters
+            self._reset()
+            self._flushed_at = time.monotonic()
+
+        if not histograms or not hasattr(cache, 'client'):
+            return
+
+        # Counts land in the slot they are flushed in, at most one flush
+        # interval after they were observed
+        slot = time_slot()
+        # Kept one slot past the window so a report never sees a partial expiry
+        ttl = settings.METRICS_WINDOW_SECONDS + settings.METRICS_WINDOW_BUCKET_SECONDS
+        pipe = cache.client.get_client(write=True).pipeline(transaction=False)
+        pipe.sadd(views_key(slot), *histograms)
+        pipe.expire(views_key(slot), ttl)
+        for view_name, named in histograms.items():
+            for name, histogram in named.items():
+                key = metric_key(slot, view_name, name)
+                for bucket, count in histogram.counts.items():
+                    pipe.hincrby(key, bucket, count)
+                pipe.expire(key, ttl)
+            key = metric_key(slot, view_name, 'counters')
+            for name, value in counters[view_name].items():
+                pipe.hincrby(key, name, value)
+            pipe.expire(key, ttl)
+        pipe.execute()
+
+
+registry = MetricsRegistry()
+
+
+def summarize(histograms, counters):
+    summary = {name: counters.get(name, 0) for name in COUNTERS}
+    for name in HISTOGRAMS:
+        histogram = histograms.get(name) or Histogram()
+        summary[name] = {
+            f'p{pct}': histogram.percentile(pct) for pct in (50, 95, 99)
+        }
+    return summary
+
+
+def window_slots():
+    """Time slots covering the last ``METRICS_WINDOW_SECONDS``, newest first"""
+    current = time_slot()
+    count = max(1, math.ceil(settings.METRICS_WINDOW_SECONDS / settings.METRICS_WINDOW_BUCKET_SECONDS))
+    return range(current, current - count, -1)
+
+
+def cluster_summary():
+    """Percentiles per view across all workers, over the recent window only"""
+    if not hasattr(cache, 'client'):
+        return {}
+
+    client = cache.client.get_client(write=False)
+    slots = window_slots()
+    pipe = client.pipeline(transaction=False)
+    for slot in slots:
+        pipe.smembers(views_key(slot))
+    view_names = sorted({raw.decode() for members in pipe.execute() for raw in members})
+
+    names = (*HISTOGRAMS, 'counters')
+    pipe = client.pipeline(transaction=False)
+    for view_name in view_names:
+        for name in names:
+            for slot in slots:
+                pipe.hgetall(metric_key(slot, view_name, name))
+    replies = iter(pipe.execute())
+
+    result = {}
+    for view_name in view_names:
+        merged = {name: defaultdict(int) for name in names}
+        for name in names:
+            for slot in slots:
+                for key, value in next(replies).items():
+                    merged[name][key] += int(value)
+        histograms = {
+            name: Histogram({int(k): v for k, v in merged[name].items()})
+            for name in HISTOGRAMS
+        }
+        counters = {k.decode(): v for k, v in merged['counters'].items()}
+        result[view_name] = summarize(histograms, counters)
+    return result
@@ -0,0 +1,112 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connections
+from django.middleware.csrf import CsrfViewMiddleware
+
+from core import metrics
+
+logger = logging.getLogger('aircnc_clone.performance')
+
+
+class PerformanceMiddleware:
+    """Record wall time, DB and cache usage and response size per URL name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        capture_sql = random.random() < settings.METRICS_SQL_SAMPLE_RATE
+        request_metrics, token = metrics.start_request(capture_sql)
+        started = time.monotonic()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+
+        wall_ms = (time.monotonic() - started) * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+        metrics.registry.observe(view_name, wall_ms, request_metrics, size)
+
+        if capture_sql and wall_ms >= settings.METRICS_SLOW_REQUEST_MS:
+            self.log_slow_request(request, view_name, wall_ms, request_metrics)
+        return response
+
+    def log_slow_request(self, request, view_name, wall_ms, request_metrics):
+        lines = [
+            f'{ms:.1f}ms {sql}'
+            for ms, sql in sorted(request_metrics.queries, reverse=True)
+        ]
+        logger.warning(
+            'Slow request %s %s (%s) %.1fms, %d queries in %.1fms\n%s',
+            request.method, request.path, view_name, wall_ms,
+            request_metrics.db_queries, request_metrics.db_seconds * 1000,
+            '\n'.join(lines),
+        )
+
+
+def is_token_api_request(request):
+    """A Bearer-authenticated API call, which never needs a session"""
+    return (
+        request.path_info.startswith(settings.API_PATH_PREFIX)
+        and request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer ')
+    )
+
+
+class APISessionMiddleware(SessionMiddleware):
+    """SessionMiddleware that neither loads nor saves a session for token API calls"""
+
+    def process_request(self, request):
+        if is_token_api_request(request):
+            # Empty and never accessed from storage, so no session cache round trips
+            request.session = self.SessionStore()
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_token_api_request(request):
+            return response
+        return super().process_response(request, response)
+
+
+class APICsrfViewMiddleware(CsrfViewMiddleware):
+    """CSRF protects cookie auth; a Bearer header cannot be sent cross-site"""
+
+    def process_request(self, request):
+        if not is_token_api_request(request):
+            return super().process_request(request)
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if not is_token_api_request(request):
+            return super().process_view(request, callback, callback_args, callback_kwargs)
+
+    def process_response(self, request, response):
+        if is_token_api_request(request):
+            return response
+        return super().process_response(request, response)
+
+
+class APIMessageMiddleware(MessageMiddleware):
+    """Flash messages are an admin/template feature; token API calls skip them"""
+
+    def process_request(self, request):
+        if not is_token_api_request(request):
+            super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_token_api_request(request):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,233 @@
+"""
+Keyset pagination for list endpoints.
+
+Pages are fetched with ``WHERE (ordering) < (last row seen)`` instead of
+OFFSET, so page 1000 costs the same index range scan as page 1. Cursors
+are signed and opaque to clients. Counting is opt-in per view because an
+exact COUNT(*) is usually the most expensive query of a list request.
+"""
+
+from collections import OrderedDict
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_SALT = 'core.pagination'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over any ordering of model columns.
+
+    NULLs sort as larger than every value, so last ascending and first
+    descending (PostgreSQL's default, made explicit so SQLite agrees), and
+    the cursor condition includes or excludes them to match.
+
+    Orderings may name columns of forward related models, e.g.
+    ``property__title``; anything else (expressions, reverse or
+    many-valued relations) is answered with a 400.
+
+    Views may set ``keyset_ordering`` (defaults to the queryset or model
+    ordering) and ``pagination_count`` to ``'exact'`` or ``'estimate'``;
+    the primary key is always appended as a tiebreaker.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    default_ordering = ('-pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = self.get_count(queryset, getattr(view, 'pagination_count', None))
+
+        queryset = queryset.order_by(*self.order_by(queryset.model))
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(queryset.model, self.decode_cursor(cursor)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        fields = [('next', self.get_next_link())]
+        if self.count is not None:
+            fields.append(('count', self.count))
+        fields.append(('results', data))
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if view is not None:
+            if OrderingFilter in getattr(view, 'filter_backends', ()):
+                ordering = OrderingFilter().get_ordering(request, queryset, view)
+            ordering = ordering or getattr(view, 'keyset_ordering', None)
+        ordering = list(
+            ordering or queryset.query.order_by or queryset.model._meta.ordering
+            or self.default_ordering
+        )
+        for field in ordering:
+            try:
+                resolve_field(queryset.model, field.lstrip('-'))
+            except (AttributeError, LookupError, FieldDoesNotExist):
+                raise ValidationError({
+                    api_settings.ORDERING_PARAM: f'Cannot paginate by {field!r}.'
+                })
+        pk_names = ('pk', queryset.model._meta.pk.name)
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            last = ordering[-1]
+            ordering.append('-pk' if last.startswith('-') else 'pk')
+        return ordering
+
+    def get_count(self, queryset, mode):
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def order_by(self, model):
+        expressions = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if not resolve_field(model, name)[1]:
+                expressions.append(field)
+            elif field.startswith('-'):
+                expressions.append(F(name).desc(nulls_first=True))
+            else:
+                expressions.append(F(name).asc(nulls_last=True))
+        return expressions
+
+    def after(self, model, values):
+        """``Q`` matching rows strictly after ``values`` in ``self.ordering``"""
+        condition = None
+        for field, raw in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            column, nullable = resolve_field(model, name)
+            if raw is None:
+                if not nullable:
+                    raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+                # NULLs are last ascending, so only descending has rows beyond them
+                beyond = Q(**{f'{name}__isnull': False}) if descending else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                try:
+                    value = column.to_python(raw)
+                except (DjangoValidationError, ValueError, TypeError):
+                    raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+                beyond = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if nullable and not descending:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if condition is None:
+                condition = beyond if beyond is not None else Q(pk__in=[])
+            elif beyond is None:
+                condition = same & condition
+            else:
+                condition = beyond | (same & condition)
+        return condition
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            parts = field.lstrip('-').split(LOOKUP_SEP)
+            owner = obj
+            for part in parts[:-1]:
+                owner = getattr(owner, part) if owner is not None else None
+            if owner is None:
+                values.append(None)
+                continue
+            column, _ = resolve_field(type(owner), parts[-1])
+            value = column.value_from_object(owner)
+            values.append(None if value is None else column.value_to_string(owner))
+        return signing.dumps([self.ordering, values], salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            ordering, values = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, ValueError, TypeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+        if ordering != self.ordering:
+            raise ValidationError({self.cursor_query_param: 'Cursor does not match the ordering'})
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+
+def resolve_field(model, name):
+    """
+    ``(field, nullable)`` for an ordering name, following forward
+    many-to-one and one-to-one relations. A relation itself is accepted
+    only by its column name (``property_id``), since ordering by
+    ``property`` would sort by the related model's ordering instead.
+    Raises ``LookupError`` or ``FieldDoesNotExist`` for anything else.
+    """
+    *path, last = name.split(LOOKUP_SEP)
+    nullable = False
+    for part in path:
+        field = model._meta.get_field(part)
+        if not (field.concrete and (field.many_to_one or field.one_to_one)):
+            raise LookupError(name)
+        nullable = nullable or field.null
+        model = field.related_model
+    field = model._meta.pk if last == 'pk' else model._meta.get_field(last)
+    if not field.concrete or (field.is_relation and last not in ('pk', field.attname)):
+        raise LookupError(name)
+    return field, nullable or field.null
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate on PostgreSQL: ``pg_class.reltuples`` for a whole
+    table, EXPLAIN's estimate for a filtered queryset. Exact elsewhere.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            estimate = cursor.fetchone()[0]
+        else:
+            sql, params = queryset.values('pk').query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            estimate = cursor.fetchone()[0][0]['Plan']['Plan Rows']
+    # reltuples is -1 for a table that has never been analyzed
+    return max(int(estimate), 0)
@@ -0,0 +1,297 @@
+"""
+SQL query budgets per API endpoint.
+
+Every named URL under ``API_PATH_PREFIX`` is called through the test
+client against fixtures seeded at a small and a large size, where
+everything the actors can list grows with the size. An endpoint fails
+when its query count grows with the data (an N+1) or exceeds its entry
+in ``query_budgets.json``. The ``check_query_budgets`` command rewrites
+that file on purpose, so count changes show up in review diffs, and
+core.tests runs the same check in the test suite.
+"""
+
+import datetime
+import io
+import json
+import random
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking
+from apps.messaging.models import Conversation, ConversationParticipant, Message
+from apps.notifications.models import Notification
+from apps.properties.indexing import index_properties
+from apps.properties.models import Address, Amenity, Property, PropertyImage
+from apps.reviews.services import create_review, moderate_review
+from apps.users.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+DEFAULT_SIZES = (2, 6)
+
+PASSWORD = 'Budget-Pass-123!'
+BUDGETS_PATH = Path(settings.BASE_DIR) / 'query_budgets.json'
+
+
+def noise_image(seed):
+    """A PNG upload whose difference hash differs from other seeds"""
+    rnd = random.Random(seed)
+    image = Image.new('L', (9, 8))
+    image.putdata([rnd.randrange(256) for _ in range(72)])
+    buffer = io.BytesIO()
+    image.resize((360, 320), Image.NEAREST).save(buffer, 'PNG')
+    buffer.seek(0)
+    buffer.name = f'budget-{seed}.png'
+    return buffer
+
+
+def seed(size):
+    """Fixtures where everything the actors can list grows with ``size``"""
+    users = {
+        name: User.objects.create_user(
+            email=f'{name}@budget.local', username=name, password=PASSWORD, **extra
+        )
+        for name, extra in (
+            ('guest', {}), ('host', {'user_type': 'host'}),
+            ('admin', {'is_staff': True, 'is_superuser': True}),
+        )
+    }
+    guest, host = users['guest'], users['host']
+    amenities = [Amenity.objects.create(name=f'Amenity {i}') for i in range(size)]
+
+    properties = []
+    for i in range(size + 1):
+        address = Address.objects.create(
+            street_address=f'{i} Budget Street', city='Hanoi', country='VN',
+            latitude=21 + i / 1000, longitude=105 + i / 1000,
+        )
+        prop = Property.objects.create(
+            host=host, address=address, title=f'Budget home {i}', slug=f'budget-home-{i}',
+            property_type='house', base_price_per_night=Decimal('100'), status='active',
+            max_guests=4,
+        )
+        prop.amenities.set(amenities)
+        properties.append(prop)
+    gallery = properties[0]
+    PropertyImage.objects.bulk_create([
+        PropertyImage(
+            property=gallery, image=f'properties/seed/{i}.png', thumbnail=f'properties/thumbs/{i}.webp',
+            content_hash=f'{i:064x}', perceptual_hash=(i * 0x5DEECE66D) % (1 << 63),
+            width=360, height=320, is_primary=i == 0, display_order=i,
+        )
+        for i in range(size)
+    ])
+
+    start = datetime.date.today() + datetime.timedelta(days=30)
+    bookings = []
+    for i in range(size):
+        check_in = start + datetime.timedelta(days=3 * i)
+        bookings.append(Booking.objects.create(
+            guest=guest, property=properties[i % len(properties)],
+            check_in_date=check_in, check_out_date=check_in + datetime.timedelta(days=2),
+            nights=2, price_per_night=Decimal('100'), subtotal=Decimal('200'),
+            total_amount=Decimal('200'), status='confirmed',
+        ))
+        review = create_review(bookings[-1], guest.pk, 'guest_to_property', 4 + i % 2)
+        moderate_review(review, 'approved')
+
+    conversations = []
+    for i in range(size):
+        conversation = Conversation.objects.create(property=properties[i % len(properties)])
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(conversation=conversation, user=user) for user in (guest, host)
+        ])
+        Message.objects.bulk_create([
+            Message(conversation=conversation, sender=(guest, host)[j % 2], content=f'Message {j}')
+            for j in range(size)
+        ])
+        conversations.append(conversation)
+
+    Notification.objects.bulk_create([
+        Notification(
+            recipient=guest, notification_type='booking_confirmed',
+            title=f'Booking {i} confirmed', booking=bookings[i % len(bookings)],
+        )
+        for i in range(size)
+    ])
+    index_properties([prop.pk for prop in properties])
+    return {
+        'users': users,
+        'properties': properties,
+        'gallery': gallery,
+        'images': list(gallery.images.values_list('pk', flat=True)),
+        'bookings': bookings,
+        'conversations': conversations,
+        'free_property': properties[-1],
+        'free_date': start + datetime.timedelta(days=3 * size + 30),
+    }
+
+
+def scenarios(fx):
+    """``(url name, method, expected status, actor, url kwargs, data)`` in the order they run"""
+    gallery, images = fx['gallery'].pk, fx['images']
+    conversation = fx['conversations'][0].pk
+    check_in = fx['free_date']
+    search = {'lat': 21, 'lng': 105, 'radius_km': 50}
+    return [
+        ('users:register', 'post', 201, None, {}, {
+            'email': 'new@budget.local', 'username': 'new',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        }),
+        ('users:login', 'post', 200, None, {}, {'email': 'guest@budget.local', 'password': PASSWORD}),
+        ('users:token_refresh', 'post', 200, None, {}, {'refresh': fx['refresh']}),
+        ('users:verify_token', 'get', 200, 'guest', {}, None),
+        ('users:profile', 'get', 200, 'guest', {}, None),
+        ('users:profile_update', 'patch', 200, 'guest', {}, {'bio': 'Budget run'}),
+        ('users:profile_avatar', 'post', 202, 'guest', {}, {'avatar': noise_image(0)}),
+        ('properties:search_nearby', 'get', 200, None, {}, search),
+        ('properties:search_nearby', 'get', 200, None, {}, {
+            **search, 'check_in': check_in, 'check_out': check_in + datetime.timedelta(days=2),
+        }),
+        ('properties:search_viewport', 'get', 200, None, {}, {
+            'south': 20, 'west': 104, 'north': 22, 'east': 106,
+        }),
+        ('properties:image_list', 'get', 200, 'host', {'property_pk': gallery}, None),
+        ('properties:image_list', 'post', 201, 'host', {'property_pk': gallery}, {
+            'images': [noise_image(1), noise_image(2)],
+        }),
+        # Built when it runs, after the upload above added to the gallery
+        ('properties:image_order', 'post', 200, 'host', {'property_pk': gallery}, lambda: {
+            'order': list(fx['gallery'].images.values_list('pk', flat=True))[::-1],
+        }),
+        ('properties:image_detail', 'get', 200, 'host', {'property_pk': gallery, 'pk': images[-1]}, None),
+        ('properties:image_detail', 'patch', 200, 'host', {'property_pk': gallery, 'pk': images[-1]}, {
+            'caption': 'Budget', 'is_primary': True,
+        }),
+        ('properties:image_detail', 'delete', 204, 'host', {'property_pk': gallery, 'pk': images[-1]}, None),
+        ('bookings:list_create', 'get', 200, 'guest', {}, None),
+        ('bookings:list_create', 'post', 201, 'guest', {}, {
+            'property': fx['free_property'].pk, 'check_in_date': check_in,
+            'check_out_date': check_in + datetime.timedelta(days=2), 'guests_count': 2,
+        }),
+        ('bookings:cancel', 'post', 200, 'guest', {'pk': fx['bookings'][0].pk}, {'reason': 'Budget run'}),
+        ('messaging:conversations', 'get', 200, 'guest', {}, None),
+        ('messaging:conversations', 'post', 201, 'guest', {}, {
+            'property': fx['free_property'].pk, 'content': 'Is it free?',
+        }),
+        ('messaging:messages', 'get', 200, 'guest', {'pk': conversation}, None),
+        ('messaging:messages', 'post', 201, 'guest', {'pk': conversation}, {'content': 'Hello'}),
+        ('messaging:mark_read', 'post', 200, 'guest', {'pk': conversation}, None),
+        ('notifications:list', 'get', 200, 'guest', {}, None),
+        ('notifications:unread', 'get', 200, 'guest', {}, None),
+        ('notifications:mark_read', 'post', 200, 'guest', {}, {}),
+        ('metrics', 'get', 200, 'admin', {}, None),
+        ('users:logout', 'post', 200, 'guest', {}, {'refresh': fx['logout_refresh']}),
+    ]
+
+
+def measure(size):
+    """``{"METHOD url name": (queries, error or None)}``; seeds the current, empty database"""
+    results = {}
+    ContentType.objects.clear_cache()
+    for cache in caches.all():
+        cache.clear()
+    fx = seed(size)
+    # Issued like login does, so the access tokens carry the same claims
+    issue = CustomTokenObtainPairSerializer.get_token
+    fx['refresh'], fx['logout_refresh'] = (str(issue(fx['users']['guest'])) for _ in range(2))
+    tokens = {name: str(issue(user).access_token) for name, user in fx['users'].items()}
+    client = APIClient()
+    for name, method, expected, actor, kwargs, data in scenarios(fx):
+        if callable(data):
+            data = data()
+        client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {tokens[actor]}'} if actor else {}))
+        multipart = isinstance(data, dict) and any(
+            hasattr(value, 'read') or isinstance(value, list) and value and hasattr(value[0], 'read')
+            for value in data.values()
+        )
+        request = getattr(client, method)
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'get':
+                response = request(reverse(name, kwargs=kwargs), data)
+            else:
+                response = request(
+                    reverse(name, kwargs=kwargs), data,
+                    format='multipart' if multipart else 'json',
+                )
+        error = None
+        if response.status_code != expected:
+            error = f"expected HTTP {expected}, got {response.status_code}"
+        key = f"{method.upper()} {name}"
+        if key in results:
+            # Several requests to one endpoint: keep the most expensive
+            queries_count = max(results[key][0], len(queries))
+            error = results[key][1] or error
+        else:
+            queries_count = len(queries)
+        results[key] = (queries_count, error)
+    return results
+
+
+def api_endpoints(resolver=None, prefix='/', namespace=None):
+    """``namespace:name`` of every named URL served under ``API_PATH_PREFIX``"""
+    for pattern in (resolver or get_resolver()).url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            nested = ':'.join(filter(None, (namespace, pattern.namespace))) or None
+            yield from api_endpoints(pattern, route, nested)
+        elif pattern.name and route.startswith(settings.API_PATH_PREFIX):
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+def load_budgets(path=BUDGETS_PATH):
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def write_budgets(counts, path=BUDGETS_PATH):
+    """Store the larger count of each endpoint as its budget"""
+    budgets = {key: max(by_size.values()) for key, by_size in sorted(counts.items())}
+    Path(path).write_text(json.dumps(budgets, indent=2) + '\n')
+    return budgets
+
+
+def evaluate(measured, budgets=None):
+    """
+    Compare ``{size: measure(size)}`` for two sizes with ``budgets`` (None
+    skips the budget check). Returns ``(counts, rows, problems)`` where
+    counts is ``{key: {size: queries}}`` and each row is
+    ``(key, small count, large count, budget, status)``.
+    """
+    small, large = sorted(measured)
+    counts = {}
+    problems = []
+    for size in (small, large):
+        for key, (queries, error) in measured[size].items():
+            counts.setdefault(key, {})[size] = queries
+            if error:
+                problems.append(f"{key} at size {size}: {error}")
+
+    covered = {key.split(' ', 1)[1] for key in counts}
+    problems += [f"{name} has no scenario" for name in api_endpoints() if name not in covered]
+
+    rows = []
+    for key, by_size in sorted(counts.items()):
+        budget = budgets.get(key) if budgets is not None else None
+        status = 'ok'
+        if by_size[large] > by_size[small]:
+            status = 'grows'
+            problems.append(f"{key} grows with data: {by_size[small]} -> {by_size[large]} queries")
+        elif budgets is not None and budget is None:
+            status = 'no budget'
+            problems.append(f"{key} has no budget; run check_query_budgets --update")
+        elif budgets is not None and by_size[large] > budget:
+            status = 'over'
+            problems.append(f"{key} uses {by_size[large]} queries, budget is {budget}")
+        rows.append((key, by_size[small], by_size[large], budget, status))
+    return counts, rows, problems
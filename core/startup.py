@@ -0,0 +1,130 @@
+"""
+Fork-friendly boot.
+
+Django builds a lot of state lazily on first use: URL pattern regexes and
+reverse maps, model ``_meta`` field caches, DRF settings classes,
+serializer field introspection and the translation catalog. Left to the
+first requests, every gunicorn worker builds its own copy. With
+``preload_app`` (config/gunicorn.conf.py) and ``STARTUP_WARM``, ``warm``
+does all of it once in the master, so workers fork ready to serve and
+share those pages copy-on-write. ``gc.freeze`` then keeps the collector
+in the workers from touching, and so copying, the shared objects.
+
+The ``profile_startup`` command measures the effect.
+"""
+
+import gc
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+from rest_framework.serializers import BaseSerializer
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+def memory_kb():
+    """``(rss, private)`` of this process in KiB; private is what a fork does not share"""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in ('Rss', 'Private_Clean', 'Private_Dirty'):
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        import resource
+
+        # Peak rather than current RSS outside Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, None
+    return values['Rss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def url_patterns(resolver=None):
+    """Every URLPattern and URLResolver below ``resolver``"""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        yield pattern
+        if isinstance(pattern, URLResolver):
+            yield from url_patterns(pattern)
+
+
+def warm_urls():
+    resolver = get_resolver()
+    for pattern in url_patterns(resolver):
+        # Compiled on first access and cached on the pattern
+        pattern.pattern.regex
+    # Populates reverse_dict, namespace_dict and app_dict of every included resolver
+    resolver.reverse_dict
+
+
+def warm_models():
+    for model in apps.get_models(include_auto_created=True):
+        opts = model._meta
+        opts.get_fields()
+        opts._property_names
+        opts._forward_fields_map
+        opts.fields_map
+        opts.db_returning_fields
+
+
+def serializer_classes():
+    seen = set()
+    for pattern in url_patterns():
+        view = getattr(getattr(pattern, 'callback', None), 'cls', None)
+        for name in ('serializer_class', 'params_serializer_class'):
+            serializer_class = getattr(view, name, None)
+            if (
+                isinstance(serializer_class, type)
+                and issubclass(serializer_class, BaseSerializer)
+                and serializer_class not in seen
+            ):
+                seen.add(serializer_class)
+                yield serializer_class
+
+
+def warm_serializers():
+    for name in api_settings.defaults:
+        # Resolves DEFAULT_*_CLASSES import strings into api_settings' cache
+        getattr(api_settings, name)
+    for serializer_class in serializer_classes():
+        try:
+            # Field introspection imports and caches what request handling needs later
+            serializer_class().fields
+        except Exception:
+            logger.debug("Could not warm %s", serializer_class.__name__, exc_info=True)
+
+
+def warm_translations():
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('')
+    translation.deactivate()
+
+
+STEPS = (
+    ('urls', warm_urls),
+    ('models', warm_models),
+    ('serializers', warm_serializers),
+    ('translations', warm_translations),
+)
+
+
+def warm(freeze=True):
+    """Build lazy per-process state now; returns seconds spent per step"""
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - started
+    # Sockets must not be shared with the forked workers
+    connections.close_all()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return timings
@@ -0,0 +1,16 @@
+"""Helpers shared by the test modules"""
+
+import fakeredis
+from django.test import override_settings
+
+# django-redis against an in-process fakeredis server, for code paths that
+# need the Redis client; tests using it should cache.clear() in setUp
+redis_cache = override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://fakeredis:6379/0',
+        'OPTIONS': {
+            'CONNECTION_POOL_KWARGS': {'connection_class': fakeredis.FakeConnection},
+        },
+    },
+})
@@ -0,0 +1,388 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.bookings.models import Booking
+from apps.properties.models import Address, Property
+from apps.properties.serializers import PropertyImageSerializer
+from apps.users.management.commands import profile_startup
+from apps.users.serializers import CustomTokenObtainPairSerializer
+from core import metrics, startup
+from core.db.pool import ConnectionPool, PoolTimeout, existing_pool, get_pool
+from core.middleware import APIMessageMiddleware
+from core.pagination import KeysetPagination
+from core.query_budgets import DEFAULT_SIZES, evaluate, load_budgets, measure
+from core.testing import redis_cache
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """Runs the check_query_budgets harness; commits are real, as in production"""
+
+    def test_endpoints_within_budget_and_flat_in_data_size(self):
+        measured = {}
+        for size in DEFAULT_SIZES:
+            measured[size] = measure(size)
+            call_command('flush', verbosity=0, interactive=False)
+        _, _, problems = evaluate(measured, load_budgets())
+        self.assertEqual(problems, [])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        host = User.objects.create_user(email='host@test.local', username='host', password='x')
+        self.guest = User.objects.create_user(email='guest@test.local', username='guest', password='x')
+        properties = [
+            Property.objects.create(
+                host=host, title=title, slug=title.lower(), property_type='house',
+                base_price_per_night=Decimal('100'), max_guests=2,
+                address=Address.objects.create(
+                    street_address='1 Test St', city='Hanoi', country='VN', latitude=21, longitude=105,
+                ),
+            )
+            for title in ('Beta', 'Alpha')
+        ]
+        start = datetime.date(2030, 1, 1)
+        now = timezone.now()
+        for n in range(7):
+            check_in = start + datetime.timedelta(days=3 * n)
+            Booking.objects.create(
+                guest=self.guest, property=properties[n % 2], check_in_date=check_in,
+                check_out_date=check_in + datetime.timedelta(days=2), nights=2,
+                price_per_night=Decimal('100'), subtotal=Decimal('200'), total_amount=Decimal('200'),
+                # Ties and NULLs on purpose
+                confirmed_at=None if n % 3 == 0 else now - datetime.timedelta(hours=n // 2),
+            )
+
+    def page_through(self, ordering, page_size=2):
+        view = SimpleNamespace(keyset_ordering=ordering)
+        seen, params = [], {'page_size': page_size}
+        while True:
+            paginator = KeysetPagination()
+            request = Request(APIRequestFactory().get('/bookings/', params))
+            seen.extend(paginator.paginate_queryset(Booking.objects.all(), request, view))
+            if not paginator.has_next:
+                return seen
+            params['cursor'] = paginator.encode_cursor(paginator.page[-1])
+
+    def assert_pages_match(self, ordering, expected_order):
+        found = [booking.pk for booking in self.page_through(ordering)]
+        self.assertEqual(found, list(Booking.objects.order_by(*expected_order).values_list('pk', flat=True)))
+
+    def test_nulls_sort_last_ascending_and_first_descending(self):
+        self.assert_pages_match(['confirmed_at'], [F('confirmed_at').asc(nulls_last=True), 'pk'])
+        self.assert_pages_match(['-confirmed_at'], [F('confirmed_at').desc(nulls_first=True), '-pk'])
+
+    def test_ordering_across_a_relation(self):
+        self.assert_pages_match(['property__title', '-check_in_date'], ['property__title', '-check_in_date', '-pk'])
+        self.assert_pages_match(['-property_id'], ['-property_id', '-pk'])
+
+    def test_unsupported_orderings_are_a_bad_request(self):
+        for ordering in (['guest__bookings__nights'], ['property'], ['nope'], [F('nights').desc()]):
+            with self.subTest(ordering=ordering):
+                with self.assertRaises(ValidationError):
+                    self.page_through(ordering)
+
+    def test_cursor_must_be_signed_and_match_the_ordering(self):
+        paginator = KeysetPagination()
+        view = SimpleNamespace(keyset_ordering=['-check_in_date'])
+        request = Request(APIRequestFactory().get('/bookings/', {'page_size': 2}))
+        paginator.paginate_queryset(Booking.objects.all(), request, view)
+        cursor = paginator.encode_cursor(paginator.page[-1])
+
+        for params, view in (
+            ({'cursor': cursor + 'x'}, view),
+            ({'cursor': cursor}, SimpleNamespace(keyset_ordering=['check_in_date'])),
+        ):
+            request = Request(APIRequestFactory().get('/bookings/', params))
+            with self.assertRaises(ValidationError):
+                KeysetPagination().paginate_queryset(Booking.objects.all(), request, view)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.in_transaction = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+    def get_transaction_status(self):
+        return 2 if self.in_transaction else 0
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def cursor(self):
+        if self.broken:
+            raise OSError('server closed the connection')
+        return mock.MagicMock()
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def pool(self, **options):
+        self.created = []
+
+        def factory():
+            self.created.append(FakeConnection())
+            return self.created[-1]
+
+        return ConnectionPool(factory, **options)
+
+    def test_returned_connections_are_reused(self):
+        pool = self.pool()
+        connection = pool.getconn()
+        pool.putconn(connection)
+        self.assertIs(pool.getconn(), connection)
+        self.assertEqual(len(self.created), 1)
+
+    def test_checkouts_are_bounded(self):
+        pool = self.pool(max_size=1, timeout=0.05)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_the_released_connection(self):
+        pool = self.pool(max_size=1, timeout=5)
+        connection = pool.getconn()
+        threading.Timer(0.05, pool.putconn, [connection]).start()
+        self.assertIs(pool.getconn(), connection)
+        stats = pool.stats()
+        self.assertEqual((stats['checkouts'], stats['waits']), (2, 1))
+        self.assertGreater(stats['max_wait_ms'], 0)
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        pool = self.pool()
+        connection = pool.getconn()
+        connection.in_transaction = True
+        pool.putconn(connection)
+        self.assertFalse(pool.getconn().in_transaction)
+
+    def test_expired_connection_is_closed_on_return(self):
+        pool = self.pool(max_lifetime=0)
+        connection = pool.getconn()
+        pool.putconn(connection)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.getconn(), connection)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_broken_idle_connection_is_replaced(self):
+        pool = self.pool(max_size=1, health_check_interval=0)
+        connection = pool.getconn()
+        pool.putconn(connection)
+        connection.broken = True
+        self.assertIsNot(pool.getconn(), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_foreign_connections_are_closed_not_pooled(self):
+        pool = self.pool()
+        stranger = FakeConnection()
+        pool.putconn(stranger)
+        self.assertTrue(stranger.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_pools_are_per_process(self):
+        first = get_pool('test', FakeConnection)
+        self.assertIs(get_pool('test', FakeConnection), first)
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertIsNone(existing_pool('test'))
+            self.assertIsNot(get_pool('test', FakeConnection), first)
+
+
+@redis_cache
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.registry = metrics.MetricsRegistry()
+        patcher = mock.patch.object(metrics, 'registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_histogram_buckets_and_percentiles(self):
+        self.assertEqual([metrics.bucket_for(v) for v in (7, 123, 4567)], [7, 120, 4500])
+        histogram = metrics.Histogram()
+        for value in range(1, 101):
+            histogram.record(value)
+        self.assertEqual((histogram.percentile(50), histogram.percentile(99)), (50, 99))
+        self.assertEqual(metrics.Histogram().percentile(95), 0)
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get('/api/auth/profile/')
+        self.client.get('/api/auth/profile/')
+        self.client.get('/api/no-such-endpoint/')
+        self.assertEqual(self.registry.counters['users:profile']['requests'], 2)
+        self.assertEqual(self.registry.counters['unresolved']['requests'], 1)
+        self.assertGreater(sum(self.registry.histograms['users:profile']['db_queries'].counts), 0)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get('/api/auth/profile/')
+        self.assertFalse(self.registry.counters)
+
+    @override_settings(METRICS_SQL_SAMPLE_RATE=1, METRICS_SLOW_REQUEST_MS=0)
+    def test_sampled_slow_request_logs_its_queries(self):
+        with self.assertLogs('aircnc_clone.performance', 'WARNING') as logs:
+            self.client.get('/api/auth/profile/')
+        self.assertIn('Slow request GET /api/auth/profile/ (users:profile)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_workers_merge_in_redis_within_the_window(self):
+        request_metrics = metrics.RequestMetrics()
+        for wall_ms in (10, 1000):
+            worker = metrics.MetricsRegistry()
+            worker.observe('users:profile', wall_ms, request_metrics, 100)
+            worker.flush()
+        # Counts flushed before the window are no longer reported
+        stale = metrics.MetricsRegistry()
+        stale.observe('users:profile', 5, request_metrics, 100)
+        with mock.patch.object(metrics, 'time_slot', return_value=metrics.time_slot() - 1000):
+            stale.flush()
+
+        summary = metrics.cluster_summary()['users:profile']
+        self.assertEqual(summary['requests'], 2)
+        self.assertEqual((summary['wall_ms']['p50'], summary['wall_ms']['p99']), (10, 1000))
+
+    def test_endpoint_is_admin_only(self):
+        self.client.get('/api/auth/profile/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['views']['users:profile']['requests'], 1)
+        self.assertIn('password_hashing', response.data['worker'])
+
+
+@override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+class APIMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='a@test.local', username='a', password='x')
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient(enforce_csrf_checks=True)
+
+    def session_queries(self, queries):
+        return [query['sql'] for query in queries if 'django_session' in query['sql']]
+
+    def test_bearer_api_calls_skip_the_session(self):
+        self.client.login(email='a@test.local', password='x')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session_queries(queries), [])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_cookie_api_calls_keep_the_session(self):
+        self.client.login(email='a@test.local', password='x')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.session_queries(queries), [])
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_csrf_applies_only_to_cookie_auth(self):
+        data = {'first_name': 'Ann'}
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.patch('/api/auth/profile/update/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials()
+        self.client.login(email='a@test.local', password='x')
+        response = self.client.patch('/api/auth/profile/update/', data, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_bearer_api_calls_get_no_message_storage(self):
+        factory = RequestFactory()
+        middleware = APIMessageMiddleware(lambda request: HttpResponse())
+        api = factory.get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        admin = factory.get('/admin/')
+        admin.session = SessionStore()
+        for request in (api, admin):
+            middleware(request)
+        self.assertFalse(hasattr(api, '_messages'))
+        self.assertTrue(hasattr(admin, '_messages'))
+
+
+class StartupTests(SimpleTestCase):
+    def test_warm_builds_lazy_state_and_freezes_the_heap(self):
+        with mock.patch('gc.freeze') as freeze, mock.patch.object(startup, 'connections') as connections:
+            timings = startup.warm()
+        self.assertEqual(list(timings), ['urls', 'models', 'serializers', 'translations'])
+        freeze.assert_called_once_with()
+        connections.close_all.assert_called_once_with()
+        self.assertTrue(get_resolver()._populated)
+
+        with mock.patch('gc.freeze') as freeze, mock.patch.object(startup, 'connections'):
+            startup.warm(freeze=False)
+        freeze.assert_not_called()
+
+    def test_serializers_of_routed_views(self):
+        serializers = set(startup.serializer_classes())
+        self.assertIn(PropertyImageSerializer, serializers)
+        self.assertTrue(all(issubclass(cls, BaseSerializer) for cls in serializers))
+
+    def test_import_time_parsing(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   apps.users.models\n'
+            'import time:      3000 |       3400 | django.db\n'
+            'unrelated line\n'
+        )
+        self.assertEqual(profile_startup.import_times(stderr), {'apps.users.models': 120, 'django.db': 3000})
+        self.assertEqual(
+            [profile_startup.owner(name) for name in ('apps.users.models', 'django.db', 'json')],
+            ['apps.users', 'django', 'json'],
+        )
+        root = Path(settings.BASE_DIR)
+        self.assertEqual(profile_startup.path_module(root / 'core' / 'startup.py', [root]), 'core.startup')
+        self.assertEqual(profile_startup.path_module(root / 'core' / '__init__.py', [root]), 'core')
+        self.assertIsNone(profile_startup.path_module('/elsewhere/module.py', [root]))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_profile_startup_command(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command('profile_startup', warm=True, workers=1, save=path, stdout=io.StringIO())
+        with open(path) as f:
+            results = json.load(f)
+        self.assertEqual(
+            [row['phase'] for row in results['phases']], ['interpreter', 'django.setup', 'urlconf', 'warm']
+        )
+        self.assertEqual(len(results['workers']), 1)
+        self.assertIn('apps.users', results['apps'])
+        self.assertIn('django', results['import_ms_by_package'])
@@ -0,0 +1,68 @@
+"""
+Helpers shared by the image upload endpoints.
+
+Uploads are streamed to a temporary file in chunks while being hashed,
+so a request never holds a whole file in memory, and images are checked
+from their header without decoding any pixels. Stored files are named by
+the SHA-256 of their content, which makes every URL safe to cache forever
+and stores identical files once.
+"""
+
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from PIL import Image
+
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Streams each upload to disk, hashing it and dropping files over ``max_bytes``"""
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_bytes is not None and start + len(raw_data) > self.max_bytes:
+            # The file is left out of request.FILES entirely
+            raise SkipFile()
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+def inspect_image(upload):
+    """``(format, width, height)`` from the image header, or None if unsupported"""
+    try:
+        with Image.open(upload) as image:
+            return image.format, image.width, image.height
+    except (OSError, Image.DecompressionBombError):
+        return None
+    finally:
+        upload.seek(0)
+
+
+def content_name(directory, digest, extension):
+    return f'{directory}/{digest[:2]}/{digest}.{extension}'
+
+
+def save_content(name, content):
+    """Save ``content`` under ``name`` unless an identical file is already there"""
+    if default_storage.exists(name):
+        return name
+    # Storage.save reads file objects chunk by chunk
+    return default_storage.save(name, content)
+
+
+def webp_name(directory, content):
+    return content_name(directory, hashlib.sha256(content).hexdigest(), 'webp')
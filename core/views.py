@@ -0,0 +1,21 @@
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.views import Response
+
+from apps.users.hashing import hashing_pool
+from core import metrics
+from core.db.pool import pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def metrics_view(request):
+    """p50/p95/p99 per URL name across all workers"""
+    metrics.registry.flush()
+    return Response({
+        'views': metrics.cluster_summary(),
+        'worker': {
+            'db_pools': pool_stats(),
+            'password_hashing': hashing_pool.stats(),
+        },
+    })